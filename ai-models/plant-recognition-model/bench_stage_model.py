@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from itertools import islice
+import numpy as np
+from image_cache import ImageCache, decode_image
+
+# Usage:
+#   python bench_stage_model.py --synthetic
+#   python bench_stage_model.py --images datasets/plant-dataset/stages --batch-sizes 1,8 --threads 1,4 --streams 1,2
+
+# Constants
+IMAGE_SIZE = (224, 224)
+KERAS_MODEL_PATH = "plant_stages_classification_model.keras"
+OV_MODEL_PATHS = {
+    "openvino-fp32": "openvino_model/model.xml",
+    "openvino-int8": "openvino_model_int8/model.xml",
+}
+BACKENDS = ["keras", "openvino-fp32", "openvino-int8"]
+
+def int_list(value):
+    return [int(item) for item in value.split(',')]
+
+def load_images(directory, limit):
+    """Up to `limit` images under `directory`, preprocessed as in training (224x224 RGB scaled to [0, 1])."""
+    images = []
+    for root, dirs, files in sorted(os.walk(directory)):
+        for file in sorted(files):
+            if file.lower().endswith(('.jpg', '.png', '.jpeg')):
+                images.append(decode_image(os.path.join(root, file)).astype(np.float32) / 255.0)
+                if len(images) == limit:
+                    return np.stack(images)
+    if not images:
+        raise ValueError(f"No images found under {directory}")
+    return np.stack(images)
+
+def synthetic_images(count, seed):
+    rng = np.random.default_rng(seed)
+    return rng.random((count, IMAGE_SIZE[0], IMAGE_SIZE[1], 3), dtype=np.float32)
+
+def make_batches(images, batch_size, count):
+    """`count` batches cycling through the image pool, built up front so timing excludes data preparation."""
+    batches = []
+    for i in range(count):
+        indices = np.arange(i * batch_size, (i + 1) * batch_size) % len(images)
+        batches.append(np.ascontiguousarray(images[indices]))
+    return batches
+
+def summarize(latencies, batch_size, elapsed, waits=None):
+    latencies = np.array(latencies) * 1000
+    summary = {
+        "iterations": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "images_per_sec": round(len(latencies) * batch_size / elapsed, 2),
+    }
+    if waits is not None:
+        waits = np.array(waits) * 1000
+        summary["queue_wait_p50_ms"] = round(float(np.percentile(waits, 50)), 3)
+        summary["queue_wait_p95_ms"] = round(float(np.percentile(waits, 95)), 3)
+    return summary
+
+def bench_keras(model, batches, warmup):
+    """Synchronous per-batch latency through a direct model call, skipping predict()'s per-call setup."""
+    for batch in batches[:warmup]:
+        model(batch, training=False)
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches[warmup:]:
+        batch_start = time.perf_counter()
+        model(batch, training=False).numpy()
+        latencies.append(time.perf_counter() - batch_start)
+    return latencies, time.perf_counter() - start
+
+def compile_openvino(core, model_path, batch_size, threads, streams):
+    model = core.read_model(model_path)
+    model.reshape([batch_size, IMAGE_SIZE[0], IMAGE_SIZE[1], 3])  # The saved IRs have batch 1 or a dynamic batch
+    config = {"NUM_STREAMS": str(streams)}
+    if threads:
+        config["INFERENCE_NUM_THREADS"] = str(threads)
+    return core.compile_model(model, "CPU", config)
+
+def bench_openvino(compiled_model, batches, warmup, streams):
+    """Per-batch latency with `streams` infer requests kept in flight, so throughput reflects every stream.
+
+    Latency is each request's own inference time as measured by OpenVINO.
+    Time spent in start_async waiting for an idle request is returned
+    separately as queue wait.
+    """
+    from openvino import AsyncInferQueue
+    queue = AsyncInferQueue(compiled_model, streams)
+    latencies = []
+
+    def on_done(request, _):
+        latencies.append(request.latency / 1000)
+
+    queue.set_callback(on_done)
+    for batch in batches[:warmup]:
+        queue.start_async({0: batch})
+    queue.wait_all()
+    latencies.clear()
+
+    waits = []
+    start = time.perf_counter()
+    for batch in batches[warmup:]:
+        submitted = time.perf_counter()
+        queue.start_async({0: batch})
+        waits.append(time.perf_counter() - submitted)
+    queue.wait_all()
+    return latencies, time.perf_counter() - start, waits
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+    try:
+        import openvino
+        info["openvino"] = openvino.__version__
+    except ImportError:
+        pass
+    if "tensorflow" in sys.modules:
+        info["tensorflow"] = sys.modules["tensorflow"].__version__
+    return info
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency percentiles and throughput of the plant-stage model per backend.")
+    parser.add_argument('--backends', default=','.join(BACKENDS), help=f"Comma-separated subset of {BACKENDS}")
+    parser.add_argument('--keras-model', default=KERAS_MODEL_PATH)
+    parser.add_argument('--fp32-model', default=OV_MODEL_PATHS["openvino-fp32"])
+    parser.add_argument('--int8-model', default=OV_MODEL_PATHS["openvino-int8"])
+    parser.add_argument('--batch-sizes', type=int_list, default=[1, 8, 32])
+    parser.add_argument('--threads', type=int_list, default=[0], help="Inference threads; 0 leaves the runtime default")
+    parser.add_argument('--streams', type=int_list, default=[1], help="OpenVINO streams (infer requests in flight)")
+    parser.add_argument('--iterations', type=int, default=50, help="Timed batches per configuration")
+    parser.add_argument('--warmup', type=int, default=5, help="Untimed batches run first per configuration")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--images', help="Folder of images, searched recursively")
+    source.add_argument('--cache', help="Pre-decoded image cache written by image_cache.py")
+    source.add_argument('--synthetic', action='store_true', help="Random tensors instead of images")
+    parser.add_argument('--pool-size', type=int, default=64, help="Distinct images cycled through the batches")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='stage_benchmark.json')
+    args = parser.parse_args()
+
+    backends = args.backends.split(',')
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Unknown backends: {sorted(unknown)}")
+    model_paths = {"keras": args.keras_model, "openvino-fp32": args.fp32_model, "openvino-int8": args.int8_model}
+
+    if args.synthetic:
+        images = synthetic_images(args.pool_size, args.seed)
+    elif args.cache:
+        images = np.stack(list(islice(ImageCache(args.cache), args.pool_size))).astype(np.float32) / 255.0
+    else:
+        images = load_images(args.images, args.pool_size)
+    print(f"Image pool: {len(images)} {'synthetic tensors' if args.synthetic else 'images from ' + (args.cache or args.images)}")
+
+    results = []
+    for backend in backends:
+        model_path = model_paths[backend]
+        if not os.path.exists(model_path):
+            print(f"Skipping {backend}: {model_path} not found")
+            results.append({"backend": backend, "model": model_path, "skipped": "model not found"})
+            continue
+
+        if backend == "keras":
+            import tensorflow as tf
+            # TensorFlow fixes its thread pools on first use, so Keras runs once per batch size
+            threads = args.threads[0]
+            if threads:
+                tf.config.threading.set_intra_op_parallelism_threads(threads)
+                tf.config.threading.set_inter_op_parallelism_threads(1)
+            model = tf.keras.models.load_model(model_path)
+            configs = [(batch_size, threads, None) for batch_size in args.batch_sizes]
+        else:
+            from openvino import Core
+            core = Core()
+            configs = [(batch_size, threads, streams) for batch_size in args.batch_sizes
+                       for threads in args.threads for streams in args.streams]
+
+        for batch_size, threads, streams in configs:
+            batches = make_batches(images, batch_size, args.warmup + args.iterations)
+            if backend == "keras":
+                latencies, elapsed = bench_keras(model, batches, args.warmup)
+                waits = None
+            else:
+                compiled_model = compile_openvino(core, model_path, batch_size, threads, streams)
+                latencies, elapsed, waits = bench_openvino(compiled_model, batches, args.warmup, streams)
+            result = {"backend": backend, "model": model_path, "batch_size": batch_size, "threads": threads,
+                      "streams": streams, **summarize(latencies, batch_size, elapsed, waits)}
+            results.append(result)
+            print(f"{backend:<14} batch {batch_size:>3} threads {threads or 'auto':>4} streams {streams or '-':>2}  "
+                  f"p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+                  f"{result['images_per_sec']:>9.1f} img/s"
+                  + (f"  queue wait p50 {result['queue_wait_p50_ms']:.2f} ms" if waits is not None else ""))
+
+    report = {
+        "environment": environment(),
+        "input": "synthetic" if args.synthetic else args.cache or args.images,
+        "warmup": args.warmup,
+        "iterations": args.iterations,
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+
+# Constants
+VALIDATION_SPLIT = 0.2
+# The formats flow_from_directory accepts
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff')
+
+def split_files(base_dir, validation_split=VALIDATION_SPLIT):
+    """Lists (paths, labels) for training and validation, and the class names.
+
+    Mirrors flow_from_directory with validation_split: classes are the
+    sorted subfolders, files within a class are sorted by folder then
+    name, and the first int(validation_split * n) go to validation.
+    """
+    class_names = sorted(name for name in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, name)))
+    train, validation = ([], []), ([], [])
+    for label, class_name in enumerate(class_names):
+        files = []
+        for root, _, filenames in sorted(os.walk(os.path.join(base_dir, class_name)), key=lambda entry: entry[0]):
+            files += [os.path.join(root, name) for name in sorted(filenames) if name.lower().endswith(IMAGE_EXTENSIONS)]
+        split = int(validation_split * len(files))
+        for subset, subset_files in ((validation, files[:split]), (train, files[split:])):
+            subset[0].extend(subset_files)
+            subset[1].extend([label] * len(subset_files))
+    return train, validation, class_names
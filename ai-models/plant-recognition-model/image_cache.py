@@ -0,0 +1,154 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+
+# Usage:
+#   python image_cache.py datasets/plant-dataset/stages --output image_cache/stages
+# then read it with ImageCache('image_cache/stages').
+
+# Constants
+IMAGE_SIZE = (224, 224)
+SHARD_SIZE = 1024  # Images per shard file (~150 MB of uint8 tensors)
+INDEX_FILE = 'index.json'
+RESAMPLE = 'nearest'  # Resize filter, recorded in the index so caches built with another one are rebuilt
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg')
+
+def list_images(image_dir):
+    """(relative path, class name) for every image, classes being the top-level folders as in flow_from_directory."""
+    entries = []
+    for class_name in sorted(os.listdir(image_dir)):
+        class_dir = os.path.join(image_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        for root, dirs, files in os.walk(class_dir):
+            dirs.sort()
+            for file in sorted(files):
+                if file.lower().endswith(IMAGE_EXTENSIONS):
+                    entries.append((os.path.relpath(os.path.join(root, file), image_dir), class_name))
+    return entries
+
+def decode_image(path):
+    """Decodes one image to a 224x224x3 uint8 array.
+
+    Decoding and resizing match Keras' load_img, which flow_from_directory
+    uses in training: the full image is decoded, then resized nearest-neighbour.
+    """
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB').resize(IMAGE_SIZE, Image.Resampling[RESAMPLE.upper()]), dtype=np.uint8)
+
+def source_signature(image_dir, entries):
+    return [[path, os.path.getsize(os.path.join(image_dir, path)), os.path.getmtime(os.path.join(image_dir, path))]
+            for path, _ in entries]
+
+def build_cache(image_dir, cache_dir, shard_size=SHARD_SIZE, workers=None, force=False):
+    """Decodes every image under `image_dir` into sharded .npy files in `cache_dir` and writes the index.
+
+    Decoding runs in a process pool; each shard is filled through a memmap,
+    so memory stays flat however large the dataset is. An existing cache is
+    reused when no source image was added, removed or modified.
+    """
+    entries = list_images(image_dir)
+    if not entries:
+        raise ValueError(f"No images found under {image_dir}")
+    signature = source_signature(image_dir, entries)
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    if not force and os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        if (index.get("source") == signature and index.get("image_size") == list(IMAGE_SIZE)
+                and index.get("resample") == RESAMPLE):
+            print(f"Cache in {cache_dir} is up to date ({len(entries)} images)")
+            return index
+
+    os.makedirs(cache_dir, exist_ok=True)
+    classes = sorted({class_name for _, class_name in entries})
+    paths = [os.path.join(image_dir, path) for path, _ in entries]
+    shards = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_number, start in enumerate(range(0, len(paths), shard_size)):
+            shard_paths = paths[start:start + shard_size]
+            shard_file = f"shard_{shard_number:05d}.npy"
+            tmp_path = os.path.join(cache_dir, shard_file + '.tmp')
+            shard = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8,
+                                              shape=(len(shard_paths), IMAGE_SIZE[0], IMAGE_SIZE[1], 3))
+            for i, image in enumerate(executor.map(decode_image, shard_paths, chunksize=16)):
+                shard[i] = image
+            shard.flush()
+            del shard
+            os.replace(tmp_path, os.path.join(cache_dir, shard_file))
+            shards.append({"file": shard_file, "count": len(shard_paths)})
+            print(f"Wrote {shard_file}: {start + len(shard_paths)}/{len(paths)} images")
+
+    index = {
+        "image_size": list(IMAGE_SIZE),
+        "resample": RESAMPLE,
+        "classes": classes,
+        "shards": shards,
+        "paths": [path for path, _ in entries],
+        "labels": [classes.index(class_name) for _, class_name in entries],
+        "source": signature,
+    }
+    # The index goes last, so a half-written cache is never picked up as complete
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+    for file in os.listdir(cache_dir):
+        if file.startswith('shard_') and file not in {shard["file"] for shard in shards}:
+            os.remove(os.path.join(cache_dir, file))  # Shards left over from a larger previous build
+    return index
+
+class ImageCache:
+    """Read-only view of a cache written by build_cache.
+
+    Shards are memory-mapped, so images are paged in from disk on access
+    and every slice returned here is a view, not a copy. Arrays are uint8
+    0-255; scale them as the model expects (the stage model divides by 255).
+    """
+
+    def __init__(self, cache_dir):
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r') as f:
+            index = json.load(f)
+        self.classes = index["classes"]
+        self.paths = index["paths"]
+        self.labels = np.array(index["labels"], dtype=np.int64)
+        self.shards = [np.load(os.path.join(cache_dir, shard["file"]), mmap_mode='r') for shard in index["shards"]]
+        self.offsets = np.cumsum([0] + [len(shard) for shard in self.shards])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, i):
+        shard_number = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        return self.shards[shard_number][i - self.offsets[shard_number]]
+
+    def __iter__(self):
+        for shard in self.shards:
+            yield from shard
+
+    def batches(self, batch_size):
+        """Yields (images, labels, first index) with images a zero-copy view; batches stop at shard boundaries."""
+        for shard_number, shard in enumerate(self.shards):
+            offset = int(self.offsets[shard_number])
+            for start in range(0, len(shard), batch_size):
+                images = shard[start:start + batch_size]
+                yield images, self.labels[offset + start:offset + start + len(images)], offset + start
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-decode an image folder into sharded uint8 224x224x3 tensors.")
+    parser.add_argument('image_dir', help="Folder with one subfolder per class")
+    parser.add_argument('--output', required=True, help="Cache directory")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="Decoding processes; defaults to the CPU count")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the cache is up to date")
+    args = parser.parse_args()
+
+    index = build_cache(args.image_dir, args.output, args.shard_size, args.workers, args.force)
+    counts = np.bincount(index["labels"], minlength=len(index["classes"]))
+    print(f"{len(index['paths'])} images in {len(index['shards'])} shard(s): "
+          + ", ".join(f"{name} {count}" for name, count in zip(index["classes"], counts)))
+
+if __name__ == "__main__":
+    main()
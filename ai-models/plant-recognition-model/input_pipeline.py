@@ -0,0 +1,173 @@
+import os
+import time
+import argparse
+import tensorflow as tf
+from tensorflow.keras import layers
+from dataset_split import VALIDATION_SPLIT, split_files
+
+# Usage:
+#   python input_pipeline.py convert datasets/plant-dataset/stages --output tfrecords/stages
+#   python input_pipeline.py benchmark datasets/plant-dataset/stages
+# Training uses it through: python train_model.py --pipeline tfdata [--tfrecords tfrecords/stages]
+
+# Constants
+IMAGE_SIZE = (224, 224)
+BATCH_SIZE = 20
+AUTOTUNE = tf.data.AUTOTUNE
+
+def _nearest_indices(size, target):
+    """Source row or column of each output pixel, summed in float64 step by step as PIL's nearest resize does."""
+    scale = tf.cast(size, tf.float64) / target
+    steps = tf.concat([[scale * 0.5], tf.fill([target - 1], scale)], 0)
+    return tf.cast(tf.math.cumsum(steps), tf.int32)
+
+def decode_image(image_bytes):
+    """Encoded image bytes to a 224x224x3 uint8 tensor; uint8 keeps the cached copy 4x smaller than float32.
+
+    Decoding and resizing reproduce Keras' load_img: JPEGs use the accurate
+    integer DCT PIL decodes with, and the resize is PIL's nearest-neighbour,
+    so both training pipelines and serving see the same pixels.
+    """
+    image = tf.cond(tf.io.is_jpeg(image_bytes),
+                    lambda: tf.io.decode_jpeg(image_bytes, channels=3, dct_method='INTEGER_ACCURATE'),
+                    lambda: tf.io.decode_image(image_bytes, channels=3, expand_animations=False))
+    shape = tf.shape(image)
+    image = tf.gather(image, _nearest_indices(shape[0], IMAGE_SIZE[0]), axis=0)
+    return tf.gather(image, _nearest_indices(shape[1], IMAGE_SIZE[1]), axis=1)
+
+def make_augmentation():
+    # The generator's transforms as Keras layers, applied to whole batches at once
+    return tf.keras.Sequential([
+        layers.RandomRotation(30 / 360, fill_mode='nearest'),
+        layers.RandomTranslation(0.2, 0.2, fill_mode='nearest'),
+        layers.RandomZoom(0.2, fill_mode='nearest'),
+        layers.RandomFlip('horizontal'),
+    ], name='augmentation')
+
+def build_dataset(images, training, batch_size=BATCH_SIZE, cache_path='', seed=None):
+    """Batched (image, label) pairs scaled to [0, 1], from a dataset of (encoded bytes, label).
+
+    Decoding runs in parallel and the decoded uint8 images are cached in
+    memory, or in files under `cache_path`, so only the first epoch reads
+    and decodes. Training data is reshuffled every epoch and augmented per
+    batch, and batches are prefetched while the model trains.
+    """
+    dataset = images.map(lambda image_bytes, label: (decode_image(image_bytes), label), num_parallel_calls=AUTOTUNE)
+    dataset = dataset.cache(cache_path)
+    if training:
+        dataset = dataset.shuffle(dataset.cardinality() if dataset.cardinality() > 0 else 10000, seed=seed,
+                                  reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(lambda image, label: (tf.cast(image, tf.float32) / 255.0, label), num_parallel_calls=AUTOTUNE)
+    if training:
+        augmentation = make_augmentation()
+        dataset = dataset.map(lambda image, label: (augmentation(image, training=True), label),
+                              num_parallel_calls=AUTOTUNE)
+    return dataset.prefetch(AUTOTUNE)
+
+def read_files(paths, labels):
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+    return dataset.map(lambda path, label: (tf.io.read_file(path), label), num_parallel_calls=AUTOTUNE)
+
+def _example(image_bytes, label):
+    return tf.train.Example(features=tf.train.Features(feature={
+        "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[image_bytes])),
+        "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[label])),
+    }))
+
+def write_tfrecords(base_dir, output_dir, num_shards=8, validation_split=VALIDATION_SPLIT):
+    """Writes each subset's original image bytes and labels into `num_shards` TFRecord files.
+
+    Reading a few large files sequentially replaces thousands of small
+    random reads, and the split is fixed at conversion time.
+    """
+    train, validation, class_names = split_files(base_dir, validation_split)
+    os.makedirs(output_dir, exist_ok=True)
+    for subset, (paths, labels) in (("training", train), ("validation", validation)):
+        shards = min(num_shards, max(len(paths), 1))
+        writers = [tf.io.TFRecordWriter(os.path.join(output_dir, f"{subset}-{i:05d}-of-{shards:05d}.tfrecord"))
+                   for i in range(shards)]
+        for i, (path, label) in enumerate(zip(paths, labels)):
+            with open(path, 'rb') as f:
+                writers[i % shards].write(_example(f.read(), label).SerializeToString())
+        for writer in writers:
+            writer.close()
+        print(f"Wrote {len(paths)} {subset} images to {shards} shard(s)")
+    with open(os.path.join(output_dir, "classes.txt"), 'w') as f:
+        f.write("\n".join(class_names))
+    return class_names
+
+def read_tfrecords(tfrecord_dir, subset):
+    files = tf.data.Dataset.list_files(os.path.join(tfrecord_dir, f"{subset}-*.tfrecord"), shuffle=False)
+    features = {"image": tf.io.FixedLenFeature([], tf.string), "label": tf.io.FixedLenFeature([], tf.int64)}
+
+    def parse(record):
+        example = tf.io.parse_single_example(record, features)
+        return example["image"], tf.cast(example["label"], tf.int32)
+
+    dataset = files.interleave(tf.data.TFRecordDataset, num_parallel_calls=AUTOTUNE, deterministic=True)
+    return dataset.map(parse, num_parallel_calls=AUTOTUNE)
+
+def load_datasets(base_dir=None, tfrecord_dir=None, batch_size=BATCH_SIZE, cache_dir=None):
+    """Training and validation datasets plus class names, from image folders or from converted TFRecords.
+
+    With `cache_dir`, decoded images are cached on disk and survive between
+    runs; otherwise they are cached in memory.
+    """
+    if tfrecord_dir:
+        with open(os.path.join(tfrecord_dir, "classes.txt"), 'r') as f:
+            class_names = f.read().split("\n")
+        train_images, validation_images = read_tfrecords(tfrecord_dir, "training"), read_tfrecords(tfrecord_dir, "validation")
+    else:
+        (train_paths, train_labels), (validation_paths, validation_labels), class_names = split_files(base_dir)
+        train_images = read_files(train_paths, tf.constant(train_labels, tf.int32))
+        validation_images = read_files(validation_paths, tf.constant(validation_labels, tf.int32))
+
+    cache_paths = ('', '')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_paths = (os.path.join(cache_dir, "training"), os.path.join(cache_dir, "validation"))
+    train_dataset = build_dataset(train_images, True, batch_size, cache_paths[0])
+    validation_dataset = build_dataset(validation_images, False, batch_size, cache_paths[1])
+    return train_dataset, validation_dataset, class_names
+
+def images_per_second(batches, num_batches=None):
+    """Throughput over `num_batches` batches, or a whole epoch; the first batch pays for start-up and is left out."""
+    iterator = iter(batches)
+    next(iterator)
+    start = time.perf_counter()
+    images = 0
+    for i, (_, labels) in enumerate(iterator):
+        images += len(labels)
+        if num_batches and i + 1 == num_batches:
+            break
+    return images / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="tf.data input pipeline for the plant-stage model.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert = subparsers.add_parser("convert", help="Write the training/validation split as TFRecord shards")
+    convert.add_argument("base_dir")
+    convert.add_argument("--output", required=True)
+    convert.add_argument("--shards", type=int, default=8)
+    benchmark = subparsers.add_parser("benchmark", help="Training images per second, generator vs tf.data")
+    benchmark.add_argument("base_dir")
+    benchmark.add_argument("--tfrecords", default=None)
+    benchmark.add_argument("--batches", type=int, default=50, help="Generator batches to time")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        class_names = write_tfrecords(args.base_dir, args.output, args.shards)
+        print(f"Classes: {class_names}")
+        return
+
+    from train_model import prepare_data_generators
+    train_generator, _ = prepare_data_generators(args.base_dir)
+    print(f"ImageDataGenerator: {images_per_second(train_generator, args.batches):.1f} images/s")
+    train_dataset, _, _ = load_datasets(args.base_dir, args.tfrecords)
+    # The cache is complete only after a full epoch, so both tf.data passes run whole epochs
+    print(f"tf.data, first epoch: {images_per_second(train_dataset):.1f} images/s")
+    print(f"tf.data, cached epochs: {images_per_second(train_dataset):.1f} images/s")
+
+if __name__ == "__main__":
+    main()
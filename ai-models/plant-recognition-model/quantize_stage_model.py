@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import nncf
+import openvino as ov
+from dataset_split import split_files
+from image_cache import decode_image
+
+# Usage:
+#   python quantize_stage_model.py --max-accuracy-drop 0.01
+# writes openvino_model_int8/model.xml only if INT8 validation accuracy is within the allowed drop of FP32.
+
+# Constants
+FP32_MODEL_PATH = "openvino_model/model.xml"
+INT8_MODEL_PATH = "openvino_model_int8/model.xml"
+DATASET_DIR = "datasets/plant-dataset/stages"
+
+def load_images(paths, workers=None):
+    """Images preprocessed as in training: 224x224 RGB scaled to [0, 1], one (1, 224, 224, 3) array each."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        images = list(executor.map(decode_image, paths, chunksize=16))
+    return [(image[np.newaxis] / np.float32(255.0)).astype(np.float32) for image in images]
+
+def model_size_mb(xml_path):
+    bin_path = os.path.splitext(xml_path)[0] + ".bin"
+    return round((os.path.getsize(xml_path) + os.path.getsize(bin_path)) / 2**20, 2)
+
+def evaluate(core, model_path, images, labels, threads, repeats=1):
+    """Top-1 accuracy and single-image latencies (ms) on a latency-tuned CPU compile."""
+    config = {"PERFORMANCE_HINT": "LATENCY"}
+    if threads:
+        config["INFERENCE_NUM_THREADS"] = str(threads)
+    compiled_model = core.compile_model(model_path, "CPU", config)
+    request = compiled_model.create_infer_request()
+    request.infer({0: images[0]})  # warm-up
+    predictions = []
+    latencies = []
+    for image in images:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = request.infer({0: image})[compiled_model.output(0)]
+            latencies.append(time.perf_counter() - start)
+        predictions.append(int(np.argmax(output[0])))
+    accuracy = float(np.mean(np.array(predictions) == np.array(labels)))
+    return accuracy, np.array(latencies) * 1000
+
+def summarize(latencies):
+    return {f"p{q}_ms": round(float(np.percentile(latencies, q)), 4) for q in (50, 95, 99)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the stage model IR to INT8 and emit it only if accuracy holds.")
+    parser.add_argument('--model', default=FP32_MODEL_PATH)
+    parser.add_argument('--output', default=INT8_MODEL_PATH)
+    parser.add_argument('--dataset-dir', default=DATASET_DIR)
+    parser.add_argument('--calibration-size', type=int, default=300, help="Training-split images used for calibration")
+    parser.add_argument('--preset', choices=['performance', 'mixed'], default='performance',
+                        help="Symmetric (performance) or asymmetric-activation (mixed) quantization")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01, help="Highest allowed FP32 - INT8 validation accuracy")
+    parser.add_argument('--threads', type=int, default=0, help="Inference threads for latency; 0 leaves the runtime default")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per validation image")
+    parser.add_argument('--workers', type=int, default=None, help="Image decoding processes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report', default='stage_quantization_report.json')
+    args = parser.parse_args()
+
+    # Calibrate on the training split and evaluate on the validation split train_model.py held out
+    (train_paths, _), (validation_paths, validation_labels), class_names = split_files(args.dataset_dir)
+    rng = np.random.default_rng(args.seed)
+    calibration_paths = list(rng.choice(train_paths, min(args.calibration_size, len(train_paths)), replace=False))
+    calibration_images = load_images(calibration_paths, args.workers)
+    validation_images = load_images(validation_paths, args.workers)
+    print(f"Calibrating on {len(calibration_images)} training images, evaluating on {len(validation_images)} validation images")
+
+    core = ov.Core()
+    quantized_model = nncf.quantize(
+        core.read_model(args.model),
+        nncf.Dataset(calibration_images),
+        preset=nncf.QuantizationPreset.PERFORMANCE if args.preset == 'performance' else nncf.QuantizationPreset.MIXED,
+        subset_size=len(calibration_images),
+    )
+
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_dir) as work_dir:
+        candidate = os.path.join(work_dir, os.path.basename(args.output))
+        ov.save_model(quantized_model, candidate)
+
+        fp32_accuracy, fp32_latencies = evaluate(core, args.model, validation_images, validation_labels, args.threads, args.repeats)
+        int8_accuracy, int8_latencies = evaluate(core, candidate, validation_images, validation_labels, args.threads, args.repeats)
+        accuracy_drop = fp32_accuracy - int8_accuracy
+        promoted = accuracy_drop <= args.max_accuracy_drop
+
+        report = {
+            "preset": args.preset,
+            "classes": class_names,
+            "calibration_images": len(calibration_images),
+            "validation_images": len(validation_images),
+            "max_accuracy_drop": args.max_accuracy_drop,
+            "fp32": {"accuracy": round(fp32_accuracy, 4), "size_mb": model_size_mb(args.model), **summarize(fp32_latencies)},
+            "int8": {"accuracy": round(int8_accuracy, 4), "size_mb": model_size_mb(candidate), **summarize(int8_latencies)},
+            "accuracy_drop": round(accuracy_drop, 4),
+            "p50_speedup": round(float(np.median(fp32_latencies) / np.median(int8_latencies)), 3),
+            "promoted": promoted,
+        }
+        if promoted:
+            for extension in (".xml", ".bin"):
+                shutil.move(os.path.splitext(candidate)[0] + extension, os.path.splitext(args.output)[0] + extension)
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if not promoted:
+        print(f"Not promoted: accuracy dropped {accuracy_drop:.4f} (max {args.max_accuracy_drop})")
+        sys.exit(1)
+    print(f"Promoted {args.output}; serve it from local-api with STAGE_MODEL_PATH pointing at it")
+
+if __name__ == "__main__":
+    main()
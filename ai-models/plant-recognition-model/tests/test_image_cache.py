@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+from image_cache import IMAGE_SIZE, ImageCache, build_cache, decode_image
+
+def write_image(path, size, mode, seed):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8)
+    Image.fromarray(pixels.squeeze(), mode).save(path)
+
+def keras_pixels(path):
+    # What flow_from_directory fed the model during training, before rescaling
+    keras_image = pytest.importorskip('tensorflow.keras.utils')
+    return keras_image.img_to_array(keras_image.load_img(path, target_size=IMAGE_SIZE)).astype(np.uint8)
+
+@pytest.mark.parametrize('size, mode, extension', [
+    ((640, 480), 'RGB', 'jpg'),
+    ((3000, 2000), 'RGB', 'jpg'),
+    ((150, 300), 'RGB', 'png'),
+    ((500, 500), 'RGBA', 'png'),
+    ((800, 600), 'L', 'jpg'),
+])
+def test_decode_matches_keras_loader(tmp_path, size, mode, extension):
+    path = tmp_path / f'image.{extension}'
+    write_image(path, size, mode, size[0])
+    np.testing.assert_array_equal(decode_image(path), keras_pixels(path))
+
+def test_cached_images_match_keras_loader(tmp_path):
+    paths = []
+    for i, class_name in enumerate(['flowering', 'mature', 'seedling']):
+        (tmp_path / 'images' / class_name).mkdir(parents=True)
+        for j in range(3):
+            paths.append(tmp_path / 'images' / class_name / f'{j}.jpg')
+            write_image(paths[-1], (400 + 50 * j, 300 + 40 * i), 'RGB', 10 * i + j)
+
+    build_cache(str(tmp_path / 'images'), str(tmp_path / 'cache'), shard_size=4, workers=1)
+    cache = ImageCache(str(tmp_path / 'cache'))
+    assert len(cache) == len(paths)
+    for image, path in zip(cache, paths):
+        np.testing.assert_array_equal(image, keras_pixels(path))
+
+def test_cache_built_with_another_resize_is_rebuilt(tmp_path, capsys):
+    (tmp_path / 'images' / 'seedling').mkdir(parents=True)
+    write_image(tmp_path / 'images' / 'seedling' / '0.jpg', (640, 480), 'RGB', 0)
+    index_path = tmp_path / 'cache' / 'index.json'
+    build_cache(str(tmp_path / 'images'), str(tmp_path / 'cache'), workers=1)
+    index_path.write_text(index_path.read_text().replace('"resample": "nearest"', '"resample": "bicubic"'))
+
+    capsys.readouterr()
+    index = build_cache(str(tmp_path / 'images'), str(tmp_path / 'cache'), workers=1)
+    assert index["resample"] == "nearest"
+    assert "up to date" not in capsys.readouterr().out
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+tf = pytest.importorskip('tensorflow')
+from input_pipeline import IMAGE_SIZE, build_dataset, decode_image
+
+@pytest.mark.parametrize('size, mode, extension', [
+    ((640, 480), 'RGB', 'jpg'),
+    ((1920, 1080), 'RGB', 'jpg'),
+    ((150, 300), 'RGB', 'png'),
+    ((500, 500), 'RGBA', 'png'),
+    ((800, 600), 'L', 'jpg'),
+    ((224, 224), 'RGB', 'png'),
+])
+def test_decode_matches_keras_loader(tmp_path, size, mode, extension):
+    rng = np.random.default_rng(size[0])
+    pixels = rng.integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8)
+    path = tmp_path / f'image.{extension}'
+    Image.fromarray(pixels.squeeze(), mode).save(path)
+
+    # What flow_from_directory fed the model when training with the generator
+    expected = tf.keras.utils.img_to_array(tf.keras.utils.load_img(path, target_size=IMAGE_SIZE)).astype(np.uint8)
+    np.testing.assert_array_equal(decode_image(path.read_bytes()).numpy(), expected)
+
+def test_validation_batches_are_scaled_and_shaped(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f'{i}.jpg'))
+        Image.fromarray(np.full((300 + 10 * i, 400, 3), 50 * i, dtype=np.uint8)).save(paths[-1])
+    images = tf.data.Dataset.from_tensor_slices((paths, [0, 1, 2])).map(lambda path, label: (tf.io.read_file(path), label))
+
+    batch, labels = next(iter(build_dataset(images, training=False, batch_size=3)))
+    assert batch.shape == (3, IMAGE_SIZE[0], IMAGE_SIZE[1], 3)
+    assert labels.numpy().tolist() == [0, 1, 2]
+    assert 0.0 <= float(tf.reduce_min(batch)) and float(tf.reduce_max(batch)) <= 1.0
@@ -1,4 +1,5 @@
 import os
+import argparse
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, models
@@ -67,31 +68,47 @@ def prepare_data_generators(base_dir):
 
     return train_generator, validation_generator
 
-# Load data
-dataset_dir = 'datasets/plant-dataset/stages'
-train_generator, validation_generator = prepare_data_generators(dataset_dir)
-
-# Create the model
-model = create_model()
-model.compile(
-    optimizer=tf.keras.optimizers.Adam(learning_rate=1e-4),  # Lower learning rate for fine-tuning
-    loss={'stages_output': 'sparse_categorical_crossentropy'},
-    metrics={'stages_output': 'accuracy'}
-)
-
-# Define callbacks for early stopping and reducing learning rate on plateau
-callbacks = [
-    EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
-    ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=3, min_lr=1e-6)
-]
-
-# Train the model with callbacks
-history = model.fit(
-    train_generator,
-    validation_data=validation_generator,
-    epochs=30,  # Train for more epochs
-    callbacks=callbacks
-)
-
-# Save the model
-model.save("plant_stages_classification_model.keras")
+def main():
+    parser = argparse.ArgumentParser(description="Train the plant-stage classifier.")
+    parser.add_argument('--dataset-dir', default='datasets/plant-dataset/stages')
+    parser.add_argument('--pipeline', choices=['generator', 'tfdata'], default='generator',
+                        help="ImageDataGenerator, or the tf.data pipeline in input_pipeline.py")
+    parser.add_argument('--tfrecords', default=None, help="TFRecords written by input_pipeline.py convert (tfdata only)")
+    parser.add_argument('--cache-dir', default=None, help="Keep decoded images on disk between runs (tfdata only)")
+    args = parser.parse_args()
+
+    # Load data
+    if args.pipeline == 'tfdata':
+        # Parallel decode, cached decoded images and prefetching; same split as the generators
+        from input_pipeline import load_datasets
+        train_generator, validation_generator, _ = load_datasets(args.dataset_dir, args.tfrecords, BATCH_SIZE, args.cache_dir)
+    else:
+        train_generator, validation_generator = prepare_data_generators(args.dataset_dir)
+
+    # Create the model
+    model = create_model()
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=1e-4),  # Lower learning rate for fine-tuning
+        loss={'stages_output': 'sparse_categorical_crossentropy'},
+        metrics={'stages_output': 'accuracy'}
+    )
+
+    # Define callbacks for early stopping and reducing learning rate on plateau
+    callbacks = [
+        EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
+        ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=3, min_lr=1e-6)
+    ]
+
+    # Train the model with callbacks
+    history = model.fit(
+        train_generator,
+        validation_data=validation_generator,
+        epochs=30,  # Train for more epochs
+        callbacks=callbacks
+    )
+
+    # Save the model
+    model.save("plant_stages_classification_model.keras")
+
+if __name__ == "__main__":
+    main()
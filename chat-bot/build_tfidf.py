@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import joblib
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Build once: python build_tfidf.py
+# chatbot.py then loads the artifact instead of fitting at start-up.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, 'chatbot.json')
+ARTIFACT_PATH = os.path.join(BASE_DIR, 'chatbot_tfidf.joblib')
+ARTIFACT_VERSION = 1  # Bump when the artifact layout changes
+
+def data_hash(data_path=DATA_PATH):
+    with open(data_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_artifact(data_path=DATA_PATH, artifact_path=ARTIFACT_PATH):
+    """Fits the vectorizer on every question and saves it with the question matrix and answers."""
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+
+    questions = [item['question'] for item in data]
+    answers = [item['answer'] for item in data]
+
+    # Rows are L2-normalized, so a dot product with a transformed query is the cosine similarity
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(questions).tocsr()
+
+    artifact = {
+        'version': ARTIFACT_VERSION,
+        'data_hash': data_hash(data_path),
+        'sklearn_version': sklearn.__version__,
+        'built_at': time.time(),
+        'vectorizer': vectorizer,
+        'matrix': matrix,
+        'questions': questions,
+        'answers': answers,
+    }
+    tmp_path = artifact_path + '.tmp'
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, artifact_path)
+    return artifact
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the chatbot TF-IDF index and save it as an artifact.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', default=ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    artifact = build_artifact(args.data, args.output)
+    matrix = artifact['matrix']
+    print(f"Indexed {matrix.shape[0]} questions over {matrix.shape[1]} terms in {time.perf_counter() - start:.2f}s")
+    print(f"Saved {args.output} (version {ARTIFACT_VERSION})")
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,52 @@
-import json
 import numpy as np
-from sklearnex import patch_sklearn
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
-
-# Patch sklearn for performance optimization
-patch_sklearn()
-
-# Load the JSON data
-with open('chatbot/chatbot.json', 'r') as f:
-    data = json.load(f)
-    
-# Extract questions and answers
-questions = [item['question'] for item in data]
-answers = [item['answer'] for item in data]
-
-# Encode labels
-labels = np.arange(len(answers))
-
-# Create a pipeline for TF-IDF and Logistic Regression
-model = make_pipeline(
-    TfidfVectorizer(),
-    LogisticRegression()
-)
-
-# Split the dataset
-X_train, X_test, y_train, y_test = train_test_split(questions, labels, test_size=0.2, random_state=42)
-
-# Train the model
-model.fit(X_train, y_train)
-
-# Evaluate the model
-accuracy = model.score(X_test, y_test)
-print(f"Model Accuracy: {accuracy:.2f}")
+import joblib
+from build_tfidf import ARTIFACT_PATH, ARTIFACT_VERSION, DATA_PATH, build_artifact, data_hash
+
+# Load the TF-IDF artifact written by build_tfidf.py
+def load_artifact(artifact_path=ARTIFACT_PATH, data_path=DATA_PATH):
+    try:
+        artifact = joblib.load(artifact_path)
+    except FileNotFoundError:
+        print(f"No artifact at {artifact_path}, building it")
+        return build_artifact(data_path, artifact_path)
+    if artifact.get('version') != ARTIFACT_VERSION or artifact.get('data_hash') != data_hash(data_path):
+        print(f"Artifact at {artifact_path} is out of date with {data_path}, rebuilding it")
+        return build_artifact(data_path, artifact_path)
+    return artifact
+
+artifact = load_artifact()
+vectorizer = artifact['vectorizer']
+question_matrix = artifact['matrix']
+answers = artifact['answers']
+
+QUERY_CHUNK = 256  # Queries scored per sparse product, bounding the dense score block
+
+def top_k(user_inputs, k=1):
+    """Sparse cosine top-k over the question matrix for a batch of queries.
+
+    Returns (ids, scores), each of shape (len(user_inputs), k), best first.
+    """
+    k = min(k, question_matrix.shape[0])
+    ids = np.empty((len(user_inputs), k), dtype=np.int64)
+    scores = np.empty((len(user_inputs), k), dtype=np.float64)
+    for start in range(0, len(user_inputs), QUERY_CHUNK):
+        queries = vectorizer.transform(user_inputs[start:start + QUERY_CHUNK])
+        similarities = (queries @ question_matrix.T).toarray()
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        ids[start:start + queries.shape[0]] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + queries.shape[0]] = np.take_along_axis(top_scores, order, axis=1)
+    return ids, scores
+
+# Function to get responses for a batch of inputs
+def chatbot_responses(user_inputs):
+    ids, _ = top_k(user_inputs, k=1)
+    return [answers[i] for i in ids[:, 0]]
 
 # Function to get a response from the chatbot
 def chatbot_response(user_input):
-    prediction = model.predict([user_input])
-    return answers[prediction[0]]
+    return chatbot_responses([user_input])[0]
     
 # Example usage
 if __name__ == "__main__":
@@ -54,4 +59,4 @@ if __name__ == "__main__":
             break
         
         response = chatbot_response(user_input)
-        print(f"Bot: {response}")
\ No newline at end of file
+        print(f"Bot: {response}")
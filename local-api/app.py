@@ -1,6 +1,13 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from models.plant_optimization.plant_optm import recommend_crops
-from models.chat_bot.chatbot import answer_question
+from models.plant_optimization.batch_recommend import recommend_crops_batch
+from models.chat_bot.chatbot import answer_question, answer_cache, cascade
+from models.plant_stage.stage_classifier import classify_stages
+from models.registry import registry
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import threading
+import numpy as np
+import json
 import logging
 
 # Set up logging
@@ -9,6 +16,126 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Serving limits, per worker process
+MODEL_WORKERS = 4  # Threads running blocking model calls
+MAX_QUEUED = 8  # Calls allowed to wait for a model thread before shedding with 503
+MODEL_TIMEOUT = 10.0  # Seconds a request waits for its model call
+RETRY_AFTER = 1  # Seconds suggested to shed clients
+WARM_UP_QUESTION = "How often should I water tomato plants?"
+
+_model_executor = ThreadPoolExecutor(max_workers=MODEL_WORKERS, thread_name_prefix='model')
+_model_slots = threading.BoundedSemaphore(MODEL_WORKERS + MAX_QUEUED)
+_ready = threading.Event()
+_degraded = set()  # Components that failed warm-up; the worker still serves, /readyz reports them
+
+class Overloaded(Exception):
+    """Raised when every model thread is busy and the wait queue is full."""
+
+def _acquire_model_slot():
+    if not _model_slots.acquire(blocking=False):
+        raise Overloaded()
+
+def run_model(func, *args, **kwargs):
+    """Runs a blocking model call on the bounded executor.
+
+    Raises Overloaded instead of queueing once MODEL_WORKERS + MAX_QUEUED
+    calls are in flight, and TimeoutError after MODEL_TIMEOUT seconds.
+    """
+    _acquire_model_slot()
+    try:
+        future = _model_executor.submit(func, *args, **kwargs)
+    except Exception:
+        _model_slots.release()
+        raise
+    future.add_done_callback(lambda _: _model_slots.release())
+    try:
+        return future.result(timeout=MODEL_TIMEOUT)
+    except FutureTimeout:
+        raise TimeoutError(f"Model call timed out after {MODEL_TIMEOUT}s")
+
+def stream_model(items):
+    """Returns a generator yielding from the blocking iterable `items`, each item computed on the model executor.
+
+    Like run_model it raises Overloaded when no slot is free, but it checks
+    before streaming starts and holds that one slot until the stream ends.
+    An item taking longer than MODEL_TIMEOUT ends the stream with TimeoutError.
+    """
+    _acquire_model_slot()
+    iterator = iter(items)
+    done = object()
+
+    def generate():
+        future = None
+        try:
+            yield  # Primed below, so closing the stream runs the finally even before the first item
+            while True:
+                future = _model_executor.submit(next, iterator, done)
+                try:
+                    item = future.result(timeout=MODEL_TIMEOUT)
+                except FutureTimeout:
+                    raise TimeoutError(f"Model call timed out after {MODEL_TIMEOUT}s")
+                if item is done:
+                    return
+                yield item
+        finally:
+            # Keep the slot until a step still running on the executor finishes
+            if future is None:
+                _model_slots.release()
+            else:
+                future.add_done_callback(lambda _: _model_slots.release())
+
+    stream = generate()
+    next(stream)
+    return stream
+
+def _warm_up_step(component, func, *args):
+    try:
+        func(*args)
+    except Exception as e:
+        _degraded.add(component)
+        logger.error(f"Warm-up of {component} failed, serving it degraded: {str(e)}")
+
+def warm_up(background=False):
+    """Loads every registered model and runs a chatbot inference so the first real requests are not cold.
+
+    Models otherwise load lazily on first use. With `background`, warm-up
+    runs on a thread and /readyz reports 503 until it finishes. A step that
+    fails marks its component degraded instead of keeping the worker unready.
+    """
+    if background:
+        thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    logger.info("Warming up models")
+    for name in registry.names():
+        _warm_up_step(name, registry.get, name)
+    _warm_up_step('chatbot', answer_question, WARM_UP_QUESTION)
+    _ready.set()
+    if _degraded:
+        logger.warning(f"Warm-up complete, worker is ready with degraded components: {', '.join(sorted(_degraded))}")
+    else:
+        logger.info("Warm-up complete, worker is ready")
+
+@app.errorhandler(Overloaded)
+def handle_overloaded(e):
+    logger.warning(f"Shedding {request.path}: model executor saturated")
+    response = jsonify({"error": "Server is busy, retry shortly"})
+    response.headers['Retry-After'] = str(RETRY_AFTER)
+    return response, 503
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    if not _ready.is_set():
+        return jsonify({"status": "warming up"}), 503
+    if _degraded:
+        return jsonify({"status": "degraded", "degraded": sorted(_degraded)})
+    return jsonify({"status": "ready"})
+
 @app.route('/recommend_crops', methods=['POST'])
 def api_recommend_crops():
     try:
@@ -16,7 +143,8 @@ def api_recommend_crops():
         data = request.json
         logger.debug(f"Request data: {data}")
 
-        result = recommend_crops(
+        result = run_model(
+            recommend_crops,
             terrace_size=data['terrace_size'],
             latitude=data['latitude'],
             longitude=data['longitude'],
@@ -28,10 +156,45 @@ def api_recommend_crops():
 
         logger.info("Crops recommendation API completed successfully")
         return jsonify(result)
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Error in /recommend_crops API: {str(e)}")
         return jsonify({"error": str(e)}), 500
-    
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+@app.route('/recommend_crops/batch', methods=['POST'])
+def api_recommend_crops_batch():
+    """Accepts {"requests": [...]} and streams one NDJSON line per request as it completes."""
+    try:
+        logger.info("Received request for /recommend_crops/batch")
+        data = request.json
+        user_requests = data['requests'] if isinstance(data, dict) else data
+        logger.debug(f"Batch size: {len(user_requests)}")
+    except Exception as e:
+        logger.error(f"Error in /recommend_crops/batch API: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+
+    results = stream_model(recommend_crops_batch(user_requests))
+
+    def generate():
+        try:
+            for result in results:
+                yield json.dumps(result, default=_json_default) + "\n"
+        except Exception as e:
+            logger.error(f"Error in /recommend_crops/batch API: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        finally:
+            results.close()
+        logger.info("Batch crops recommendation completed")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/chatbot', methods=['POST'])
 def api_chatbot():
     try:
@@ -39,13 +202,45 @@ def api_chatbot():
         data = request.json
         logger.debug(f"Request data: {data}")
 
-        result = answer_question(data['question'])
+        result = run_model(answer_question, data['question'])
 
         logger.info("Query answered successfully.")
         return jsonify(result)
+    except Overloaded:
+        raise
     except Exception as e:
         logger.error(f"Error in /chatbot API: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/chatbot/cache', methods=['GET'])
+def api_chatbot_cache():
+    return jsonify(answer_cache.stats)
+
+@app.route('/chatbot/tiers', methods=['GET'])
+def api_chatbot_tiers():
+    return jsonify(cascade.stats)
+
+@app.route('/classify_stage', methods=['POST'])
+def api_classify_stage():
+    """Accepts one or more multipart files under 'image' and returns stage probabilities for each, in order."""
+    uploads = request.files.getlist('image')
+    if not uploads:
+        return jsonify({"error": "No image uploaded; send multipart files under 'image'"}), 400
+    try:
+        logger.info(f"Received request for /classify_stage with {len(uploads)} image(s)")
+        images = [upload.read() for upload in uploads]
+
+        results = run_model(classify_stages, images)
+
+        logger.info("Stage classification completed successfully")
+        return jsonify({"results": [{"filename": upload.filename, **result} for upload, result in zip(uploads, results)]})
+    except Overloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Error in /classify_stage API: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+# Development server only; production runs under gunicorn with gunicorn.conf.py
 if __name__ == '__main__':
+    warm_up(background=True)
     app.run(debug=True, host = '0.0.0.0', port=4000)
@@ -0,0 +1,33 @@
+# Production serving for local-api. Run from local-api/:
+#   gunicorn -c gunicorn.conf.py app:app
+import os
+import multiprocessing
+
+bind = '0.0.0.0:4000'
+
+# Pre-forked workers use every core; each worker serves requests on a
+# small thread pool and runs model calls on its own bounded executor
+# (see MODEL_WORKERS and MAX_QUEUED in app.py).
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 8
+
+# One worker per core already uses every core, so each worker's chatbot
+# session pool defaults to a single single-threaded session
+os.environ.setdefault('CHATBOT_POOL_SIZE', '1')
+os.environ.setdefault('CHATBOT_INTRA_OP_THREADS', '1')
+
+# Bound the accept queue too, so overload surfaces as refused or shed
+# requests rather than unbounded latency
+backlog = 64
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Each worker imports the app itself so the ONNX session is not shared across a fork
+preload_app = False
+
+def post_worker_init(worker):
+    """Loads models and runs warm-up inferences before the worker accepts connections."""
+    from app import warm_up
+    warm_up()
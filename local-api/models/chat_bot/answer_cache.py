@@ -0,0 +1,134 @@
+import re
+import json
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+def normalize_question(question):
+    """Cache key for a question: lowercased, punctuation dropped, whitespace collapsed."""
+    return ' '.join(_PUNCTUATION.sub(' ', question.lower()).split())
+
+class AnswerCache:
+    """Chatbot answers keyed by normalized question.
+
+    Lookups go through an in-memory LRU with TTL and then, when `db_path`
+    is set, a SQLite table that every worker on the host shares, before
+    calling `compute`. `version()` stamps the inputs answers depend on; it is
+    checked at most every `version_check_interval` seconds, and a new stamp
+    drops the in-memory entries and hides rows stored under the old one.
+    `on_invalidate()`, if given, then runs before any answer is computed
+    under the new stamp, so whatever `compute` reads can be reloaded.
+    """
+
+    def __init__(self, compute, version, ttl=60 * 60, max_entries=10000, db_path=None, version_check_interval=1.0,
+                 on_invalidate=None):
+        self.compute = compute
+        self.version = version
+        self.on_invalidate = on_invalidate
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.version_check_interval = version_check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, answer)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._stamp = self._current_stamp()
+        self._next_version_check = time.monotonic() + version_check_interval
+
+    def _current_stamp(self):
+        return json.dumps(self.version())
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now < self._next_version_check:
+            return
+        self._next_version_check = now + self.version_check_interval
+        stamp = self._current_stamp()
+        if stamp != self._stamp:
+            logger.info("Chatbot data or model changed, invalidating answer cache")
+            if self.on_invalidate is not None:
+                self.on_invalidate()
+            with self._lock:
+                self._stamp = stamp
+                self._entries.clear()
+
+    def get(self, question):
+        self._check_version()
+        key = normalize_question(question)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            stamp = self._stamp
+
+        answer = self._load(key, stamp)
+        if answer is None:
+            answer = self.compute(question)
+            self._store(key, stamp, answer)
+        with self._lock:
+            if stamp == self._stamp:
+                self._entries[key] = (time.time() + self.ttl, answer)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return answer
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=1.0)
+            self._db.execute("PRAGMA journal_mode=WAL")  # Readers in other workers do not block on writes
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "question TEXT PRIMARY KEY, version TEXT, stored_at REAL, answer TEXT)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _load(self, key, stamp):
+        if not self.db_path:
+            return None
+        try:
+            with self._db_lock:
+                row = self._connection().execute(
+                    "SELECT version, stored_at, answer FROM answers WHERE question = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Answer cache read failed: {str(e)}")
+            return None
+        if row is None or row[0] != stamp or row[1] + self.ttl <= time.time():
+            return None
+        return json.loads(row[2])
+
+    def _store(self, key, stamp, answer):
+        if not self.db_path:
+            return
+        try:
+            with self._db_lock:
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)", (key, stamp, time.time(), json.dumps(answer)))
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Answer cache write failed: {str(e)}")
+
+    def clear(self):
+        """Drops the in-memory entries; the SQLite layer is left untouched."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,77 @@
+import os
+import time
+import json
+import argparse
+import numpy as np
+from models.chat_bot.qa_index import QAIndex, scan_best_match
+
+# Run from local-api/: python -m models.chat_bot.bench_qa_index --pairs 100000
+
+CHATBOT_JSON = os.path.join(os.path.dirname(__file__), 'chatbot.json')
+
+def make_corpus(rng, num_pairs, words):
+    """Synthetic FAQ of `num_pairs` questions drawn from the real questions' vocabulary plus rare tokens."""
+    corpus = []
+    for i in range(num_pairs):
+        length = rng.integers(5, 13)
+        question = ' '.join(rng.choice(words, length)) + f" plant{i}?"
+        corpus.append({'question': question.capitalize(), 'answer': f"Answer {i}"})
+    return corpus
+
+def make_queries(rng, num_queries, words):
+    queries = []
+    for _ in range(num_queries):
+        length = rng.integers(2, 9)
+        query = list(rng.choice(words, length))
+        if rng.random() < 0.3:
+            query.append(str(rng.choice(words))[:3])  # Partial word, matched as a substring
+        if rng.random() < 0.3:
+            query.append('xylophone')  # Word in no question
+        queries.append(' '.join(query).upper() if rng.random() < 0.1 else ' '.join(query))
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the QA inverted index with the linear scan.")
+    parser.add_argument('--pairs', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--scan-queries', type=int, default=20, help="Queries also run through the slow linear scan")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(CHATBOT_JSON, 'r') as file:
+        words = sorted({w.strip('?,.').lower() for qa_pair in json.load(file) for w in qa_pair['question'].split()})
+    rng = np.random.default_rng(args.seed)
+    corpus = make_corpus(rng, args.pairs, words)
+    queries = make_queries(rng, args.queries, words)
+
+    start = time.perf_counter()
+    index = QAIndex(corpus)
+    print(f"Built index over {len(index)} pairs, {len(index.vocabulary)} tokens in {time.perf_counter() - start:.2f}s")
+
+    cold = []
+    for query in queries:
+        start = time.perf_counter()
+        index.best_match(query)
+        cold.append(time.perf_counter() - start)
+    warm = []
+    for query in queries:
+        start = time.perf_counter()
+        index.best_match(query)
+        warm.append(time.perf_counter() - start)
+
+    scan = []
+    for query in queries[:args.scan_queries]:
+        start = time.perf_counter()
+        expected = scan_best_match(corpus, query)
+        scan.append(time.perf_counter() - start)
+        actual = index.best_match(query)
+        assert actual[0] is expected[0] and actual[1] == expected[1], query
+
+    cold, warm, scan = (np.array(t) * 1000 for t in (cold, warm, scan))
+    print(f"{'path':<14} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, timings in (('scan', scan), ('index (cold)', cold), ('index (warm)', warm)):
+        print(f"{name:<14} {np.median(timings):>9.3f} {np.percentile(timings, 95):>9.3f}")
+    print(f"Results matched the linear scan on {len(scan)} queries")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, RandomSampler
+from transformers import AutoModelForCausalLM, GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+from transformers.trainer_pt_utils import LengthGroupedSampler
+from models.chat_bot.train_chatbot import DATA_FILE, build_dataset, format_example, load_tokenizer, make_collator
+
+# Run from local-api/ on CPU:
+#   python -m models.chat_bot.bench_train_pipeline              (tiny random model, no downloads)
+#   python -m models.chat_bot.bench_train_pipeline --model sshleifer/tiny-gpt2
+
+QA_JSON = os.path.join(os.path.dirname(__file__), DATA_FILE)
+
+def synthetic_corpus(qa_data, size, rng):
+    """Resamples the QA pairs with answers cut to varied lengths, like a grown FAQ."""
+    corpus = []
+    for _ in range(size):
+        qa_pair = qa_data[rng.integers(len(qa_data))]
+        words = qa_pair["answer"].split()
+        corpus.append({"question": qa_pair["question"], "answer": " ".join(words[:rng.integers(3, len(words) + 1)])})
+    return corpus
+
+def local_tokenizer(texts):
+    """A small byte-level BPE tokenizer trained on the corpus, so the benchmark needs no downloads."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, decoders, trainers
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    tokenizer.train_from_iterator(texts, trainers.BpeTrainer(vocab_size=2000, special_tokens=["<|endoftext|>"]))
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<|endoftext|>", pad_token="<|endoftext|>",
+                                   name_or_path="local-bpe")
+
+def make_model(model_name, tokenizer, seed):
+    torch.manual_seed(seed)
+    if model_name:
+        return AutoModelForCausalLM.from_pretrained(model_name)
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=512, n_embd=128, n_layer=2, n_head=2)
+    return GPT2LMHeadModel(config)
+
+def padded_dataset(tokenizer, corpus, max_length):
+    # The old pipeline: every example padded to max_length
+    texts = [format_example(item["question"], item["answer"], tokenizer.eos_token) for item in corpus]
+    encoded = tokenizer(texts, padding="max_length", truncation=True, max_length=max_length)
+    return [{"input_ids": ids, "attention_mask": mask} for ids, mask in zip(encoded["input_ids"], encoded["attention_mask"])]
+
+def run(model, loader, steps, accumulation):
+    """Trains for `steps` optimizer steps; returns (seconds, real tokens, padded tokens)."""
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-4)
+    model.train()
+    batches = iter(loader)
+    real_tokens = padded_tokens = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        for _ in range(accumulation):
+            try:
+                batch = next(batches)
+            except StopIteration:
+                batches = iter(loader)
+                batch = next(batches)
+            loss = model(**batch).loss / accumulation
+            loss.backward()
+            real_tokens += int(batch["attention_mask"].sum())
+            padded_tokens += batch["input_ids"].numel()
+        optimizer.step()
+        optimizer.zero_grad()
+    return time.perf_counter() - start, real_tokens, padded_tokens
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens per second on CPU for each training data pipeline.")
+    parser.add_argument('--model', default=None, help="Hub model id; defaults to a tiny randomly initialized GPT-2")
+    parser.add_argument('--data', default=QA_JSON)
+    parser.add_argument('--examples', type=int, default=2000)
+    parser.add_argument('--max-length', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--accumulation', type=int, default=2)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    rng = np.random.default_rng(args.seed)
+    with open(args.data, 'r') as f:
+        corpus = synthetic_corpus(json.load(f), args.examples, rng)
+
+    if args.model:
+        tokenizer = load_tokenizer(args.model)
+    else:
+        tokenizer = local_tokenizer(format_example(item["question"], item["answer"], "") for item in corpus)
+    collator = make_collator(tokenizer)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_file = os.path.join(work_dir, "corpus.json")
+        with open(data_file, 'w') as f:
+            json.dump(corpus, f)
+        cache_dir = os.path.join(work_dir, "cache")
+
+        start = time.perf_counter()
+        dynamic = build_dataset(tokenizer, data_file, args.max_length, False, cache_dir)
+        tokenize_time = time.perf_counter() - start
+        start = time.perf_counter()
+        build_dataset(tokenizer, data_file, args.max_length, False, cache_dir)
+        cached_time = time.perf_counter() - start
+        packed = build_dataset(tokenizer, data_file, args.max_length, True, cache_dir)
+
+        generator = torch.Generator().manual_seed(args.seed)
+        dynamic = dynamic.remove_columns(["length"])
+        lengths = [len(ids) for ids in dynamic["input_ids"]]
+        pipelines = {
+            "max_length padding": DataLoader(padded_dataset(tokenizer, corpus, args.max_length), batch_size=args.batch_size,
+                                             shuffle=True, collate_fn=collator, generator=generator),
+            "dynamic padding": DataLoader(dynamic, batch_size=args.batch_size, collate_fn=collator,
+                                          sampler=RandomSampler(dynamic, generator=generator)),
+            "length-grouped": DataLoader(dynamic, batch_size=args.batch_size, collate_fn=collator,
+                                         sampler=LengthGroupedSampler(args.batch_size, lengths=lengths, generator=generator)),
+            "packed": DataLoader(packed.remove_columns(["length"]), batch_size=args.batch_size, collate_fn=collator,
+                                 sampler=RandomSampler(packed, generator=generator)),
+        }
+
+        print(f"{len(corpus)} examples, mean {np.mean(lengths):.0f} tokens; tokenized in {tokenize_time:.2f}s, "
+              f"cached reload in {cached_time:.2f}s; {torch.get_num_threads()} threads")
+        print(f"{'pipeline':<20} {'real tok/s':>11} {'padding %':>10} {'s/step':>8}")
+        for name, loader in pipelines.items():
+            model = make_model(args.model, tokenizer, args.seed)
+            run(model, loader, 1, 1)  # warm-up
+            seconds, real_tokens, padded_tokens = run(model, loader, args.steps, args.accumulation)
+            print(f"{name:<20} {real_tokens / seconds:>11.0f} {100 * (1 - real_tokens / padded_tokens):>9.1f}% "
+                  f"{seconds / args.steps:>8.3f}")
+
+if __name__ == "__main__":
+    main()
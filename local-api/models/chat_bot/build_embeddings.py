@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import argparse
+import logging
+import numpy as np
+from transformers import AutoTokenizer
+from models.chat_bot.embedding_index import (
+    EMBEDDING_DIR, MATRIX_FILE, MANIFEST_FILE, ENCODER_FILE, ENCODER_MODEL,
+    QuestionEncoder, question_hash, quantize,
+)
+
+logger = logging.getLogger(__name__)
+
+# Run from local-api/: python -m models.chat_bot.build_embeddings [--dtype int8]
+
+QA_JSON = os.path.join(os.path.dirname(__file__), 'chatbot.json')
+
+def export_encoder(model_name, tokenizer, encoder_path):
+    """Exports BERT with mean pooling and L2 normalization as one ONNX graph (needs torch, build time only)."""
+    import torch
+    from transformers import AutoModel
+
+    class MeanPooledEncoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            hidden = self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+            mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            return torch.nn.functional.normalize(pooled, dim=-1)
+
+    encoder = MeanPooledEncoder(AutoModel.from_pretrained(model_name)).eval()
+    example = tokenizer(["How often should I water tomatoes?"], return_tensors="pt")
+    torch.onnx.export(
+        encoder,
+        (example['input_ids'], example['attention_mask']),
+        encoder_path,
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['embedding'],
+        dynamic_axes={
+            'input_ids': {0: 'batch', 1: 'sequence'},
+            'attention_mask': {0: 'batch', 1: 'sequence'},
+            'embedding': {0: 'batch'},
+        },
+        opset_version=14,
+    )
+    logger.info(f"Exported {model_name} encoder to {encoder_path}")
+
+def load_previous(index_dir, model_name, dtype):
+    """Rows of the current index by question hash, if it was built with the same model and dtype."""
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}, None
+    if manifest.get('model') != model_name or manifest.get('dtype') != dtype:
+        return {}, manifest
+    matrix = np.load(os.path.join(index_dir, manifest['matrix']), mmap_mode='r')
+    return {row_hash: matrix[row] for row, row_hash in enumerate(manifest['hashes'])}, manifest
+
+def build_embeddings(qa_path=QA_JSON, index_dir=EMBEDDING_DIR, dtype='float32', model_name=ENCODER_MODEL, batch_size=64):
+    """Embeds the questions of `qa_path` into `index_dir`, re-embedding only new or changed questions."""
+    with open(qa_path, 'r') as file:
+        qa_data = json.load(file)
+    os.makedirs(index_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    encoder_path = os.path.join(index_dir, ENCODER_FILE)
+    if not os.path.exists(encoder_path):
+        export_encoder(model_name, tokenizer, encoder_path)
+
+    previous, previous_manifest = load_previous(index_dir, model_name, dtype)
+    hashes = [question_hash(qa_pair['question'], model_name) for qa_pair in qa_data]
+    stale = [i for i, row_hash in enumerate(hashes) if row_hash not in previous]
+    logger.info(f"{len(qa_data)} questions, {len(qa_data) - len(stale)} reused, {len(stale)} to embed")
+
+    encoder = QuestionEncoder(encoder_path, tokenizer, batch_size=batch_size)
+    embedded = quantize(encoder.encode([qa_data[i]['question'] for i in stale]), dtype) if stale else None
+    width = embedded.shape[1] if embedded is not None else len(next(iter(previous.values())))
+
+    matrix = np.empty((len(qa_data), width), dtype=np.int8 if dtype == 'int8' else np.float32)
+    for row, row_hash in enumerate(hashes):
+        if row_hash in previous:
+            matrix[row] = previous[row_hash]
+    if stale:
+        matrix[stale] = embedded
+
+    # New matrix file first, then the manifest swap; workers that mapped the old file keep reading it
+    matrix_file = f"{os.path.splitext(MATRIX_FILE)[0]}-{time.time_ns()}.npy"
+    np.save(os.path.join(index_dir, matrix_file), matrix)
+    manifest = {'model': model_name, 'dtype': dtype, 'dim': width, 'matrix': matrix_file, 'hashes': hashes}
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as file:
+        json.dump(manifest, file)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    if previous_manifest is not None and previous_manifest['matrix'] != matrix_file:
+        try:
+            os.remove(os.path.join(index_dir, previous_manifest['matrix']))
+        except OSError:
+            pass
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed chatbot.json questions into a memory-mapped matrix.")
+    parser.add_argument('--qa', default=QA_JSON)
+    parser.add_argument('--index-dir', default=EMBEDDING_DIR)
+    parser.add_argument('--dtype', choices=['float32', 'int8'], default='float32')
+    parser.add_argument('--model', default=ENCODER_MODEL)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    build_embeddings(args.qa, args.index_dir, args.dtype, args.model, args.batch_size)
+
+if __name__ == '__main__':
+    main()
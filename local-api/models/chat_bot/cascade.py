@@ -0,0 +1,63 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+
+class Tier:
+    """One stage of the answer cascade.
+
+    `answer(query)` returns (answer, confidence). The tier accepts when the
+    answer is not None and confidence exceeds `threshold`; a threshold of
+    None accepts any answer, which suits the last tier.
+    """
+
+    def __init__(self, name, answer, threshold=None, window=1000):
+        self.name = name
+        self.answer = answer
+        self.threshold = threshold
+        self.calls = 0
+        self.hits = 0
+        self.total_time = 0.0
+        self._latencies = deque(maxlen=window)  # Recent latencies for percentiles
+
+    def accepts(self, answer, confidence):
+        return answer is not None and (self.threshold is None or confidence > self.threshold)
+
+class Cascade:
+    """Runs tiers cheapest first and returns the first accepted answer."""
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+
+    def answer(self, query):
+        """Returns (answer, tier name), or (None, None) if no tier accepts."""
+        for tier in self.tiers:
+            start = time.perf_counter()
+            answer, confidence = tier.answer(query)
+            elapsed = time.perf_counter() - start
+            accepted = bool(tier.accepts(answer, confidence))
+            with self._lock:
+                tier.calls += 1
+                tier.hits += accepted
+                tier.total_time += elapsed
+                tier._latencies.append(elapsed)
+            if accepted:
+                return answer, tier.name
+        return None, None
+
+    @property
+    def stats(self):
+        """Per tier: calls, hit rate among the queries that reached it, and latency in ms."""
+        with self._lock:
+            stats = {}
+            for tier in self.tiers:
+                latencies = np.array(tier._latencies) * 1000
+                stats[tier.name] = {
+                    "calls": tier.calls,
+                    "hits": tier.hits,
+                    "hit_rate": tier.hits / tier.calls if tier.calls else 0.0,
+                    "mean_ms": tier.total_time * 1000 / tier.calls if tier.calls else 0.0,
+                    "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+                }
+            return stats
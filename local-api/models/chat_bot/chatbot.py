@@ -1,71 +1,158 @@
+import os
+import logging
+from concurrent.futures import TimeoutError as FutureTimeout
 import numpy as np
-import onnxruntime as ort
-from transformers import AutoTokenizer
+from models.registry import registry
+from models.chat_bot.qa_index import QAIndex, scan_best_match
+from models.chat_bot.micro_batcher import MicroBatcher
+from models.chat_bot.answer_cache import AnswerCache
+from models.chat_bot.cascade import Cascade, Tier
+from models.chat_bot.embedding_index import EmbeddingIndex, QuestionEncoder, EMBEDDING_DIR, ENCODER_FILE
 import json
 
-# Load the tokenizer
-tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")  # Adjust if you're using a different model
-
-# Load the ONNX model
-model_path = "chatbot_model.onnx"  # Update this path to your model's location
-session_options = ort.SessionOptions()
-session_options.intra_op_num_threads = 1
-session_options.inter_op_num_threads = 1
-session = ort.InferenceSession(model_path, sess_options=session_options)
-
-# Get the input name and shape
-input_name = session.get_inputs()[0].name
-input_shape = session.get_inputs()[0].shape
-print(f"Expected input shape: {input_shape}")
-
-# Load the JSON file with questions and answers
-json_file_path = "chatbot.json"  # Update this path to your JSON file
-with open(json_file_path, 'r') as file:
-    qa_data = json.load(file)
+logger = logging.getLogger(__name__)
+
+# Heavy dependencies (transformers, onnxruntime) are imported by the loaders,
+# and each model is loaded on first use through the registry
+CHATBOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tokenizer; vendor_tokenizer.py saves a local copy so loading never touches the network
+TOKENIZER_MODEL = "bert-base-uncased"  # Adjust if you're using a different model
+TOKENIZER_DIR = os.path.join(CHATBOT_DIR, 'tokenizer')
+
+# Micro-batching: concurrent queries within the window share one session run
+MAX_BATCH_SIZE = 32
+BATCH_WINDOW = 0.005  # Seconds to wait for more queries after the first
+BATCH_TIMEOUT = float(os.environ.get('CHATBOT_BATCH_TIMEOUT', 5.0))  # Seconds a query waits for its batch before falling back
+
+# Session pool; tune for the host with tune_session_pool.py
+SESSION_POOL_SIZE = int(os.environ.get('CHATBOT_POOL_SIZE', 2))
+INTRA_OP_THREADS = int(os.environ['CHATBOT_INTRA_OP_THREADS']) if 'CHATBOT_INTRA_OP_THREADS' in os.environ else None  # None splits the cores across the pool
+
+# CHATBOT_MODEL_VARIANT picks the artifact; the int8 one is written by quantize_chatbot.py
+MODEL_VARIANTS = {
+    'fp32': os.path.join(CHATBOT_DIR, "chatbot_model.onnx"),  # Update these paths to your models' location
+    'int8': os.path.join(CHATBOT_DIR, "chatbot_model.int8.onnx"),
+}
+MODEL_VARIANT = os.environ.get('CHATBOT_MODEL_VARIANT', 'fp32')
+model_path = MODEL_VARIANTS[MODEL_VARIANT]
+
+# The JSON file with questions and answers
+json_file_path = os.path.join(CHATBOT_DIR, "chatbot.json")  # Update this path to your JSON file
+
+# Retrieval mode: 'keyword' uses the inverted index, 'embedding' the index from build_embeddings.py
+RETRIEVAL_MODE = os.environ.get('CHATBOT_RETRIEVAL', 'keyword')
+EMBEDDING_THRESHOLD = 0.85  # Cosine similarity needed to answer from the JSON data
+
+def load_tokenizer():
+    """Loads the vendored tokenizer, else a copy in the local hub cache, else downloads it from the hub."""
+    from transformers import AutoTokenizer
+    if os.path.isdir(TOKENIZER_DIR):
+        return AutoTokenizer.from_pretrained(TOKENIZER_DIR, local_files_only=True)
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_MODEL, local_files_only=True)
+    except OSError:
+        logger.warning(
+            f"No tokenizer at {TOKENIZER_DIR} and {TOKENIZER_MODEL} is not in the local hub cache, downloading it. "
+            f"Vendor it once with: python -m models.chat_bot.vendor_tokenizer (run from local-api/)"
+        )
+        return AutoTokenizer.from_pretrained(TOKENIZER_MODEL)
+    logger.info(f"No vendored tokenizer at {TOKENIZER_DIR}, using {TOKENIZER_MODEL} from the local hub cache")
+    return tokenizer
+
+def load_session():
+    from models.chat_bot.session_pool import SessionPool
+    tokenizer = registry.get('chatbot_tokenizer')
+    session = SessionPool(model_path, pool_size=SESSION_POOL_SIZE, intra_op_threads=INTRA_OP_THREADS,
+                          max_batch=MAX_BATCH_SIZE, max_length=tokenizer.model_max_length)
+    logger.info(f"Expected input shape: {session.input_shape}")
+    return session
+
+def load_qa_index():
+    with open(json_file_path, 'r') as file:
+        qa_data = json.load(file)
+    # Inverted index over the questions, built once at load
+    return QAIndex(qa_data)
+
+def load_embeddings():
+    if RETRIEVAL_MODE != 'embedding':
+        return None
+    qa_data = registry.get('chatbot_qa').qa_data
+    try:
+        embedding_index = EmbeddingIndex.load(EMBEDDING_DIR)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Embedding index unavailable, using keyword retrieval: {str(e)}")
+        return None
+    if not embedding_index.matches(qa_data):
+        logger.warning("Embedding index is out of date with the JSON data, using keyword retrieval")
+        return None
+    # Same per-session thread budget as the model sessions, so a worker never runs more threads than configured
+    from models.chat_bot.session_pool import resolve_intra_op_threads
+    intra_op_threads = resolve_intra_op_threads(INTRA_OP_THREADS, SESSION_POOL_SIZE)
+    return embedding_index, QuestionEncoder(os.path.join(EMBEDDING_DIR, ENCODER_FILE), registry.get('chatbot_tokenizer'),
+                                            intra_op_threads=intra_op_threads)
+
+registry.register('chatbot_tokenizer', load_tokenizer)
+registry.register('chatbot_session', load_session)
+registry.register('chatbot_qa', load_qa_index)
+registry.register('chatbot_embeddings', load_embeddings)
+
+def run_batch(queries):
+    tokenizer = registry.get('chatbot_tokenizer')
+    session = registry.get('chatbot_session')
+    input_shape = session.input_shape
+
+    # Symbolic (string or None) dimensions are dynamic axes; fixed ones are padded to their size
+    dynamic_batch = not isinstance(input_shape[0], int)
+    dynamic_length = not isinstance(input_shape[1], int)
+    max_length = tokenizer.model_max_length if dynamic_length else input_shape[1]
+
+    # Pad only to the longest query when the sequence axis is dynamic,
+    # and pass the attention mask and every other input the model declares
+    encoded = tokenizer(queries, return_tensors="np", padding="longest" if dynamic_length else "max_length",
+                        truncation=True, max_length=max_length)
+    inputs = {name: encoded[name] for name in session.input_names}
+
+    if dynamic_batch:
+        return list(session.run(inputs))
+
+    # Fixed batch size: run in chunks, padding the last one with empty rows
+    rows = input_shape[0]
+    probabilities = []
+    for start in range(0, len(queries), rows):
+        padding = ((0, rows - len(queries[start:start + rows])), (0, 0))
+        chunk = {name: np.pad(values[start:start + rows], padding, mode='constant', constant_values=0)
+                 for name, values in inputs.items()}
+        probabilities.extend(session.run(chunk)[:len(queries) - start])
+    return probabilities
+
+batcher = MicroBatcher(run_batch, max_batch=MAX_BATCH_SIZE, max_wait=BATCH_WINDOW, workers=SESSION_POOL_SIZE)
 
 def process_query(query):
-    # Tokenize the input
-    inputs = tokenizer(query, return_tensors="np", padding="max_length", truncation=True, max_length=input_shape[1])
-    input_ids = inputs["input_ids"]
-
-    # Ensure the input shape matches the model's expected shape
-    if input_ids.shape != tuple(input_shape):
-        print(f"Adjusting input shape from {input_ids.shape} to {tuple(input_shape)}")
-        input_ids = np.pad(input_ids, ((0, max(0, input_shape[0] - input_ids.shape[0])), 
-                                       (0, max(0, input_shape[1] - input_ids.shape[1]))),
-                           mode='constant', constant_values=0)
-        input_ids = input_ids[:input_shape[0], :input_shape[1]]
-
-    # Run inference
-    output = session.run(None, {input_name: input_ids})
+    # Run inference as part of a micro-batch; raises TimeoutError after BATCH_TIMEOUT
+    probabilities = batcher(query, timeout=BATCH_TIMEOUT)  # Assuming the output is already in probability form
 
     # Process the output
-    probabilities = output[0][0]  # Assuming the output is already in probability form
     predicted_class = np.argmax(probabilities)
     confidence = np.max(probabilities)
 
     return predicted_class, confidence, probabilities
 
 def find_best_match(query):
-    best_match = None
-    highest_similarity = 0
+    return registry.get('chatbot_qa').best_match(query)
 
-    for qa_pair in qa_data:
-        similarity = sum(w in qa_pair['question'].lower() for w in query.lower().split()) / len(query.split())
-        if similarity > highest_similarity:
-            highest_similarity = similarity
-            best_match = qa_pair
+def find_best_match_embedding(query):
+    # One matrix-vector product against the memory-mapped question embeddings
+    embedding_index, question_encoder = registry.get('chatbot_embeddings')
+    ids, scores = embedding_index.search(question_encoder.encode([query]), k=1)
+    return registry.get('chatbot_qa').qa_data[ids[0, 0]], float(scores[0, 0])
 
-    return best_match, highest_similarity
+# Linear scan kept as the reference for QAIndex
+def find_best_match_linear(query):
+    return scan_best_match(registry.get('chatbot_qa').qa_data, query)
 
-def get_response(query, predicted_class, probabilities):
-    # First, try to find a direct match in the JSON data
-    best_match, similarity = find_best_match(query)
-    
-    if similarity > 0.8:  # You can adjust this threshold
-        return best_match['answer']
-    
-    # If no good match in JSON, use the model's prediction
+def model_response(predicted_class, probabilities):
+    # Use the model's prediction
     responses = {
         0: "I'm not sure how to respond to that.",
         1: "Hello! How can I assist you today?",
@@ -73,7 +160,7 @@ def get_response(query, predicted_class, probabilities):
         3: "I'm afraid I don't have personal opinions on that topic.",
         # Add more responses for each class your model can predict, up to 37
     }
-    response = responses.get(predicted_class, "I'm not sure how to respond to that.")
+    response = responses.get(predicted_class, FALLBACK_RESPONSE)
     
     # Get the index of the class with the 3rd highest probability
     third_highest_class_index = np.argsort(probabilities)[-3]  # Get the index of the 3rd highest class
@@ -88,6 +175,40 @@ def get_response(query, predicted_class, probabilities):
     
     return response
 
+# Answer cascade: each tier runs only when the cheaper ones before it are not confident enough
+LEXICAL_THRESHOLD = float(os.environ.get('CHATBOT_LEXICAL_THRESHOLD', 0.8))  # Share of query words found in a question
+MODEL_THRESHOLD = float(os.environ.get('CHATBOT_MODEL_THRESHOLD', 0.0))  # Model confidence below this falls back
+FALLBACK_RESPONSE = "I'm not sure how to respond to that."
+
+def lexical_tier(query):
+    best_match, similarity = find_best_match(query)
+    return (best_match['answer'] if best_match is not None else None), similarity
+
+def embedding_tier(query):
+    if registry.get('chatbot_embeddings') is None:
+        return None, 0.0
+    best_match, similarity = find_best_match_embedding(query)
+    return best_match['answer'], similarity
+
+def model_tier(query):
+    try:
+        predicted_class, confidence, probabilities = process_query(query)
+    except FutureTimeout:
+        # Passing leaves the query to the fallback tier
+        logger.warning(f"Model batch took longer than {BATCH_TIMEOUT}s, falling back")
+        return None, 0.0
+    return model_response(predicted_class, probabilities), confidence
+
+def fallback_tier(query):
+    return FALLBACK_RESPONSE, 1.0
+
+cascade = Cascade([
+    Tier('lexical', lexical_tier, LEXICAL_THRESHOLD),
+    *([Tier('embedding', embedding_tier, EMBEDDING_THRESHOLD)] if RETRIEVAL_MODE == 'embedding' else []),
+    Tier('model', model_tier, MODEL_THRESHOLD),
+    Tier('fallback', fallback_tier),
+])
+
 def chat_loop():
     print("Chatbot: Hello! How can I help you today? (Type 'exit' to end the conversation)")
     while True:
@@ -96,21 +217,37 @@ def chat_loop():
             print("Chatbot: Goodbye! Have a great day!")
             break
         
-        predicted_class, confidence, probabilities = process_query(user_input)
-        response = get_response(user_input, predicted_class, probabilities)
+        response, tier = cascade.answer(user_input)
         
         print(f"Chatbot: {response}")
-        print(f"Confidence: {confidence:.2f}")
-        print(f"Top 3 classes: {np.argsort(probabilities)[-3:][::-1]}")
-        print(f"Top 3 probabilities: {probabilities[np.argsort(probabilities)[-3:][::-1]]}")
+        print(f"Answered by: {tier}")
 
-def answer_question(user_input):
-    predicted_class, confidence, probabilities = process_query(user_input)
-    response = get_response(user_input, predicted_class, probabilities)
+def compute_answer(user_input):
+    response, _ = cascade.answer(user_input)
     result = {
         "answer": response
     }
     return result
 
+# Answer cache; set CHATBOT_CACHE_DB to share it between workers through SQLite
+ANSWER_CACHE_TTL = 60 * 60  # Seconds
+ANSWER_CACHE_SIZE = 10000
+ANSWER_CACHE_DB = os.environ.get('CHATBOT_CACHE_DB')
+
+def data_version():
+    # Answers depend on the QA pairs and the model weights
+    return [os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in (json_file_path, model_path)]
+
+def reload_chatbot_data():
+    # Everything built from the QA pairs or the model weights loads again on next use
+    for name in ('chatbot_qa', 'chatbot_embeddings', 'chatbot_session'):
+        registry.unload(name)
+
+answer_cache = AnswerCache(compute_answer, data_version, ttl=ANSWER_CACHE_TTL,
+                           max_entries=ANSWER_CACHE_SIZE, db_path=ANSWER_CACHE_DB, on_invalidate=reload_chatbot_data)
+
+def answer_question(user_input):
+    return answer_cache.get(user_input)
+
 if __name__ == "__main__":
     chat_loop()
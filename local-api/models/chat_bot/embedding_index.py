@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Constants
+EMBEDDING_DIR = os.path.join(os.path.dirname(__file__), 'embeddings')
+MATRIX_FILE = 'questions.npy'
+MANIFEST_FILE = 'manifest.json'
+ENCODER_FILE = 'question_encoder.onnx'
+ENCODER_MODEL = 'bert-base-uncased'
+INT8_SCALE = 127.0  # Normalized components lie in [-1, 1]
+SEARCH_CHUNK_ROWS = 16384  # Rows converted to float32 at a time when scoring an int8 matrix
+
+def question_hash(question, model_name=ENCODER_MODEL):
+    return hashlib.sha1(f"{model_name}\n{question}".encode('utf-8')).hexdigest()
+
+class QuestionEncoder:
+    """Runs the exported ONNX encoder, which mean-pools BERT's last hidden state and L2-normalizes it.
+
+    `intra_op_threads` of None uses every core, which suits offline builds;
+    the server passes its configured per-session count instead.
+    """
+
+    def __init__(self, encoder_path, tokenizer, max_length=128, batch_size=64, intra_op_threads=None):
+        import onnxruntime as ort
+        from models.chat_bot.session_pool import make_session_options, resolve_intra_op_threads
+        session_options = make_session_options(resolve_intra_op_threads(intra_op_threads))
+        self.session = ort.InferenceSession(encoder_path, sess_options=session_options, providers=['CPUExecutionProvider'])
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+    def encode(self, texts):
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(texts[start:start + self.batch_size], return_tensors="np", padding="longest",
+                                    truncation=True, max_length=self.max_length)
+            embeddings.append(self.session.run(None, {
+                'input_ids': inputs['input_ids'].astype(np.int64),
+                'attention_mask': inputs['attention_mask'].astype(np.int64),
+            })[0])
+        return np.concatenate(embeddings).astype(np.float32)
+
+class EmbeddingIndex:
+    """Question embeddings memory-mapped from a .npy file, one row per QA pair.
+
+    The matrix is float32, or int8 scaled by INT8_SCALE. Workers map the
+    same file read-only, so the pages are shared through the OS page cache
+    rather than copied into each worker's heap.
+    """
+
+    def __init__(self, matrix, hashes, dtype, model_name=ENCODER_MODEL):
+        self.matrix = matrix
+        self.hashes = hashes
+        self.dtype = dtype
+        self.model_name = model_name
+
+    @classmethod
+    def load(cls, index_dir=EMBEDDING_DIR):
+        with open(os.path.join(index_dir, MANIFEST_FILE), 'r') as file:
+            manifest = json.load(file)
+        matrix = np.load(os.path.join(index_dir, manifest['matrix']), mmap_mode='r')
+        if len(matrix) != len(manifest['hashes']):
+            raise ValueError("Embedding matrix and manifest disagree on the number of rows")
+        return cls(matrix, manifest['hashes'], manifest['dtype'], manifest['model'])
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def matches(self, qa_data):
+        """Whether the rows were built from exactly these questions, in this order."""
+        return len(qa_data) == len(self.hashes) and all(
+            question_hash(qa_pair['question'], self.model_name) == row_hash for qa_pair, row_hash in zip(qa_data, self.hashes)
+        )
+
+    def search(self, query_vectors, k=1):
+        """Top-k rows by cosine similarity for each normalized query vector.
+
+        Returns (ids, scores), each of shape (queries, k), best first.
+        """
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        k = min(k, len(self.matrix))
+        if self.dtype == 'float32':
+            scores = self.matrix @ query_vectors.T
+        else:
+            scores = np.empty((len(self.matrix), len(query_vectors)), dtype=np.float32)
+            for start in range(0, len(self.matrix), SEARCH_CHUNK_ROWS):
+                chunk = self.matrix[start:start + SEARCH_CHUNK_ROWS].astype(np.float32)
+                scores[start:start + len(chunk)] = chunk @ query_vectors.T
+            scores /= INT8_SCALE
+        scores = scores.T
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+def quantize(embeddings, dtype):
+    if dtype == 'int8':
+        return np.clip(np.rint(embeddings * INT8_SCALE), -127, 127).astype(np.int8)
+    return embeddings.astype(np.float32)
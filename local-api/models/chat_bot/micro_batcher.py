@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+class MicroBatcher:
+    """Groups concurrent calls into batches for a function that processes a list at once.
+
+    `run_batch(items)` must return one result per item, in order; if it
+    raises or returns a different number of results, every call in the
+    batch fails with that error. A batch
+    is dispatched when it reaches `max_batch` items or `max_wait` seconds
+    after its first item arrived, whichever comes first. `workers` threads,
+    started on first use, each collect and run batches, so up to that many
+    batches are in flight at once.
+    """
+
+    def __init__(self, run_batch, max_batch=32, max_wait=0.005, workers=1):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.workers = workers
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._threads = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        """Queues `item` and returns a Future for its result."""
+        if self._threads is None:
+            with self._lock:
+                if self._threads is None:
+                    threads = [threading.Thread(target=self._run, name=f'micro-batcher-{i}', daemon=True)
+                               for i in range(self.workers)]
+                    for thread in threads:
+                        thread.start()
+                    self._threads = threads
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Returns the result for `item`; on timeout the call is cancelled if its batch has not started."""
+        future = self.submit(item)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = list(self.run_batch([item for item, _ in batch]))
+                if len(results) != len(batch):
+                    raise ValueError(f"run_batch returned {len(results)} results for a batch of {len(batch)}")
+                with self._lock:
+                    self.batches += 1
+                    self.items += len(batch)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
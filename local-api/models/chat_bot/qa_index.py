@@ -0,0 +1,94 @@
+import numpy as np
+
+# Cap on memoized query words before the caches are reset
+MAX_CACHED_WORDS = 50000
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def scan_best_match(qa_data, query):
+    """Reference linear scan: O(corpus x query words x question length)."""
+    best_match = None
+    highest_similarity = 0
+
+    for qa_pair in qa_data:
+        similarity = sum(w in qa_pair['question'].lower() for w in query.lower().split()) / len(query.split())
+        if similarity > highest_similarity:
+            highest_similarity = similarity
+            best_match = qa_pair
+
+    return best_match, highest_similarity
+
+class QAIndex:
+    """Inverted index over the lowercased, whitespace-split questions of the QA pairs.
+
+    A query word matches a question when it is a substring of the question,
+    as in the original linear scan. Because query words contain no
+    whitespace, that is the same as being a substring of one question token,
+    so each word is expanded to the vocabulary tokens containing it (found
+    through a trigram index and memoized) and scored from their postings.
+    """
+
+    def __init__(self, qa_data):
+        self.qa_data = qa_data
+        postings = {}
+        for qa_id, qa_pair in enumerate(qa_data):
+            for token in set(qa_pair['question'].lower().split()):
+                postings.setdefault(token, []).append(qa_id)
+
+        self.vocabulary = list(postings)
+        self.postings = [np.array(postings[token], dtype=np.int32) for token in self.vocabulary]
+
+        # Trigram -> vocabulary ids, to find tokens containing a word without scanning them all
+        trigram_index = {}
+        for token_id, token in enumerate(self.vocabulary):
+            for trigram in trigrams(token):
+                trigram_index.setdefault(trigram, []).append(token_id)
+        self.trigram_index = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in trigram_index.items()}
+
+        self._word_matches = {}
+
+    def __len__(self):
+        return len(self.qa_data)
+
+    def _candidate_tokens(self, word):
+        if len(word) < 3:
+            return range(len(self.vocabulary))
+        candidates = None
+        for trigram in trigrams(word):
+            ids = self.trigram_index.get(trigram)
+            if ids is None:
+                return ()
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+            if len(candidates) == 0:
+                return ()
+        return candidates
+
+    def matches(self, word):
+        """Sorted ids of the questions containing `word` (already lowercased)."""
+        qa_ids = self._word_matches.get(word)
+        if qa_ids is None:
+            token_ids = [i for i in self._candidate_tokens(word) if word in self.vocabulary[i]]
+            if token_ids:
+                qa_ids = np.unique(np.concatenate([self.postings[i] for i in token_ids]))
+            else:
+                qa_ids = np.empty(0, dtype=np.int32)
+            if len(self._word_matches) >= MAX_CACHED_WORDS:
+                self._word_matches = {}
+            self._word_matches[word] = qa_ids
+        return qa_ids
+
+    def best_match(self, query):
+        """Same result as the linear scan: the first QA pair with the highest word-match ratio."""
+        num_words = len(query.split())
+        if num_words == 0 or not self.qa_data:
+            return None, 0
+
+        hits = [self.matches(word) for word in query.lower().split()]
+        hits = np.concatenate(hits)
+        if len(hits) == 0:
+            return None, 0
+
+        qa_ids, counts = np.unique(hits, return_counts=True)
+        best = np.argmax(counts)  # First maximum, i.e. the lowest id, like the scan's strict '>'
+        return self.qa_data[qa_ids[best]], counts[best] / num_words
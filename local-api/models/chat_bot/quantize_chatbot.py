@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import onnxruntime as ort
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+from onnxruntime.quantization.shape_inference import quant_pre_process
+from transformers import AutoTokenizer
+from models.chat_bot.session_pool import make_session_options
+from models.chat_bot.chatbot import MODEL_VARIANTS
+
+# Run from local-api/: python -m models.chat_bot.quantize_chatbot --mode dynamic --threshold 0.98
+# Reads and writes the model paths the server loads (chatbot.MODEL_VARIANTS) unless --model/--output say otherwise
+
+QA_JSON = os.path.join(os.path.dirname(__file__), 'chatbot.json')
+QUESTION_PREFIXES = ["", "how do i ", "tell me ", "please explain "]
+
+def load_questions(qa_path, sample, seed=0):
+    """chatbot.json questions plus light rewordings, so the gate sees more than the training inputs."""
+    with open(qa_path, 'r') as file:
+        questions = [qa_pair['question'] for qa_pair in json.load(file)]
+    variants = [prefix + question.lower() for question in questions for prefix in QUESTION_PREFIXES]
+    variants += [' '.join(question.split()[:-1]) for question in questions if len(question.split()) > 2]
+    rng = np.random.default_rng(seed)
+    if sample and len(variants) > sample:
+        variants = list(rng.choice(variants, sample, replace=False))
+    return variants
+
+def tokenize(tokenizer, session, questions):
+    """One input_ids array per question, shaped the way the model expects."""
+    model_input = session.get_inputs()[0]
+    length = model_input.shape[1] if isinstance(model_input.shape[1], int) else None
+    dtype = np.int32 if model_input.type == 'tensor(int32)' else np.int64
+    inputs = []
+    for question in questions:
+        if length:
+            ids = tokenizer(question, return_tensors="np", padding="max_length", truncation=True, max_length=length)["input_ids"]
+        else:
+            ids = tokenizer(question, return_tensors="np", truncation=True)["input_ids"]
+        inputs.append(ids.astype(dtype))
+    return model_input.name, inputs
+
+class QuestionReader(CalibrationDataReader):
+    def __init__(self, input_name, inputs):
+        self._feeds = iter([{input_name: ids} for ids in inputs])
+
+    def get_next(self):
+        return next(self._feeds, None)
+
+def evaluate(model_path, input_name, inputs, repeats=3):
+    """Top-1 classes and per-query latencies (ms) on a single-threaded session."""
+    session = ort.InferenceSession(model_path, sess_options=make_session_options(1), providers=['CPUExecutionProvider'])
+    session.run(None, {input_name: inputs[0]})  # warm-up
+    predictions = []
+    latencies = []
+    for ids in inputs:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            output = session.run(None, {input_name: ids})[0]
+            latencies.append(time.perf_counter() - start)
+        predictions.append(int(np.argmax(output[0])))
+    return np.array(predictions), np.array(latencies) * 1000
+
+def summarize(latencies):
+    return {f"p{q}_ms": round(float(np.percentile(latencies, q)), 4) for q in (50, 95, 99)}
+
+def quantize_model(model_path, output_path, mode, input_name, calibration_inputs):
+    if mode == 'dynamic':
+        quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    else:
+        quantize_static(
+            model_path, output_path, QuestionReader(input_name, calibration_inputs),
+            quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the chatbot model to INT8 and promote it if it agrees with FP32.")
+    parser.add_argument('--model', default=MODEL_VARIANTS['fp32'])
+    parser.add_argument('--output', default=MODEL_VARIANTS['int8'])
+    parser.add_argument('--mode', choices=['dynamic', 'static'], default='dynamic')
+    parser.add_argument('--qa', default=QA_JSON)
+    parser.add_argument('--tokenizer', default='bert-base-uncased')
+    parser.add_argument('--calibration-size', type=int, default=64, help="Questions used to calibrate static quantization")
+    parser.add_argument('--eval-size', type=int, default=0, help="Questions in the evaluation set; 0 uses all of them")
+    parser.add_argument('--threshold', type=float, default=0.98, help="Minimum top-1 agreement with FP32 to promote")
+    parser.add_argument('--max-slowdown', type=float, default=1.0, help="Highest allowed INT8/FP32 p50 latency ratio")
+    parser.add_argument('--report', default='chatbot_quantization_report.json')
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    reference = ort.InferenceSession(args.model, providers=['CPUExecutionProvider'])
+    input_name, calibration_inputs = tokenize(tokenizer, reference, load_questions(args.qa, args.calibration_size, seed=1))
+    _, eval_inputs = tokenize(tokenizer, reference, load_questions(args.qa, args.eval_size))
+
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    with tempfile.TemporaryDirectory(dir=output_dir) as work_dir:
+        candidate = os.path.join(work_dir, os.path.basename(args.output))
+        prepared = os.path.join(work_dir, 'prepared.onnx')
+        quant_pre_process(args.model, prepared, skip_symbolic_shape=True)  # Graph optimization and ONNX shape inference
+        quantize_model(prepared, candidate, args.mode, input_name, calibration_inputs)
+
+        fp32_predictions, fp32_latencies = evaluate(args.model, input_name, eval_inputs)
+        int8_predictions, int8_latencies = evaluate(candidate, input_name, eval_inputs)
+        agreement = float(np.mean(fp32_predictions == int8_predictions))
+        slowdown = float(np.median(int8_latencies) / np.median(fp32_latencies))
+        promoted = agreement >= args.threshold and slowdown <= args.max_slowdown
+
+        report = {
+            "mode": args.mode,
+            "eval_queries": len(eval_inputs),
+            "top1_agreement": round(agreement, 4),
+            "threshold": args.threshold,
+            "fp32": {"size_mb": round(os.path.getsize(args.model) / 2**20, 2), **summarize(fp32_latencies)},
+            "int8": {"size_mb": round(os.path.getsize(candidate) / 2**20, 2), **summarize(int8_latencies)},
+            "p50_ratio": round(slowdown, 4),
+            "promoted": promoted,
+        }
+        if promoted:
+            os.replace(candidate, args.output)
+
+    with open(args.report, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+    if not promoted:
+        print(f"Not promoted: agreement {agreement:.4f} (needs {args.threshold}), p50 ratio {slowdown:.2f} (max {args.max_slowdown})")
+        sys.exit(1)
+    print(f"Promoted {args.output}; serve it with CHATBOT_MODEL_VARIANT=int8")
+
+if __name__ == '__main__':
+    main()
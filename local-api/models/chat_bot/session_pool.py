@@ -0,0 +1,110 @@
+import os
+import queue
+import numpy as np
+import onnxruntime as ort
+
+# ONNX tensor element types to NumPy dtypes
+TENSOR_TYPES = {
+    'tensor(float)': np.float32,
+    'tensor(double)': np.float64,
+    'tensor(float16)': np.float16,
+    'tensor(int64)': np.int64,
+    'tensor(int32)': np.int32,
+}
+
+def make_session_options(intra_op_threads, inter_op_threads=1):
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = intra_op_threads
+    session_options.inter_op_num_threads = inter_op_threads
+    session_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session_options.enable_cpu_mem_arena = True
+    session_options.enable_mem_pattern = True
+    return session_options
+
+def resolve_intra_op_threads(intra_op_threads, pool_size=1):
+    """The configured thread count per session, or the cores split evenly across `pool_size` sessions when it is None."""
+    if intra_op_threads is None:
+        return max(1, (os.cpu_count() or 1) // pool_size)
+    return intra_op_threads
+
+def fixed_dim(dim, default):
+    return dim if isinstance(dim, int) else default
+
+class PooledSession:
+    """One InferenceSession with an IO binding over reusable flat input and output buffers.
+
+    Every model input (input_ids, attention_mask, ...) has its own flat
+    buffer. A batch of shape (b, l) is copied into the first b*l elements of
+    each and viewed as a contiguous (b, l) array, so any batch up to
+    (max_batch, max_length) binds without allocating. The output buffer is
+    pre-allocated the same way when the model's class dimension is fixed.
+    """
+
+    def __init__(self, model_path, session_options, max_batch, max_length):
+        self.session = ort.InferenceSession(model_path, sess_options=session_options, providers=['CPUExecutionProvider'])
+        model_inputs = self.session.get_inputs()
+        model_output = self.session.get_outputs()[0]
+        self.input_names = [model_input.name for model_input in model_inputs]
+        self.input_dtypes = {model_input.name: TENSOR_TYPES.get(model_input.type, np.int64) for model_input in model_inputs}
+        self.output_name = model_output.name
+        self.output_dtype = TENSOR_TYPES.get(model_output.type, np.float32)
+        self.num_outputs = model_output.shape[-1] if isinstance(model_output.shape[-1], int) else None
+
+        # Fixed input dimensions override the requested buffer size
+        max_batch = fixed_dim(model_inputs[0].shape[0], max_batch)
+        max_length = fixed_dim(model_inputs[0].shape[1], max_length)
+        self.input_buffers = {name: np.zeros(max_batch * max_length, dtype=dtype) for name, dtype in self.input_dtypes.items()}
+        self.output_buffer = np.empty(max_batch * self.num_outputs, dtype=self.output_dtype) if self.num_outputs else None
+        self.binding = self.session.io_binding()
+
+    def run(self, inputs):
+        """Runs one batch; `inputs` maps every model input name to a (batch, length) array."""
+        missing = [name for name in self.input_names if name not in inputs]
+        if missing:
+            raise ValueError(f"Batch is missing model inputs: {', '.join(missing)}")
+        batch, length = inputs[self.input_names[0]].shape
+
+        self.binding.clear_binding_inputs()
+        self.binding.clear_binding_outputs()
+        for name in self.input_names:
+            buffer = self.input_buffers[name]
+            if batch * length > len(buffer):
+                raise ValueError(f"Batch of shape {(batch, length)} exceeds the pre-allocated buffer")
+            bound = buffer[:batch * length].reshape(batch, length)
+            bound[...] = inputs[name]
+            self.binding.bind_input(name, 'cpu', 0, self.input_dtypes[name], [batch, length], bound.ctypes.data)
+        if self.output_buffer is not None:
+            outputs = self.output_buffer[:batch * self.num_outputs].reshape(batch, self.num_outputs)
+            self.binding.bind_output(self.output_name, 'cpu', 0, self.output_dtype, [batch, self.num_outputs], outputs.ctypes.data)
+            self.session.run_with_iobinding(self.binding)
+            return outputs.copy()  # The buffer is reused by the next call
+
+        self.binding.bind_output(self.output_name, 'cpu')
+        self.session.run_with_iobinding(self.binding)
+        return self.binding.copy_outputs_to_cpu()[0]
+
+class SessionPool:
+    """A fixed set of PooledSessions; run() borrows one, blocking while all are busy."""
+
+    def __init__(self, model_path, pool_size=1, intra_op_threads=None, inter_op_threads=1, max_batch=32, max_length=512):
+        intra_op_threads = resolve_intra_op_threads(intra_op_threads, pool_size)
+        self.pool_size = pool_size
+        self.intra_op_threads = intra_op_threads
+
+        session_options = make_session_options(intra_op_threads, inter_op_threads)
+        self.sessions = [PooledSession(model_path, session_options, max_batch, max_length) for _ in range(pool_size)]
+        self._idle = queue.Queue()
+        for session in self.sessions:
+            self._idle.put(session)
+
+        first = self.sessions[0]
+        self.input_names = first.input_names
+        self.input_shape = first.session.get_inputs()[0].shape
+
+    def run(self, inputs):
+        session = self._idle.get()
+        try:
+            return session.run(inputs)
+        finally:
+            self._idle.put(session)
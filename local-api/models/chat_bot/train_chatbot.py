@@ -1,65 +1,166 @@
+import os
+import json
+import hashlib
+import argparse
+from itertools import chain
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, Trainer, TrainingArguments
-from datasets import load_dataset
-
-# Check if GPU is available
-device = "cuda" if torch.cuda.is_available() else "cpu"
-print(f"Running on: {device}")
-
-# Step 2: Load the model and tokenizer from Hugging Face
-model_name = "Intel/neural-chat-7b-v3-3"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(model_name).to(device)
-
-# Step 3: Load and preprocess the JSON dataset
-# Assume the JSON file is uploaded to Colab's filesystem with format like:
-# [{"question": "What is a green terrace?", "answer": "A green terrace is ..."}]
-
-# Replace 'your_json_file.json' with the path to your uploaded JSON dataset
-dataset = load_dataset('json', data_files='chatbot.json')
-
-# Tokenization function for the dataset
-def tokenize_function(examples):
-    return tokenizer(examples["question"], padding="max_length", truncation=True, max_length=256)
-
-# Apply tokenization to the dataset
-tokenized_dataset = dataset.map(tokenize_function, batched=True)
-
-# Step 4: Set up training arguments
-training_args = TrainingArguments(
-    output_dir="./results",
-    per_device_train_batch_size=1,  # You can adjust this based on available memory
-    num_train_epochs=3,
-    logging_dir="./logs",
-    logging_steps=100,
-    evaluation_strategy="steps",  # Evaluate after each logging step
-    eval_steps=100,
-    save_total_limit=2,
-    fp16=torch.cuda.is_available(),  # Enable FP16 training if on GPU
-)
-
-# Step 5: Set up the Trainer for fine-tuning
-trainer = Trainer(
-    model=model,
-    args=training_args,
-    train_dataset=tokenized_dataset["train"],
-    eval_dataset=tokenized_dataset["train"],  # Optionally, split into train and validation
-)
-
-# Step 6: Train the model
-trainer.train()
-
-# Step 7: Save the fine-tuned model and tokenizer
-model.save_pretrained("./fine_tuned_model")
-tokenizer.save_pretrained("./fine_tuned_model")
-print("Model and tokenizer saved!")
-
-# Step 8: Run a test with the fine-tuned model (optional)
-def generate_response(prompt):
-    inputs = tokenizer(prompt, return_tensors="pt").to(device)
-    outputs = model.generate(inputs['input_ids'], max_length=50)
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
-
-# Example usage of the chatbot
-response = generate_response("What is a green terrace?")
-print(f"Chatbot response: {response}")
+from transformers import AutoModelForCausalLM, AutoTokenizer, Trainer, TrainingArguments, DataCollatorWithPadding
+from datasets import load_dataset, load_from_disk
+
+# Defaults
+MODEL_NAME = "Intel/neural-chat-7b-v3-3"
+DATA_FILE = 'chatbot.json'
+MAX_LENGTH = 256  # Truncation length, or the block size when packing
+TOKENIZED_CACHE_DIR = './tokenized_cache'
+
+def format_example(question, answer, eos_token):
+    # Train on the question followed by its answer, so the model learns to answer
+    return f"Question: {question}\nAnswer: {answer}{eos_token}"
+
+def load_tokenizer(model_name):
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token  # Causal LMs often ship without a pad token
+    return tokenizer
+
+def pack_examples(batch, block_size):
+    """Concatenates a batch of tokenized examples and splits it into blocks of `block_size` tokens."""
+    input_ids = list(chain.from_iterable(batch["input_ids"]))
+    blocks = [input_ids[i:i + block_size] for i in range(0, len(input_ids), block_size)]
+    return {
+        "input_ids": blocks,
+        "attention_mask": [[1] * len(block) for block in blocks],
+        "length": [len(block) for block in blocks],
+    }
+
+def tokenized_cache_path(tokenizer, data_file, max_length, packing, cache_dir):
+    with open(data_file, 'rb') as f:
+        data_hash = hashlib.sha256(f.read()).hexdigest()
+    key = json.dumps([data_hash, tokenizer.name_or_path, len(tokenizer), max_length, packing])
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest()[:16])
+
+def build_dataset(tokenizer, data_file=DATA_FILE, max_length=MAX_LENGTH, packing=False, cache_dir=TOKENIZED_CACHE_DIR):
+    """Tokenizes the QA pairs without padding and caches the result on disk.
+
+    Each example gets a 'length' column for length-grouped batching. With
+    `packing`, examples are concatenated into full blocks of `max_length`
+    tokens instead, so no batch needs padding except the last block.
+    """
+    cache_path = tokenized_cache_path(tokenizer, data_file, max_length, packing, cache_dir)
+    if os.path.isdir(cache_path):
+        print(f"Loading tokenized dataset from {cache_path}")
+        return load_from_disk(cache_path)
+
+    dataset = load_dataset('json', data_files=data_file)["train"]
+
+    def tokenize_function(examples):
+        texts = [format_example(q, a, tokenizer.eos_token or "") for q, a in zip(examples["question"], examples["answer"])]
+        if packing:
+            return tokenizer(texts)
+        tokenized = tokenizer(texts, truncation=True, max_length=max_length)
+        tokenized["length"] = [len(ids) for ids in tokenized["input_ids"]]
+        return tokenized
+
+    tokenized = dataset.map(tokenize_function, batched=True, remove_columns=dataset.column_names)
+    if packing:
+        tokenized = tokenized.map(pack_examples, batched=True, fn_kwargs={"block_size": max_length},
+                                  remove_columns=tokenized.column_names)
+
+    tokenized.save_to_disk(cache_path)
+    print(f"Tokenized {len(tokenized)} examples, cached in {cache_path}")
+    return tokenized
+
+class CausalLMCollator:
+    """Pads each batch only to its longest member and masks the padding out of the labels.
+
+    The pad token is the EOS token, so padding is found from the attention
+    mask rather than the token id; masking by id would also hide each real
+    end-of-answer EOS, and the model would never learn to stop.
+    """
+
+    def __init__(self, tokenizer, pad_to_multiple_of=8):
+        self.padder = DataCollatorWithPadding(tokenizer, pad_to_multiple_of=pad_to_multiple_of)
+
+    def __call__(self, features):
+        batch = self.padder([{"input_ids": f["input_ids"], "attention_mask": f["attention_mask"]} for f in features])
+        labels = batch["input_ids"].clone()
+        labels[batch["attention_mask"] == 0] = -100
+        batch["labels"] = labels
+        return batch
+
+def make_collator(tokenizer):
+    return CausalLMCollator(tokenizer)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fine-tune the chatbot language model on chatbot.json.")
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--data', default=DATA_FILE)
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    parser.add_argument('--packing', action='store_true', help="Pack examples into full blocks instead of padding")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--gradient-accumulation-steps', type=int, default=4)
+    parser.add_argument('--epochs', type=float, default=3)
+    parser.add_argument('--cache-dir', default=TOKENIZED_CACHE_DIR)
+    parser.add_argument('--output-dir', default="./fine_tuned_model")
+    args = parser.parse_args()
+
+    # Step 1: Check if GPU is available
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"Running on: {device}")
+
+    # Step 2: Load the model and tokenizer from Hugging Face
+    tokenizer = load_tokenizer(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model).to(device)
+
+    # Step 3: Tokenize the JSON dataset once, without padding; later runs load it from the cache
+    # Format: [{"question": "What is a green terrace?", "answer": "A green terrace is ..."}]
+    tokenized_dataset = build_dataset(tokenizer, args.data, args.max_length, args.packing, args.cache_dir)
+
+    # Step 4: Set up training arguments
+    training_args = TrainingArguments(
+        output_dir="./results",
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size,
+        gradient_accumulation_steps=args.gradient_accumulation_steps,  # Effective batch = batch size x steps
+        group_by_length=not args.packing,  # Batch similar lengths together so dynamic padding stays small
+        length_column_name="length",
+        num_train_epochs=args.epochs,
+        logging_dir="./logs",
+        logging_steps=100,
+        evaluation_strategy="steps",  # Evaluate after each logging step
+        eval_steps=100,
+        save_total_limit=2,
+        fp16=torch.cuda.is_available(),  # Enable FP16 training if on GPU
+        dataloader_num_workers=0 if device == "cpu" else 2,
+    )
+
+    # Step 5: Set up the Trainer for fine-tuning
+    trainer = Trainer(
+        model=model,
+        args=training_args,
+        train_dataset=tokenized_dataset,
+        eval_dataset=tokenized_dataset,  # Optionally, split into train and validation
+        data_collator=make_collator(tokenizer),
+    )
+
+    # Step 6: Train the model
+    trainer.train()
+
+    # Step 7: Save the fine-tuned model and tokenizer
+    model.save_pretrained(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+    print("Model and tokenizer saved!")
+
+    # Step 8: Run a test with the fine-tuned model (optional)
+    def generate_response(prompt):
+        inputs = tokenizer(format_example(prompt, "", ""), return_tensors="pt").to(device)
+        outputs = model.generate(inputs['input_ids'], attention_mask=inputs['attention_mask'], max_length=50,
+                                 pad_token_id=tokenizer.pad_token_id)
+        return tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+    # Example usage of the chatbot
+    response = generate_response("What is a green terrace?")
+    print(f"Chatbot response: {response}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import time
+import argparse
+import threading
+import numpy as np
+from models.chat_bot.session_pool import SessionPool, fixed_dim
+from models.chat_bot.chatbot import model_path as SERVED_MODEL_PATH
+
+# Run from local-api/: python -m models.chat_bot.tune_session_pool  (defaults to the model the server loads)
+
+def make_inputs(pool, input_ids):
+    """Unpadded model inputs for random token ids: a full attention mask and zeros for any other input."""
+    return {name: input_ids if name == 'input_ids' else
+            np.ones_like(input_ids) if name == 'attention_mask' else np.zeros_like(input_ids)
+            for name in pool.input_names}
+
+def measure(pool, batch, clients, duration, rng):
+    """Runs `clients` threads against the pool for `duration` seconds; returns latencies in ms and batches/s."""
+    batch_size = fixed_dim(pool.input_shape[0], batch[0])
+    length = fixed_dim(pool.input_shape[1], batch[1])
+    inputs = [make_inputs(pool, rng.integers(1000, 30000, (batch_size, length))) for _ in range(clients)]
+    pool.run(inputs[0])  # warm-up
+
+    latencies = [[] for _ in range(clients)]
+    stop = time.perf_counter() + duration
+
+    def client(i):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            pool.run(inputs[i])
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([np.array(l) for l in latencies]) * 1000
+    return latencies, len(latencies) / elapsed, batch_size
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Try session pool sizes and thread counts on this host.")
+    parser.add_argument('--model', default=SERVED_MODEL_PATH)
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=sorted({1, 2, 4, max(1, cores // 4), cores}))
+    parser.add_argument('--intra-op-threads', type=int, nargs='+', default=sorted({1, 2, 4, max(1, cores // 2), cores}))
+    parser.add_argument('--batch', type=int, nargs=2, default=[8, 16], metavar=('SIZE', 'LENGTH'),
+                        help="Batch size and sequence length for dynamic axes")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per combination")
+    parser.add_argument('--max-threads', type=int, default=cores, help="Skip combinations using more threads than this")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{cores} cores, batch {args.batch[0]} x {args.batch[1]} tokens")
+    print(f"{'pool':>5} {'intra':>6} | {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} | {'batches/s':>10} {'queries/s':>10}")
+    results = []
+    for pool_size in args.pool_sizes:
+        for intra_op_threads in args.intra_op_threads:
+            if pool_size * intra_op_threads > args.max_threads:
+                continue
+            pool = SessionPool(args.model, pool_size=pool_size, intra_op_threads=intra_op_threads,
+                               max_batch=args.batch[0], max_length=args.batch[1])
+            latencies, throughput, batch_size = measure(pool, args.batch, pool_size, args.duration, rng)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            print(f"{pool_size:>5} {intra_op_threads:>6} | {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} | "
+                  f"{throughput:>10.1f} {throughput * batch_size:>10.1f}")
+            results.append((throughput, pool_size, intra_op_threads))
+
+    if results:
+        _, pool_size, intra_op_threads = max(results)
+        print(f"Highest throughput: CHATBOT_POOL_SIZE={pool_size} CHATBOT_INTRA_OP_THREADS={intra_op_threads}")
+
+if __name__ == '__main__':
+    main()
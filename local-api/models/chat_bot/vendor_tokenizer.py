@@ -0,0 +1,21 @@
+import argparse
+from transformers import AutoTokenizer
+from models.chat_bot.chatbot import TOKENIZER_MODEL, TOKENIZER_DIR
+
+# Run from local-api/ once, on a machine with network access, and commit the result:
+#   python -m models.chat_bot.vendor_tokenizer
+
+def main():
+    parser = argparse.ArgumentParser(description="Save a local copy of the chatbot tokenizer.")
+    parser.add_argument('--model', default=TOKENIZER_MODEL)
+    parser.add_argument('--output', default=TOKENIZER_DIR)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    files = tokenizer.save_pretrained(args.output)
+    print(f"Saved {args.model} tokenizer to {args.output}:")
+    for path in files:
+        print(f"  {path}")
+
+if __name__ == '__main__':
+    main()
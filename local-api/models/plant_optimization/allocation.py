@@ -0,0 +1,311 @@
+import math
+import time
+import logging
+from dataclasses import dataclass
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Constants
+BUDGET_BINS = 256  # Resolution of the discretized budget used by the knapsack DP
+MAX_DP_CELLS = 600_000  # Above this much DP work the knapsack engine switches to branch-and-bound
+BRANCH_AND_BOUND_TIME_LIMIT = 0.006  # seconds, leaving room for setup within a 10 ms solve
+
+ENGINES = {}
+
+def register_engine(name):
+    """Registers an allocation engine under `name` for solve()."""
+    def decorator(func):
+        ENGINES[name] = func
+        return func
+    return decorator
+
+@dataclass
+class AllocationProblem:
+    """Arrays describing one allocation, one entry per candidate plant.
+
+    Every unit of a plant takes one terrace slot, costs `costs[i]` and is
+    worth `values[i]`. `categories` holds integer codes into `category_caps`,
+    the maximum number of units per category.
+    """
+    values: np.ndarray
+    costs: np.ndarray
+    categories: np.ndarray
+    category_caps: np.ndarray
+    max_slots: int
+    budget: float
+    max_units: np.ndarray
+
+def solve(problem, engine='knapsack'):
+    """Returns the number of units allocated to each plant as an int array."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown allocation engine: {engine}")
+    if len(problem.values) == 0 or problem.max_slots <= 0:
+        return np.zeros(len(problem.values), dtype=int)
+    return ENGINES[engine](problem)
+
+def objective(problem, units):
+    """Total value and cost of an allocation."""
+    return float(np.dot(units, problem.values)), float(np.dot(units, problem.costs))
+
+@register_engine('greedy')
+def solve_greedy(problem):
+    """Original allocation loop: one unit per plant by descending value, stopping at the first overrun."""
+    units = np.zeros(len(problem.values), dtype=int)
+    category_counts = np.zeros(len(problem.category_caps), dtype=int)
+    total_cost = 0
+    allocated = 0
+
+    for i in np.argsort(-problem.values, kind='stable'):
+        if total_cost + problem.costs[i] > problem.budget or allocated >= problem.max_slots:
+            break
+        category = problem.categories[i]
+        if category_counts[category] < problem.category_caps[category]:
+            units[i] = 1
+            category_counts[category] += 1
+            total_cost += problem.costs[i]
+            allocated += 1
+    return units
+
+def _prune_dominated(weights, values, units, cap):
+    """Indices of plants not dominated by `cap` units of better, no more expensive plants.
+
+    Plants are sorted by weight class, then value. Past the first `cap` units
+    of its class a plant is dominated by its classmates, so only each class's
+    head is compared across classes, over one column per distinct weight.
+    """
+    by_value = np.argsort(-values, kind='stable')
+    rank = np.empty(len(values), dtype=np.int64)
+    rank[by_value] = np.arange(len(values))
+    by_class = by_value[np.argsort(weights[by_value], kind='stable')]
+    starts = np.diff(weights[by_class], prepend=-1) != 0
+    class_index = np.cumsum(starts) - 1
+    class_starts = np.flatnonzero(starts)
+    before = np.cumsum(units[by_class]) - units[by_class]
+    before_in_class = before - before[class_starts][class_index]
+    head = before_in_class < cap
+    members, member_class = by_class[head], class_index[head]
+
+    order = np.argsort(rank[members], kind='stable')
+    members, member_class = members[order], member_class[order]
+    counts = np.zeros((len(members), len(class_starts)), dtype=np.int64)
+    counts[np.arange(len(members)), member_class] = units[members]
+    lighter = np.cumsum(counts, axis=1)
+    earlier_lighter = np.cumsum(lighter, axis=0) - lighter
+    dominated = earlier_lighter[np.arange(len(members)), member_class] >= cap
+    return np.sort(members[~dominated])
+
+def _unit_chunks(units):
+    """Binary split of a unit count so every count from 0 to `units` is a subset sum."""
+    chunks = []
+    size = 1
+    while units > 0:
+        chunks.append(min(size, units))
+        units -= chunks[-1]
+        size *= 2
+    return chunks
+
+@register_engine('knapsack')
+def solve_knapsack(problem, budget_bins=BUDGET_BINS, max_dp_cells=MAX_DP_CELLS):
+    """Bounded multi-unit knapsack over a discretized budget.
+
+    Each category is solved as a DP over (units in category, budget bin),
+    then categories are merged with a max-plus convolution over the budget.
+    Costs are rounded up to whole bins, so the result never exceeds the real
+    budget and is exact when costs are whole multiples of the bin width.
+
+    The merge assumes the category caps already keep the total within the
+    terrace slots. When the slots can still bind, or the DP would be too
+    large, the problem goes to branch-and-bound instead.
+    """
+    started = time.perf_counter()
+    n = len(problem.values)
+    units = np.zeros(n, dtype=int)
+    scale = max(problem.budget / budget_bins, 1.0)
+    capacity = int(math.floor(problem.budget / scale + 1e-9))
+    weights = np.ceil(problem.costs / scale - 1e-9).astype(int)
+    max_units = np.asarray(problem.max_units, dtype=int)
+
+    candidates = np.flatnonzero((problem.values > 0) & (weights <= capacity) & (max_units > 0))
+    if len(candidates) == 0 or capacity < 0:
+        return units
+    caps = np.minimum(problem.category_caps, problem.max_slots).astype(int)
+
+    category_members = []
+    for category in range(len(caps)):
+        members = candidates[problem.categories[candidates] == category]
+        if len(members) == 0 or caps[category] == 0:
+            continue
+        min_weight = weights[members].min()
+        max_count = min(caps[category], int(max_units[members].sum()))
+        if min_weight > 0:
+            max_count = min(max_count, capacity // min_weight)
+        category_members.append((members, max_count))
+    total_count = sum(max_count for _, max_count in category_members)
+
+    # The slot check needs no pruning, and pruning stops once the DP is known to be too large
+    groups = []
+    dp_cells = 0
+    for members, max_count in category_members:
+        if total_count > problem.max_slots or dp_cells > max_dp_cells:
+            break
+        # No plan holds more than max_count units of the category, so that many better units dominate a plant
+        members = members[_prune_dominated(weights[members], problem.values[members], max_units[members], max_count)]
+        # A plant's units are also limited by how many of it the budget covers, so no chunk outweighs the capacity
+        affordable = np.where(weights[members] > 0, capacity // np.maximum(weights[members], 1), max_count)
+        limits = np.minimum(np.minimum(max_units[members], affordable), max_count)
+        chunks = [(i, size) for i, limit in zip(members, limits) for size in _unit_chunks(int(limit))]
+        groups.append((members, max_count, chunks))
+        dp_cells += len(chunks) * (max_count + 1) * (capacity + 1)
+
+    if total_count > problem.max_slots or dp_cells > max_dp_cells:
+        logger.debug(f"Knapsack DP not applicable ({total_count} units, over {dp_cells} cells), using branch-and-bound")
+        time_limit = max(BRANCH_AND_BOUND_TIME_LIMIT - (time.perf_counter() - started), 0.001)
+        return solve_branch_and_bound(problem, time_limit)
+
+    budget_index = np.arange(capacity + 1)
+    best = np.zeros(capacity + 1)
+    merges = []
+    for members, max_count, chunks in groups:
+        table = np.full((max_count + 1, capacity + 1), -np.inf)
+        table[0, :] = 0.0
+        taken = []
+        for i, size in chunks:
+            weight = size * weights[i]
+            value = size * problem.values[i]
+            candidate = table[:max_count + 1 - size, :capacity + 1 - weight] + value
+            target = table[size:, weight:]
+            improved = candidate > target
+            np.maximum(target, candidate, out=target)
+            taken.append(improved)
+        category_best = table.max(axis=0)
+
+        # merged[b] = max over s <= b of best[b - s] + category_best[s]; the window
+        # over -inf padding reads best[b - s] at [b, s] without any gather
+        padded = np.concatenate((np.full(capacity, -np.inf), best))
+        combined = np.lib.stride_tricks.sliding_window_view(padded, capacity + 1)[:, ::-1] + category_best[None, :]
+        split = combined.argmax(axis=1)
+        best = combined[budget_index, split]
+        merges.append((table, chunks, taken, split))
+
+    remaining = capacity
+    for table, chunks, taken, split in reversed(merges):
+        spent = split[remaining]
+        remaining -= spent
+        count = int(table[:, spent].argmax())
+        for (i, size), improved in zip(reversed(chunks), reversed(taken)):
+            if count >= size and spent >= size * weights[i] and improved[count - size, spent - size * weights[i]]:
+                units[i] += size
+                count -= size
+                spent -= size * weights[i]
+
+    # Rounding costs up to whole bins can lose to the greedy plan; keep whichever is worth more
+    baseline = solve_greedy(problem)
+    if np.dot(baseline, problem.values) > np.dot(units, problem.values):
+        return baseline
+    return units
+
+def _greedy_fill(problem, order, caps):
+    """Fills as many units of each plant as fit, visiting plants in `order`."""
+    units = np.zeros(len(problem.values), dtype=int)
+    category_counts = np.zeros(len(caps), dtype=int)
+    budget_left = problem.budget
+    slots_left = problem.max_slots
+    min_cost = problem.costs[order].min()
+    for i in order:
+        if slots_left == 0 or budget_left < min_cost:
+            break
+        category = problem.categories[i]
+        count = min(problem.max_units[i], slots_left, caps[category] - category_counts[category])
+        if problem.costs[i] > 0:
+            count = min(count, int(budget_left // problem.costs[i]))
+        if count > 0:
+            units[i] = count
+            category_counts[category] += count
+            budget_left -= count * problem.costs[i]
+            slots_left -= count
+    return units
+
+def solve_branch_and_bound(problem, time_limit=BRANCH_AND_BOUND_TIME_LIMIT):
+    """Depth-first branch-and-bound with an LP bound, returning the best allocation found in time."""
+    deadline = time.perf_counter() + time_limit
+    candidates = np.flatnonzero((problem.values > 0) & (problem.costs <= problem.budget) & (problem.max_units > 0))
+    if len(candidates) == 0:
+        return np.zeros(len(problem.values), dtype=int)
+
+    with np.errstate(divide='ignore'):
+        density = np.where(problem.costs[candidates] > 0, problem.values[candidates] / problem.costs[candidates], np.inf)
+    order = candidates[np.argsort(-density, kind='stable')]
+    caps = np.minimum(problem.category_caps, problem.max_slots).astype(int)
+
+    # Start from the best of a value-per-cost fill, a value fill and the original greedy,
+    # so a search cut short by the time limit never returns less than the greedy engine
+    by_value = candidates[np.argsort(-problem.values[candidates], kind='stable')]
+    starts = [_greedy_fill(problem, order, caps), _greedy_fill(problem, by_value, caps), solve_greedy(problem)]
+    incumbent = max(starts, key=lambda units: float(np.dot(units, problem.values)))
+    best_value = float(np.dot(incumbent, problem.values))
+
+    values = problem.values[order]
+    costs = problem.costs[order]
+    limits = np.asarray(problem.max_units, dtype=int)[order]
+    categories = problem.categories[order]
+    prefix_cost = np.concatenate(([0.0], np.cumsum(costs * limits)))
+    prefix_value = np.concatenate(([0.0], np.cumsum(values * limits)))
+    suffix_max_value = np.maximum.accumulate(values[::-1])[::-1]
+
+    def bound(start, budget_left, slots_left):
+        if start >= len(order) or slots_left <= 0:
+            return 0.0
+        # Fractional fill by density, which ignores slots and caps
+        target = prefix_cost[start] + budget_left
+        stop = int(np.searchsorted(prefix_cost, target, side='right')) - 1
+        lp = prefix_value[stop] - prefix_value[start]
+        if stop < len(order):
+            lp += (target - prefix_cost[stop]) * values[stop] / costs[stop]
+        return min(lp, slots_left * suffix_max_value[start])
+
+    chosen = np.zeros(len(order), dtype=int)
+    category_counts = np.zeros(len(caps), dtype=int)
+    best_chosen = None
+    nodes = 0
+    timed_out = False
+
+    def search(start, value, budget_left, slots_left):
+        # Only branches that take a plant recurse; skipping it continues the loop,
+        # so the recursion depth is bounded by the number of distinct plants chosen.
+        nonlocal best_value, best_chosen, nodes, timed_out
+        if value > best_value:
+            best_value = value
+            best_chosen = chosen.copy()
+        while start < len(order):
+            nodes += 1
+            if nodes % 32 == 0 and time.perf_counter() > deadline:
+                timed_out = True
+            if timed_out or value + bound(start, budget_left, slots_left) <= best_value + 1e-12:
+                return
+            category = categories[start]
+            count = min(limits[start], slots_left, caps[category] - category_counts[category])
+            if costs[start] > 0:
+                count = min(count, int(budget_left // costs[start]))
+            for take in range(count, 0, -1):
+                chosen[start] = take
+                category_counts[category] += take
+                search(start + 1, value + take * values[start], budget_left - take * costs[start], slots_left - take)
+                category_counts[category] -= take
+                chosen[start] = 0
+                if timed_out:
+                    return
+            start += 1
+
+    try:
+        search(0, 0.0, problem.budget, problem.max_slots)
+    except RecursionError:
+        timed_out = True
+    if timed_out:
+        logger.debug(f"Branch-and-bound stopped after {nodes} nodes")
+
+    if best_chosen is None:
+        return incumbent
+    units = np.zeros(len(problem.values), dtype=int)
+    units[order] = best_chosen
+    return units
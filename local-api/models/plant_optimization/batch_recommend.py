@@ -0,0 +1,121 @@
+import math
+import logging
+from collections import defaultdict
+import numpy as np
+from models.plant_optimization.get_weth_data import get_weather_data, weather_cache
+from models.plant_optimization.get_address import fetch_state, DEFAULT_STATE
+from models.plant_optimization.catalog import get_catalog
+from models.plant_optimization.predict_market_data import get_market_model
+from models.plant_optimization.plant_optm import (
+    PLANT_DATA_CSV, GROWING_COST_CSV, filter_plants_by_weather, calculate_savings,
+    carbon_scores, allocate_scored_plants, format_recommendation,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_FIELDS = ('terrace_size', 'latitude', 'longitude', 'savings_weight', 'weight_carbon_absorption', 'budget', 'types')
+NUMERIC_FIELDS = ('terrace_size', 'latitude', 'longitude', 'savings_weight', 'weight_carbon_absorption', 'budget')
+
+def _request_id(user_request):
+    return user_request.get('id') if isinstance(user_request, dict) else None
+
+def validate_request(user_request):
+    """Returns the request's (latitude, longitude), or raises ValueError naming what is wrong with it."""
+    if not isinstance(user_request, dict):
+        raise ValueError("Request must be a JSON object")
+    missing = [field for field in REQUEST_FIELDS if field not in user_request]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    for field in NUMERIC_FIELDS:
+        value = user_request[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"Field '{field}' must be a number, got {value!r}")
+    if not (-90 <= user_request['latitude'] <= 90 and -180 <= user_request['longitude'] <= 180):
+        raise ValueError("Coordinates out of range")
+    if not isinstance(user_request['types'], list):
+        raise ValueError("Field 'types' must be a list")
+    return float(user_request['latitude']), float(user_request['longitude'])
+
+def _resolve_state(point):
+    try:
+        return fetch_state(*point)
+    except Exception as e:
+        logger.warning(f"State lookup failed for {point}, using {DEFAULT_STATE}: {str(e)}")
+        return DEFAULT_STATE
+
+def recommend_crops_batch(user_requests):
+    """Recommends crops for many users, yielding one result dict per request.
+
+    Requests use the same fields as /recommend_crops. They are grouped by
+    weather grid cell and state so the state, weather and price lookups run
+    once per group; scores for a group come from one users x plants matrix,
+    and only the allocation runs per user. Results are yielded group by
+    group, each tagged with the request's position and optional 'id'. A
+    malformed request or a failed lookup affects only its own results.
+    """
+    valid, cells, points = [], [], []
+    for index, user_request in enumerate(user_requests):
+        try:
+            point = validate_request(user_request)
+            cell = weather_cache.cell(*point)
+        except Exception as e:
+            yield {"index": index, "id": _request_id(user_request), "error": str(e)}
+            continue
+        valid.append(index)
+        cells.append(cell)
+        points.append(point)
+    if not valid:
+        return
+
+    catalog = get_catalog(PLANT_DATA_CSV, GROWING_COST_CSV)
+    states_by_point = {point: _resolve_state(point) for point in dict.fromkeys(points)}
+    states = [states_by_point[point] for point in points]
+
+    groups = defaultdict(list)
+    for index, cell, state in zip(valid, cells, states):
+        groups[(cell, state)].append(index)
+    logger.info(f"Batch of {len(valid)} requests grouped into {len(groups)} regions")
+
+    try:
+        use_price_model = get_market_model() is not None
+    except Exception as e:
+        logger.warning(f"Market price model unavailable, using CSV prices: {str(e)}")
+        use_price_model = False
+
+    savings_by_state = {}
+    for (cell, state), indices in groups.items():
+        try:
+            if state not in savings_by_state:
+                savings_by_state[state] = calculate_savings(catalog.plants, state, use_price_model)
+            plants = savings_by_state[state]
+
+            weather_data = get_weather_data(*cell)
+            candidates = filter_plants_by_weather(plants, weather_data)
+
+            weight_savings = np.array([user_requests[i]['savings_weight'] for i in indices], dtype=float)
+            weight_carbon = np.array([user_requests[i]['weight_carbon_absorption'] for i in indices], dtype=float)
+            scores = (weight_savings[:, None] * candidates['Savings'].to_numpy(dtype=float)[None, :] +
+                      weight_carbon[:, None] * carbon_scores(candidates)[None, :])
+        except Exception as e:
+            logger.error(f"Error preparing batch group {cell} ({state}): {str(e)}")
+            for i in indices:
+                yield {"index": i, "id": user_requests[i].get('id'), "error": str(e)}
+            continue
+
+        categories = candidates['Category'].to_numpy()
+        for row, i in enumerate(indices):
+            user_request = user_requests[i]
+            try:
+                selected = np.isin(categories, user_request['types'])
+                scored = candidates[selected].assign(Score=scores[row, selected])
+                allocated_plants, total_savings, total_carbon_absorption = allocate_scored_plants(
+                    scored,
+                    user_request['terrace_size'],
+                    user_request['budget'],
+                    user_request['types'],
+                )
+                result = format_recommendation(allocated_plants, total_savings, total_carbon_absorption)
+                yield {"index": i, "id": user_request.get('id'), **result}
+            except Exception as e:
+                logger.error(f"Error in batch request {i}: {str(e)}")
+                yield {"index": i, "id": user_request.get('id'), "error": str(e)}
@@ -0,0 +1,56 @@
+import time
+import argparse
+import numpy as np
+from models.plant_optimization.allocation import AllocationProblem, solve, objective
+
+# Run from local-api/: python -m models.plant_optimization.bench_allocation
+
+def make_problem(rng, num_plants, terrace_size, budget, num_categories=5, max_units=4, plant_size=0.5):
+    """Synthetic catalog shaped like plant_data.csv: scores and prices in the same ranges."""
+    max_slots = int(terrace_size / plant_size)
+    return AllocationProblem(
+        values=rng.uniform(0, 120, num_plants),
+        costs=rng.integers(10, 121, num_plants).astype(float),
+        categories=rng.integers(0, num_categories, num_plants),
+        category_caps=np.full(num_categories, int(np.ceil(max_slots / num_categories))),
+        max_slots=max_slots,
+        budget=float(budget),
+        max_units=np.full(num_plants, max_units),
+    )
+
+def time_engine(problem, engine, repeats):
+    solve(problem, engine)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        units = solve(problem, engine)
+        timings.append(time.perf_counter() - start)
+    return units, np.array(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the greedy and knapsack allocation engines.")
+    parser.add_argument('--plants', type=int, nargs='+', default=[50, 1000, 5000])
+    parser.add_argument('--terrace', type=float, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--budget', type=float, nargs='+', default=[50, 100, 300, 2000, 20000])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'plants':>7} {'terrace':>8} {'budget':>8} | {'greedy value':>12} {'ms':>7} | {'knapsack value':>14} {'p50 ms':>7} {'max ms':>7}")
+    for num_plants in args.plants:
+        for terrace_size in args.terrace:
+            for budget in args.budget:
+                problem = make_problem(rng, num_plants, terrace_size, budget)
+                greedy_units, greedy_ms = time_engine(problem, 'greedy', args.repeats)
+                knapsack_units, knapsack_ms = time_engine(problem, 'knapsack', args.repeats)
+                greedy_value, _ = objective(problem, greedy_units)
+                knapsack_value, knapsack_cost = objective(problem, knapsack_units)
+                assert knapsack_cost <= budget and knapsack_units.sum() <= problem.max_slots
+                assert knapsack_value >= greedy_value, "knapsack plan worse than the greedy baseline"
+                print(f"{num_plants:>7} {terrace_size:>8.0f} {budget:>8.0f} | "
+                      f"{greedy_value:>12.1f} {np.median(greedy_ms):>7.2f} | "
+                      f"{knapsack_value:>14.1f} {np.median(knapsack_ms):>7.2f} {knapsack_ms.max():>7.2f}")
+
+if __name__ == '__main__':
+    main()
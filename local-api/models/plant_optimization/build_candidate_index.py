@@ -0,0 +1,92 @@
+import argparse
+import logging
+from models.plant_optimization.candidate_index import CandidateIndex, CandidateEntry, CANDIDATE_INDEX_DIR
+from models.plant_optimization.catalog import get_catalog
+from models.plant_optimization.get_address import fetch_state
+from models.plant_optimization.get_weth_data import get_weather_data, weather_cache, weather_window
+from models.plant_optimization.predict_market_data import get_market_model, market_model_version
+from models.plant_optimization.plant_optm import (
+    PLANT_DATA_CSV, GROWING_COST_CSV, filter_plants_by_weather, calculate_savings, carbon_scores,
+)
+
+logger = logging.getLogger(__name__)
+
+# Run from local-api/: python -m models.plant_optimization.build_candidate_index --points points.csv
+
+def build_candidate_index(points, months, index_dir=CANDIDATE_INDEX_DIR, force=False):
+    """Builds or refreshes index entries for the grid cells covering `points`.
+
+    Entries whose catalog and price model stamps still match are kept.
+    Stale entries reuse their stored state and weather, so a catalog or
+    model change only recomputes the filter and savings.
+    """
+    try:
+        index = CandidateIndex.load(index_dir)
+    except OSError:
+        index = CandidateIndex(index_dir)
+    except Exception as e:
+        logger.warning(f"Existing candidate index is unreadable, rebuilding it: {str(e)}")
+        index = CandidateIndex(index_dir)
+
+    catalog = get_catalog(PLANT_DATA_CSV, GROWING_COST_CSV)
+    model_version = market_model_version()
+    try:
+        use_price_model = get_market_model() is not None
+    except Exception as e:
+        logger.warning(f"Market price model unavailable, using CSV prices: {str(e)}")
+        use_price_model = False
+
+    # Savings over the whole catalog depend only on the state
+    savings_by_state = {}
+    carbon = carbon_scores(catalog.plants)
+    cells = sorted({weather_cache.cell(latitude, longitude) for latitude, longitude in points})
+    built = 0
+
+    for cell in cells:
+        for month in months:
+            entry = index.get(cell, month)
+            if entry is not None and not force and entry.is_fresh(catalog.version, model_version):
+                continue
+
+            state = entry.state if entry is not None else fetch_state(*cell)
+            weather = entry.weather if entry is not None else get_weather_data(*cell, *weather_window(month))
+
+            if state not in savings_by_state:
+                savings_by_state[state] = calculate_savings(catalog.plants, state, use_price_model)['Savings'].to_numpy()
+            rows = catalog.plants.index.get_indexer(filter_plants_by_weather(catalog.plants, weather).index)
+
+            index.put(cell, month, CandidateEntry(
+                state=state,
+                weather=weather,
+                rows=rows,
+                savings=savings_by_state[state][rows],
+                carbon=carbon[rows],
+                catalog_version=catalog.version,
+                model_version=model_version,
+            ))
+            built += 1
+
+    index.save()
+    logger.info(f"Candidate index: {built} entries built, {len(index.entries)} total")
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute weather-compatible candidates per grid cell and month.")
+    parser.add_argument('--points', required=True, help="CSV file with one 'latitude,longitude' pair per line")
+    parser.add_argument('--months', type=int, nargs='+', default=list(range(1, 13)))
+    parser.add_argument('--index-dir', default=CANDIDATE_INDEX_DIR)
+    parser.add_argument('--force', action='store_true', help="Rebuild every entry even if it is fresh")
+    args = parser.parse_args()
+
+    points = []
+    with open(args.points, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if line and not line[0].isalpha():
+                latitude, longitude = line.split(',')[:2]
+                points.append((float(latitude), float(longitude)))
+
+    build_candidate_index(points, args.months, args.index_dir, args.force)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import io
+import os
+import re
+import json
+import tarfile
+import argparse
+import urllib.request
+from models.plant_optimization.state_index import STATE_BOUNDARIES_GEOJSON, StateIndex
+
+# Run from local-api/ and commit the result:
+#   python -m models.plant_optimization.build_state_boundaries
+# By default the India map of the MIT-licensed echarts-countries-pypkg sdist is
+# converted; pass --source <path or URL> to convert another GeoJSON or ECharts map.
+
+# Constants
+DEFAULT_SOURCE = ('https://files.pythonhosted.org/packages/7d/ad/096213437a6f93c66c256866489cbee3217fd9081fb4a1052d053e860daa/'
+                  'echarts-countries-pypkg-0.1.6.tar.gz')
+ECHARTS_MAP_FILE = 'echarts_countries_pypkg/resources/echarts-countries-js/India.js'  # Member of the sdist holding the map
+STATE_RENAMES = {'Pondicherry': 'Puducherry'}  # Old names in the source map, renamed as Nominatim reports them
+COORDINATE_DIGITS = 4
+
+def read_source(source, member=ECHARTS_MAP_FILE):
+    """Text of `source`; for a .tar.gz archive, the text of the member whose path ends with `member`."""
+    if source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(source) as response:
+            data = response.read()
+    else:
+        with open(source, 'rb') as file:
+            data = file.read()
+    if source.endswith(('.tar.gz', '.tgz')):
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+            name = next((name for name in archive.getnames() if name.endswith(member)), None)
+            if name is None:
+                raise ValueError(f"{member} not found in {source}")
+            data = archive.extractfile(name).read()
+    return data.decode('utf-8')
+
+def _decode_ring(encoded, offset, scale):
+    """Decodes one ECharts ring: zigzag-encoded coordinate deltas stored as characters, starting from `offset`."""
+    x, y = offset
+    ring = []
+    for i in range(0, len(encoded), 2):
+        dx = ord(encoded[i]) - 64
+        dy = ord(encoded[i + 1]) - 64
+        x += (dx >> 1) ^ -(dx & 1)
+        y += (dy >> 1) ^ -(dy & 1)
+        ring.append([round(x / scale, COORDINATE_DIGITS), round(y / scale, COORDINATE_DIGITS)])
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return ring
+
+def decode_echarts_map(collection):
+    """Converts an ECharts UTF-8 encoded map to plain GeoJSON coordinates, in place."""
+    if not collection.pop('UTF8Encoding', False):
+        return collection
+    scale = collection.pop('UTF8Scale', 1024)
+    for feature in collection['features']:
+        geometry = feature['geometry']
+        offsets = geometry.pop('encodeOffsets')
+        if geometry['type'] == 'Polygon':
+            geometry['coordinates'] = [_decode_ring(ring, offset, scale)
+                                       for ring, offset in zip(geometry['coordinates'], offsets)]
+        elif geometry['type'] == 'MultiPolygon':
+            geometry['coordinates'] = [[_decode_ring(ring, offset, scale) for ring, offset in zip(polygon, polygon_offsets)]
+                                       for polygon, polygon_offsets in zip(geometry['coordinates'], offsets)]
+    return collection
+
+def parse_source(text):
+    """FeatureCollection from a GeoJSON document or from the map an ECharts script registers."""
+    if text.lstrip().startswith('{'):
+        collection = json.loads(text)
+    else:
+        match = re.search(r'registerMap\([^,]*,\s*', text)
+        if match is None:
+            raise ValueError("Source is neither GeoJSON nor an ECharts map script")
+        collection, _ = json.JSONDecoder().raw_decode(text, match.end())
+    return decode_echarts_map(collection)
+
+def build_state_boundaries(source, output=STATE_BOUNDARIES_GEOJSON):
+    """Writes the states of `source` to `output` as GeoJSON with the state name under 'st_nm'."""
+    collection = parse_source(read_source(source))
+    features = []
+    for feature in collection['features']:
+        properties = feature.get('properties') or {}
+        name = properties.get('st_nm') or properties.get('ST_NM') or properties.get('NAME_1') or properties.get('name')
+        if not name or feature.get('geometry', {}).get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+        features.append({
+            'type': 'Feature',
+            'properties': {'st_nm': STATE_RENAMES.get(name, name)},
+            'geometry': feature['geometry'],
+        })
+    if not features:
+        raise ValueError(f"No state polygons found in {source}")
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({'type': 'FeatureCollection', 'features': features}, file, separators=(',', ':'))
+    return features
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the state boundary GeoJSON used for offline state lookup.")
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help="GeoJSON, ECharts map script or sdist, as a path or URL")
+    parser.add_argument('--output', default=STATE_BOUNDARIES_GEOJSON)
+    args = parser.parse_args()
+
+    features = build_state_boundaries(args.source, args.output)
+    index = StateIndex.from_geojson(args.output)
+    print(f"Wrote {len(features)} states from {args.source} to {args.output} ({len(index.parts)} polygon parts)")
+    print(f"New Delhi resolves to {index.lookup(28.6139, 77.2090)}")
+
+if __name__ == '__main__':
+    main()
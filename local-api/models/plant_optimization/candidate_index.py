@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import threading
+import logging
+from dataclasses import dataclass
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Constants
+CANDIDATE_INDEX_DIR = 'models/datasets/candidate_index'
+MANIFEST_FILE = 'manifest.json'
+
+@dataclass(frozen=True)
+class CandidateEntry:
+    """Weather-compatible plants for one grid cell and month.
+
+    `rows` are positions in the plant catalog the entry was built from;
+    `savings` and `carbon` (with the perennial bonus) are aligned with them.
+    """
+    state: str
+    weather: dict
+    rows: np.ndarray
+    savings: np.ndarray
+    carbon: np.ndarray
+    catalog_version: tuple
+    model_version: object
+
+    def is_fresh(self, catalog_version, model_version):
+        return self.catalog_version == tuple(catalog_version) and self.model_version == model_version
+
+def entry_key(cell, month):
+    return f"{cell[0]:.6f}_{cell[1]:.6f}_{int(month):02d}"
+
+class CandidateIndex:
+    """Per-cell, per-month candidate arrays stored as one .npz file each plus a JSON manifest."""
+
+    def __init__(self, index_dir=CANDIDATE_INDEX_DIR, entries=None, files=None, version=None):
+        self.index_dir = index_dir
+        self.entries = entries if entries is not None else {}
+        self.files = files if files is not None else {}
+        self.version = version
+
+    @classmethod
+    def load(cls, index_dir=CANDIDATE_INDEX_DIR):
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        version = os.stat(manifest_path).st_mtime_ns
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+
+        entries = {}
+        files = {}
+        for key, meta in manifest.items():
+            files[key] = meta['file']
+            with np.load(os.path.join(index_dir, meta['file'])) as arrays:
+                entries[key] = CandidateEntry(
+                    state=meta['state'],
+                    weather=meta['weather'],
+                    rows=arrays['rows'],
+                    savings=arrays['savings'],
+                    carbon=arrays['carbon'],
+                    catalog_version=tuple(meta['catalog_version']),
+                    model_version=meta['model_version'],
+                )
+        logger.info(f"Loaded {len(entries)} candidate index entries from {index_dir}")
+        return cls(index_dir, entries, files, version)
+
+    def get(self, cell, month):
+        return self.entries.get(entry_key(cell, month))
+
+    def put(self, cell, month, entry):
+        """Writes an entry's arrays to a new file; call save() afterwards to publish it in the manifest."""
+        key = entry_key(cell, month)
+        file_name = f"{key}-{time.time_ns()}.npz"  # Never overwrite a file the live manifest points to
+        os.makedirs(self.index_dir, exist_ok=True)
+        np.savez(
+            os.path.join(self.index_dir, file_name),
+            rows=entry.rows.astype(np.int32),
+            savings=entry.savings.astype(np.float64),  # Full precision, so indexed scores match the live path exactly
+            carbon=entry.carbon.astype(np.float64),
+        )
+        self.entries[key] = entry
+        self.files[key] = file_name
+
+    def save(self):
+        """Atomically replaces the manifest with the current entries and removes unreferenced files."""
+        manifest = {
+            key: {
+                'file': self.files[key],
+                'state': entry.state,
+                'weather': entry.weather,
+                'catalog_version': list(entry.catalog_version),
+                'model_version': entry.model_version,
+            }
+            for key, entry in self.entries.items()
+        }
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest_path = os.path.join(self.index_dir, MANIFEST_FILE)
+        with open(manifest_path + '.tmp', 'w') as file:
+            json.dump(manifest, file)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        referenced = set(self.files.values())
+        for file_name in os.listdir(self.index_dir):
+            if file_name.endswith('.npz') and file_name not in referenced:
+                os.remove(os.path.join(self.index_dir, file_name))
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_candidate_index(index_dir=CANDIDATE_INDEX_DIR):
+    """Returns the loaded index, reloading it when the manifest changes, or None if it was never built.
+
+    An index that fails to load is logged and replaced by an empty one, so
+    requests fall back to the live path until the manifest changes again.
+    """
+    global _index
+    try:
+        version = os.stat(os.path.join(index_dir, MANIFEST_FILE)).st_mtime_ns
+    except OSError:
+        return None
+
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            index = _index
+            if index is None or index.version != version:
+                try:
+                    index = CandidateIndex.load(index_dir)
+                except Exception as e:
+                    logger.error(f"Could not load the candidate index from {index_dir}, serving live: {str(e)}")
+                    index = CandidateIndex(index_dir, version=version)
+                _index = index
+    return index
@@ -0,0 +1,106 @@
+import os
+import threading
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+from models.registry import registry
+from models.plant_optimization.growing_cost import compute_growing_costs
+
+logger = logging.getLogger(__name__)
+
+# Constants
+PLANT_DATA_CSV = 'models/datasets/plant_data.csv'
+GROWING_COST_CSV = 'models/datasets/est_growing_cost.csv'
+GROWING_COST_COLUMN = 'Growing Cost'  # Estimated cost from est_growing_cost.csv
+COST_COLUMNS = ['fert_name', 'pest_name', 'days_to_harvest']
+
+@dataclass(frozen=True)
+class PlantCatalog:
+    """Read-only join of plant_data.csv and est_growing_cost.csv, indexed by Label.
+
+    `plants` keeps every plant_data.csv column plus the estimated growing cost
+    and is shared between requests, so callers must never modify it in place.
+    `columns` exposes the numeric columns as read-only NumPy arrays in the
+    same row order, and `positions` maps a Label to its row.
+    """
+    plants: pd.DataFrame
+    columns: MappingProxyType
+    positions: MappingProxyType
+    version: tuple
+
+    def __len__(self):
+        return len(self.plants)
+
+    def column(self, name):
+        """Returns a read-only array for a numeric column."""
+        return self.columns[name]
+
+def _file_version(*paths):
+    return tuple(os.stat(path).st_mtime_ns for path in paths)
+
+def build_catalog(plant_csv=PLANT_DATA_CSV, cost_csv=GROWING_COST_CSV):
+    """Reads both CSV files once and joins them into a PlantCatalog."""
+    version = _file_version(plant_csv, cost_csv)
+    plant_data = pd.read_csv(plant_csv)
+    cost_data = pd.read_csv(cost_csv)
+
+    if plant_data['Label'].duplicated().any():
+        raise ValueError(f"Duplicate labels in {plant_csv}")
+
+    cost_data = cost_data.drop_duplicates(subset='Label', keep='first')
+    cost_data[GROWING_COST_COLUMN] = compute_growing_costs(cost_data)
+    cost_columns = ['Label', GROWING_COST_COLUMN] + [c for c in COST_COLUMNS if c in cost_data.columns]
+
+    plants = plant_data.merge(cost_data[cost_columns], on='Label', how='left', validate='one_to_one')
+    plants = plants.set_index('Label', drop=False)
+    plants.index.name = None
+
+    columns = {}
+    for name in plants.columns:
+        if pd.api.types.is_numeric_dtype(plants[name]):
+            array = plants[name].to_numpy(dtype=float, copy=True)
+            array.flags.writeable = False
+            columns[name] = array
+
+    positions = {label: i for i, label in enumerate(plants['Label'])}
+    logger.debug(f"Built plant catalog with {len(plants)} plants")
+    return PlantCatalog(
+        plants=plants,
+        columns=MappingProxyType(columns),
+        positions=MappingProxyType(positions),
+        version=version,
+    )
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog(plant_csv=PLANT_DATA_CSV, cost_csv=GROWING_COST_CSV):
+    """Returns the process-wide catalog, reloading it if either file changed on disk.
+
+    Readers get the current snapshot without locking or copying; a reload
+    builds a fresh catalog and swaps the reference in one assignment.
+    """
+    global _catalog
+    catalog = _catalog
+    try:
+        version = _file_version(plant_csv, cost_csv)
+    except OSError as e:
+        if catalog is not None:
+            logger.warning(f"Cannot stat catalog files, serving cached catalog: {str(e)}")
+            return catalog
+        raise
+
+    if catalog is not None and catalog.version == version:
+        return catalog
+
+    with _catalog_lock:
+        catalog = _catalog
+        if catalog is None or catalog.version != version:
+            logger.info(f"Loading plant catalog from {plant_csv} and {cost_csv}")
+            catalog = build_catalog(plant_csv, cost_csv)
+            _catalog = catalog
+    return catalog
+
+registry.register('plant_catalog', get_catalog)
@@ -1,10 +1,62 @@
-from geopy.geocoders import Nominatim
+import logging
+from models.plant_optimization.state_index import get_state_index
 
-def fetch_state(latitude,longitude):
-    geolocator = Nominatim(user_agent="green_terrace")
-    location = geolocator.reverse(str(latitude) + "," + str(longitude))
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_STATE = 'Karnataka'
+USE_NOMINATIM_FALLBACK = True  # Ask Nominatim for points outside every local polygon
+
+_geolocator = None
+
+def _get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+        _geolocator = Nominatim(user_agent="green_terrace")
+    return _geolocator
+
+def _fetch_state_remote(latitude, longitude):
+    location = _get_geolocator().reverse(str(latitude) + "," + str(longitude))
     address = location.raw['address']
-    return address.get("state", 'Karnataka').capitalize()
+    return address.get("state", DEFAULT_STATE)
+
+def _fetch_state_remote_or_default(latitude, longitude):
+    try:
+        return _fetch_state_remote(latitude, longitude)
+    except Exception as e:
+        logger.warning(f"Remote state lookup failed for {latitude}, {longitude}, using {DEFAULT_STATE}: {str(e)}")
+        return DEFAULT_STATE
+
+def fetch_state(latitude,longitude):
+    index = get_state_index()
+    state = index.lookup(latitude, longitude) if index is not None else None
+    if state is None:
+        if not USE_NOMINATIM_FALLBACK:
+            return DEFAULT_STATE
+        state = _fetch_state_remote(latitude, longitude)
+    return state.capitalize()
+
+def fetch_states(coordinates):
+    """Resolves many (latitude, longitude) pairs at once, in input order.
+
+    Points outside the local polygons are looked up remotely once per
+    distinct coordinate when the Nominatim fallback is enabled. A remote
+    lookup that fails gives DEFAULT_STATE for that point only.
+    """
+    index = get_state_index()
+    states = index.lookup_many(coordinates) if index is not None else [None] * len(coordinates)
+
+    remote = {}
+    for i, state in enumerate(states):
+        if state is not None:
+            continue
+        point = tuple(coordinates[i])
+        if point not in remote:
+            remote[point] = _fetch_state_remote_or_default(*point) if USE_NOMINATIM_FALLBACK else DEFAULT_STATE
+        states[i] = remote[point]
+
+    return [state.capitalize() for state in states]
 
 if __name__ == '__main__':
     state = fetch_state(28.6139,77.2090)
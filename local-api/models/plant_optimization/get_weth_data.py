@@ -1,26 +1,32 @@
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from models.plant_optimization.weather_cache import WeatherCache
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_weather_data(latitude, longitude):
-    """
-    Fetch weather data from the Open-Meteo API for a specified location and date range.
+# Constants
+WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
+REFERENCE_YEAR = 2024  # Year whose observations stand in for a month's typical weather
+DEFAULT_MONTH = 9
+REQUEST_TIMEOUT = 10  # seconds
+WEATHER_GRID_DEG = 0.1  # Coordinates are snapped to this grid before caching and fetching
+WEATHER_CACHE_TTL = 6 * 60 * 60  # seconds
+WEATHER_CACHE_SIZE = 1024  # in-memory entries
+WEATHER_CACHE_DB = 'models/datasets/weather_cache.sqlite3'
 
-    Args:
-        latitude (float): Geographic latitude of the location.
-        longitude (float): Geographic longitude of the location.
-        start_date (str): Start date in YYYY-MM-DD format.
-        end_date (str): End date in YYYY-MM-DD format.
+def weather_window(month):
+    """Date window (start, end) used to characterise a month's weather."""
+    return f"{REFERENCE_YEAR}-{month:02d}-01", f"{REFERENCE_YEAR}-{month:02d}-20"
 
-    Returns:
-        dict: Average temperature, rainfall, and daylight duration.
-    """
-    start_date = "2024-09-01"
-    end_date = "2024-09-20"
-    url = f"https://api.open-meteo.com/v1/forecast"
-    
+DEFAULT_START_DATE, DEFAULT_END_DATE = weather_window(DEFAULT_MONTH)
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+def fetch_weather_data(latitude, longitude, start_date, end_date):
+    """Fetches and averages weather data from the Open-Meteo API, bypassing the cache."""
     params = {
         "latitude": latitude,
         "longitude": longitude,
@@ -29,18 +35,18 @@ def get_weather_data(latitude, longitude):
         "daily": ["temperature_2m_max", "temperature_2m_min", "rain_sum", "sunshine_duration"],
         "timezone": "auto"
     }
-    
-    response = requests.get(url, params=params)
-    
+
+    response = _session.get(WEATHER_API_URL, params=params, timeout=REQUEST_TIMEOUT)
+
     if response.status_code == 200:
         data = response.json()['daily']
-        
+
         # Calculate averages
         avg_temp_max = sum(data['temperature_2m_max']) / len(data['temperature_2m_max'])
         avg_temp_min = sum(data['temperature_2m_min']) / len(data['temperature_2m_min'])
         avg_rain_sum = sum(data['rain_sum']) / len(data['rain_sum'])
         avg_daylight_duration = sum(data['sunshine_duration']) / len(data['sunshine_duration'])
-        
+
         return {
             "temp_max": avg_temp_max,
             "temp_min": avg_temp_min,
@@ -50,12 +56,38 @@ def get_weather_data(latitude, longitude):
     else:
         raise Exception(f"Failed to fetch weather data. Status code: {response.status_code}")
 
+weather_cache = WeatherCache(
+    fetch_weather_data,
+    grid_deg=WEATHER_GRID_DEG,
+    ttl=WEATHER_CACHE_TTL,
+    max_entries=WEATHER_CACHE_SIZE,
+    db_path=WEATHER_CACHE_DB,
+)
+
+def get_weather_data(latitude, longitude, start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE):
+    """
+    Fetch weather data from the Open-Meteo API for a specified location and date range.
+
+    Results are cached per grid cell and date window, so nearby locations
+    share one upstream request.
+
+    Args:
+        latitude (float): Geographic latitude of the location.
+        longitude (float): Geographic longitude of the location.
+        start_date (str): Start date in YYYY-MM-DD format.
+        end_date (str): End date in YYYY-MM-DD format.
+
+    Returns:
+        dict: Average temperature, rainfall, and daylight duration.
+    """
+    return weather_cache.get(latitude, longitude, start_date, end_date)
+
 # If you want to test the function independently
 if __name__ == "__main__":
     latitude = 19.0760
     longitude = 72.8777
     start_date = "2024-09-01"
     end_date = "2024-09-20"
-    
-    weather_data = get_weather_data(latitude, longitude)
+
+    weather_data = get_weather_data(latitude, longitude, start_date, end_date)
     print(weather_data)
@@ -1,14 +1,24 @@
 import pandas as pd
+import numpy as np
 import json
 
+# Constants: amount of fertilizer and pesticide used (in kg)
+FERT_AMOUNT = 0.5  # kg
+PEST_AMOUNT = 0.2  # kg
+
+def compute_growing_costs(df):
+    """Vectorized growing cost for every row of an est_growing_cost.csv frame."""
+    fert_cost = np.where(df['fert_req'].astype(bool), df['fert_cost'] * FERT_AMOUNT, 0)
+    pest_cost = np.where(df['pest_req'].astype(bool), df['pest_cost'] * PEST_AMOUNT, 0)
+    return df['seed_cost'].to_numpy(dtype=float) + fert_cost + pest_cost
+
 # Function to calculate growing costs for a list of plants
 def calculate_growing_costs_for_plants(csv_file, plant_list):
     # Load the CSV file into a DataFrame
     df = pd.read_csv(csv_file)
 
-    # Constants: amount of fertilizer and pesticide used (in kg)
-    fert_amount = 0.5  # kg
-    pest_amount = 0.2  # kg
+    fert_amount = FERT_AMOUNT
+    pest_amount = PEST_AMOUNT
 
     # Function to calculate growing cost for each row
     def calculate_growing_cost(row):
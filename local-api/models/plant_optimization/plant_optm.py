@@ -1,10 +1,14 @@
+import math
 import pandas as pd
 import numpy as np
 import logging
-from models.plant_optimization.get_weth_data import get_weather_data
-from models.plant_optimization.growing_cost import get_plant_growing_cost
-from models.plant_optimization.predict_market_data import predict_market_prices
-from models.plant_optimization.get_address import fetch_state
+from models.plant_optimization.get_weth_data import get_weather_data, weather_cache, DEFAULT_MONTH
+from models.plant_optimization.catalog import get_catalog, GROWING_COST_COLUMN
+from models.plant_optimization.predict_market_data import predict_market_prices, predict_market_prices_batch, get_market_model, market_model_version
+from models.plant_optimization.get_address import fetch_state, DEFAULT_STATE
+from models.plant_optimization.stages import Stage, run_stages
+from models.plant_optimization.allocation import AllocationProblem, solve
+from models.plant_optimization.candidate_index import get_candidate_index
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,6 +20,14 @@ PERENNIAL_CARBON_WEIGHT = 1.5
 PERENNIAL_SAVINGS_WEIGHT = 1.2
 PLANT_DATA_CSV= 'models/datasets/plant_data.csv'  # Assume this is the correct path to your CSV file
 GROWING_COST_CSV = 'models/datasets/est_growing_cost.csv'
+CONCURRENT_STAGES = True  # Run the independent lookups of a request on a thread pool
+REQUEST_DEADLINE = 8.0  # seconds for all lookup stages together
+STATE_TIMEOUT = 3.0
+WEATHER_TIMEOUT = 5.0
+PRICE_MODEL_TIMEOUT = 5.0
+ALLOCATION_ENGINE = 'knapsack'  # 'greedy' reproduces the original one-plant-each loop
+MAX_UNITS_PER_PLANT = 4  # Upper bound on units of the same plant for multi-unit engines
+USE_CANDIDATE_INDEX = True  # Serve from the precomputed regional candidate index when it has a fresh entry
 
 def load_plant_data(file_path):
     """Loads plant data from CSV file."""
@@ -47,11 +59,43 @@ def filter_plants_by_weather(plant_data, weather_data):
         logger.error(f"Error filtering plants: {str(e)}")
         raise
 
-def calculate_savings(plant_data, state):
-    """Calculates savings for each plant based on market price and growing cost."""
+def compute_savings(plant_data, market_prices):
+    """Vectorized savings for each row given predicted prices aligned with the rows."""
+    market_price = np.asarray(market_prices, dtype=float) / 100  # Convert price per quintal to price per kg
+    market_price = np.where(market_price == 0, plant_data['Market Price'].to_numpy(dtype=float), market_price)
+
+    growing_cost = plant_data[GROWING_COST_COLUMN].to_numpy(dtype=float)
+    growing_cost = np.where(growing_cost == 0, plant_data['Growing Price'].to_numpy(dtype=float), growing_cost)
+
+    return np.maximum(market_price - growing_cost, 0)  # Ensure savings are not negative
+
+def calculate_savings(plant_data, state, use_price_model=True):
+    """Calculates savings for each plant based on market price and growing cost.
+
+    Without the price model every plant falls back to its CSV market price.
+    """
     try:
         logger.info("Calculating savings for plants")
-        
+
+        if use_price_model:
+            rows = [(state, label, "") for label in plant_data['Label']]
+            market_prices = predict_market_prices_batch(rows)
+        else:
+            market_prices = np.zeros(len(plant_data))
+
+        plant_data = plant_data.assign(Savings=compute_savings(plant_data, market_prices))
+        logger.debug(f"Calculated savings for plants: {plant_data[['Label', 'Savings']].head()}")
+        return plant_data
+    except Exception as e:
+        logger.error(f"Error calculating savings: {str(e)}")
+        raise
+
+def calculate_savings_rowwise(plant_data, state):
+    """Row-by-row reference implementation of calculate_savings, kept for diffing the two paths."""
+    try:
+        logger.info("Calculating savings for plants (row-wise)")
+        plant_data = plant_data.copy()
+
         # Get market prices
         commodities = plant_data['Label'].tolist()
         market_prices = predict_market_prices(state, commodities)
@@ -63,7 +107,7 @@ def calculate_savings(plant_data, state):
             if market_price == 0:
                 market_price = row['Market Price']  # Use existing market price if prediction is 0
             
-            growing_cost = get_plant_growing_cost(GROWING_COST_CSV, plant_name)
+            growing_cost = row[GROWING_COST_COLUMN]  # Joined from est_growing_cost.csv by the catalog
             
             if growing_cost == 0:
                 growing_cost = row['Growing Price']  # Use existing growing cost if prediction is 0
@@ -72,56 +116,79 @@ def calculate_savings(plant_data, state):
             return max(savings, 0)  # Ensure savings are not negative
         
         plant_data['Savings'] = plant_data.apply(get_savings, axis=1)
-        logger.debug(f"Calculated savings for plants: {plant_data[['Label', 'Savings']].head()}")
         return plant_data
     except Exception as e:
         logger.error(f"Error calculating savings: {str(e)}")
         raise
 
+def compare_savings_paths(plant_data, state):
+    """Returns the largest absolute difference between the vectorized and row-wise savings."""
+    vectorized = calculate_savings(plant_data, state)['Savings'].to_numpy(dtype=float)
+    rowwise = calculate_savings_rowwise(plant_data, state)['Savings'].to_numpy(dtype=float)
+    return float(np.max(np.abs(vectorized - rowwise), initial=0))
+
+def carbon_scores(plant_data):
+    """Carbon absorption with the perennial bonus applied, as used for scoring."""
+    return plant_data['Carbon Absorption'].to_numpy(dtype=float) * np.where(plant_data['Perennial'] == 'Yes', PERENNIAL_CARBON_WEIGHT, 1)
+
 def score_plants(plant_data, weight_savings, weight_carbon_absorption):
     """Scores plants based on user preferences."""
     try:
         logger.info("Scoring plants based on user preferences")
-        plant_data['Score'] = (
+        plant_data = plant_data.assign(Score=(
             weight_savings * plant_data['Savings'] +
-            weight_carbon_absorption * plant_data['Carbon Absorption'] * 
-            np.where(plant_data['Perennial'] == 'Yes', PERENNIAL_CARBON_WEIGHT, 1)
-        )
+            weight_carbon_absorption * carbon_scores(plant_data)
+        ))
         logger.debug(f"Scored plants: {plant_data[['Label', 'Score']].head()}")
         return plant_data
     except Exception as e:
         logger.error(f"Error scoring plants: {str(e)}")
         raise
 
-def allocate_plants(plant_data, terrace_size, budget, selected_categories, weight_savings, weight_carbon_absorption):
-    """Allocates plants based on terrace size, budget, and preferences."""
+def allocate_plants(plant_data, terrace_size, budget, selected_categories, weight_savings, weight_carbon_absorption, engine=None):
+    """Allocates plants based on terrace size, budget, and preferences.
+
+    Each allocated row carries a 'Units' column with the number of plants of
+    that kind; the totals account for every unit.
+    """
+    selected_plants = plant_data[plant_data['Category'].isin(selected_categories)]
+    selected_plants = score_plants(selected_plants, weight_savings, weight_carbon_absorption)
+    return allocate_scored_plants(selected_plants, terrace_size, budget, selected_categories, engine)
+
+def allocate_scored_plants(selected_plants, terrace_size, budget, selected_categories, engine=None):
+    """Allocates plants that already carry a 'Score' column and belong to the selected categories."""
+    engine = engine or ALLOCATION_ENGINE
     try:
-        logger.info("Allocating plants based on constraints")
+        logger.info(f"Allocating plants based on constraints with the {engine} engine")
+        selected_categories = list(dict.fromkeys(selected_categories))  # A repeated plant type counts once
+        if not selected_categories:
+            logger.info("No plant categories selected, nothing to allocate")
+            return [], 0.0, 0.0
 
         max_plants = int(terrace_size / PLANT_SIZE)
         logger.debug(f"Max plants to allocate: {max_plants}")
 
-        selected_plants = plant_data[plant_data['Category'].isin(selected_categories)]
-        selected_plants = score_plants(selected_plants, weight_savings, weight_carbon_absorption)
-        sorted_plants = selected_plants.sort_values(by='Score', ascending=False)
-
-        total_cost = 0
-        allocated_plants = []
-        plant_counts = {category: 0 for category in selected_categories}
-
-        for index, row in sorted_plants.iterrows():
-            if total_cost + row['Growing Price'] > budget or len(allocated_plants) >= max_plants:
-                break
-            if plant_counts[row['Category']] < max_plants / len(selected_categories):
+        sorted_plants = selected_plants.sort_values(by='Score', ascending=False, kind='stable')
+
+        # Same per-category share as before: fewer than max_plants / categories units each
+        category_cap = math.ceil(max_plants / len(selected_categories))
+        problem = AllocationProblem(
+            values=sorted_plants['Score'].to_numpy(dtype=float),
+            costs=sorted_plants['Growing Price'].to_numpy(dtype=float),
+            categories=pd.Categorical(sorted_plants['Category'], categories=selected_categories).codes,
+            category_caps=np.full(len(selected_categories), category_cap),
+            max_slots=max_plants,
+            budget=float(budget),
+            max_units=np.full(len(sorted_plants), MAX_UNITS_PER_PLANT),
+        )
+        units = solve(problem, engine)
 
-                allocated_plants.append(row)
-                plant_counts[row['Category']] += 1
-                total_cost += row['Growing Price']
-                
-        total_savings = sum([plant['Savings'] for plant in allocated_plants])
-        total_carbon_absorption = sum([plant['Carbon Absorption'] for plant in allocated_plants])
+        allocated = sorted_plants[units > 0].assign(Units=units[units > 0])
+        allocated_plants = [row for _, row in allocated.iterrows()]
+        total_savings = float((allocated['Savings'] * allocated['Units']).sum())
+        total_carbon_absorption = float((allocated['Carbon Absorption'] * allocated['Units']).sum())
 
-        logger.info(f"Total plants allocated: {len(allocated_plants)}")
+        logger.info(f"Total plants allocated: {int(units.sum())}")
         logger.debug(f"Total savings: {total_savings}, Total carbon absorption: {total_carbon_absorption}")
 
         return allocated_plants, total_savings, total_carbon_absorption
@@ -129,25 +196,82 @@ def allocate_plants(plant_data, terrace_size, budget, selected_categories, weigh
         logger.error(f"Error allocating plants: {str(e)}")
         raise
 
+def format_recommendation(allocated_plants, total_savings, total_carbon_absorption):
+    """Builds the API response for an allocation."""
+    plant_list = [{
+        "label": plant["Label"],
+        "category": plant["Category"],
+        "units": int(plant["Units"]),
+        "savings": plant["Savings"],
+        "growing_price": plant["Growing Price"],
+        "carbon_absorption": plant["Carbon Absorption"]
+        } for plant in allocated_plants]
+
+    return {
+        "recommended_plants": plant_list,
+        "total_savings": total_savings,
+        "total_carbon_absorption": total_carbon_absorption
+    }
+
+def indexed_candidates(latitude, longitude, month=DEFAULT_MONTH):
+    """Weather-compatible plants with savings from the candidate index, or None without a fresh entry.
+
+    Returns the candidate rows with a 'Savings' column and their carbon
+    scores, taken from the index instead of any network or model lookup.
+    """
+    index = get_candidate_index()
+    if index is None:
+        return None
+    entry = index.get(weather_cache.cell(latitude, longitude), month)
+    if entry is None:
+        return None
+    catalog = get_catalog(PLANT_DATA_CSV, GROWING_COST_CSV)
+    if not entry.is_fresh(catalog.version, market_model_version()):
+        logger.debug("Candidate index entry is stale")
+        return None
+    plants = catalog.plants.iloc[entry.rows].assign(Savings=entry.savings.astype(float))
+    return plants, entry.carbon.astype(float)
+
 def recommend_crops(terrace_size, latitude, longitude, weight_savings, weight_carbon_absorption, total_budget, selected_categories):
     """Main function to recommend crops."""
-    state = fetch_state(latitude,longitude)
-    logger.info(state)
     try:
         logger.info("Starting recommend_crops function")
 
-        # Load plant data (including carbon absorption)
-        plant_data = load_plant_data(PLANT_DATA_CSV)
-
-        # Get weather data
-        weather_data = get_weather_data(latitude, longitude)
+        indexed = indexed_candidates(latitude, longitude) if USE_CANDIDATE_INDEX else None
+        if indexed is not None:
+            logger.info("Serving from the candidate index")
+            plants, carbon = indexed
+            selected = plants['Category'].isin(selected_categories).to_numpy()
+            scored = plants[selected].assign(Score=(
+                weight_savings * plants['Savings'].to_numpy()[selected] +
+                weight_carbon_absorption * carbon[selected]
+            ))
+            return format_recommendation(*allocate_scored_plants(scored, terrace_size, total_budget, selected_categories))
+
+        # State, weather, the shared plant catalog and the price model are independent
+        # lookups, so they run together under one deadline with per-stage fallbacks;
+        # the in-memory catalog runs inline so a busy pool can never fail the request
+        lookups = run_stages([
+            Stage('state', fetch_state, (latitude, longitude), STATE_TIMEOUT, DEFAULT_STATE),
+            Stage('weather', get_weather_data, (latitude, longitude), WEATHER_TIMEOUT, None),
+            Stage('catalog', get_catalog, (PLANT_DATA_CSV, GROWING_COST_CSV), inline=True),
+            Stage('price_model', get_market_model, (), PRICE_MODEL_TIMEOUT, None),
+        ], deadline=REQUEST_DEADLINE, concurrent=CONCURRENT_STAGES)
+        state = lookups['state']
+        weather_data = lookups['weather']
+        plant_data = lookups['catalog'].plants
+        logger.info(state)
         logger.info(weather_data)
 
         # Filter plants based on weather compatibility
-        filtered_plants = filter_plants_by_weather(plant_data, weather_data)
+        if weather_data is not None:
+            filtered_plants = filter_plants_by_weather(plant_data, weather_data)
+        else:
+            logger.warning("No weather data, skipping weather filter")
+            filtered_plants = plant_data
 
         # Calculate savings for filtered plants
-        filtered_plants = calculate_savings(filtered_plants, state)
+        filtered_plants = calculate_savings(filtered_plants, state, use_price_model=lookups['price_model'] is not None)
 
         # Allocate plants based on the constraints
         allocated_plants, total_savings, total_carbon_absorption = allocate_plants(
@@ -159,20 +283,7 @@ def recommend_crops(terrace_size, latitude, longitude, weight_savings, weight_ca
             weight_carbon_absorption
         )
 
-        # Prepare response
-        plant_list = [{
-            "label": plant["Label"],
-            "category": plant["Category"],
-            "savings": plant["Savings"],
-            "growing_price": plant["Growing Price"],
-            "carbon_absorption": plant["Carbon Absorption"]
-            } for plant in allocated_plants]
-
-        result = {
-            "recommended_plants": plant_list,
-            "total_savings": total_savings,
-            "total_carbon_absorption": total_carbon_absorption
-        }
+        result = format_recommendation(allocated_plants, total_savings, total_carbon_absorption)
 
         logger.info("Crops recommendation completed successfully")
         return result
@@ -1,30 +1,105 @@
+import os
+import threading
+import logging
+import numpy as np
 import pandas as pd
 import joblib
+from models.registry import registry
 
+logger = logging.getLogger(__name__)
+
+# Constants
+MARKET_PRICE_MODEL = 'models/plant_optimization/market_price_model3.pkl'
+FEATURE_COLUMNS = ['state', 'commodity', 'variety']
+
+_model = None
+_known_categories = None
+_model_lock = threading.Lock()
+
+def _find_known_categories(model):
+    """Collects the categories a strict one-hot encoder inside the model accepts.
+
+    Returns a dict of column name -> set of known values for every encoder
+    that raises on unknown input, so those rows can be masked out before
+    the batched predict instead of failing the whole call.
+    """
+    known = {}
+    stack = [model]
+    while stack:
+        est = stack.pop()
+        if hasattr(est, 'steps'):
+            stack.extend(step for _, step in est.steps)
+        if hasattr(est, 'transformers_'):
+            for _, transformer, columns in est.transformers_:
+                if hasattr(transformer, 'categories_') and getattr(transformer, 'handle_unknown', 'error') == 'error':
+                    for column, categories in zip(np.atleast_1d(columns), transformer.categories_):
+                        if column in FEATURE_COLUMNS:
+                            known[column] = set(categories)
+                elif hasattr(transformer, 'steps'):
+                    stack.append(transformer)
+        elif hasattr(est, 'categories_') and getattr(est, 'handle_unknown', 'error') == 'error':
+            names = getattr(est, 'feature_names_in_', FEATURE_COLUMNS)
+            for column, categories in zip(names, est.categories_):
+                known[column] = set(categories)
+    return known
+
+def market_model_version(model_path=MARKET_PRICE_MODEL):
+    """Modification time of the model file, or None if it is missing."""
+    try:
+        return os.stat(model_path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_market_model(model_path=MARKET_PRICE_MODEL):
+    """Loads the market price model once per process and returns it."""
+    global _model, _known_categories
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                logger.info(f"Loading market price model from {model_path}")
+                model = joblib.load(model_path)
+                _known_categories = _find_known_categories(model)
+                _model = model
+    return _model
+
+def predict_market_prices_batch(rows):
+    """Predicts prices for a list of (state, commodity, variety) rows in one call.
+
+    Returns a float array aligned with `rows`. Rows the model cannot price
+    (unknown categories, non-positive predictions) get 0.
+    """
+    prices = np.zeros(len(rows), dtype=float)
+    if not rows:
+        return prices
+
+    model = get_market_model()
+    input_data = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+
+    valid = np.ones(len(rows), dtype=bool)
+    for column, categories in _known_categories.items():
+        valid &= input_data[column].isin(categories).to_numpy()
+    if not valid.any():
+        return prices
+
+    try:
+        predicted = np.asarray(model.predict(input_data[valid]), dtype=float)
+    except Exception as e:
+        logger.error(f"Batch market price prediction failed: {str(e)}")
+        return prices  # Same fallback as a failed single prediction
+
+    prices[valid] = np.where(predicted > 0, np.round(predicted, 2), 0)
+    return prices
 
 def predict_market_prices(state, commodities):
-    results = {}
-    model = joblib.load('models/plant_optimization/market_price_model3.pkl')
-    print("Model loaded from 'market_price_model.pkl'")
-    # Prepare input data
-    for commodity in commodities:
-        input_data = pd.DataFrame({
-            'state': [state],
-            'commodity': [commodity],
-            'variety': [""]  # Placeholder for the variety
-        })
-        
-        try:
-            predicted_price = model.predict(input_data)
-            # Check if the prediction is valid
-            results[commodity] = round(predicted_price[0], 2) if predicted_price[0] > 0 else 0
-        except Exception as e:
-            results[commodity] = 0  # Return 0 if an error occurs or price is not found
-    
-    return results
+    """Predicts prices for every commodity in a state, keyed by commodity."""
+    rows = [(state, commodity, "") for commodity in commodities]  # Placeholder for the variety
+    prices = predict_market_prices_batch(rows)
+    return dict(zip(commodities, prices.tolist()))
+
+registry.register('market_price_model', get_market_model)
 
 if __name__ == '__main__':
     state_input = "Karnataka"  # Change this as needed
     commodities_input = ["Brinjal"]  # Change this as needed
     predicted_prices = predict_market_prices(state_input, commodities_input)
-    print(predicted_prices)
\ No newline at end of file
+    print(predicted_prices)
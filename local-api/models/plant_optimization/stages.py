@@ -0,0 +1,105 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Constants
+STAGE_WORKERS = 16  # Threads shared by every request's I/O stages
+
+REQUIRED = object()  # Fallback marker for stages whose failure must fail the request
+
+_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='stage')
+
+class StageError(Exception):
+    """Raised when a stage without a fallback fails or runs out of time."""
+
+@dataclass
+class Stage:
+    """An independent lookup run by run_stages.
+
+    `timeout` is measured from when the stage starts running and is capped
+    by the overall deadline. When the stage fails or times out, `fallback`
+    is used as its result unless it is REQUIRED. `inline` stages are cheap
+    local work that runs on the calling thread instead of the shared pool,
+    so they never wait behind other requests' lookups.
+    """
+    name: str
+    func: object
+    args: tuple = ()
+    timeout: float = None
+    fallback: object = field(default=REQUIRED)
+    inline: bool = False
+
+class _PooledStage:
+    """Runs a stage on the pool and records when it actually started."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.started = threading.Event()
+        self.started_at = None
+
+    def __call__(self):
+        self.started_at = time.monotonic()
+        self.started.set()
+        return self.stage.func(*self.stage.args)
+
+def _fail(stage, error):
+    if stage.fallback is REQUIRED:
+        raise StageError(f"Stage '{stage.name}' failed: {error}") from error
+    logger.warning(f"Stage '{stage.name}' failed ({error!r}), using fallback")
+    return stage.fallback
+
+def _run_inline(stage):
+    try:
+        return stage.func(*stage.args)
+    except Exception as e:
+        return _fail(stage, e)
+
+def run_stages(stages, deadline, concurrent=True):
+    """Runs the stages and returns their results keyed by stage name.
+
+    With `concurrent` the non-inline stages run together on a shared thread
+    pool while the inline ones run on the calling thread, and the call takes
+    at most `deadline` seconds unless the inline stages alone take longer.
+    A stage still queued at the deadline is cancelled and never takes a
+    thread; one that overruns keeps its thread until it finishes, but its
+    result is discarded. Otherwise the stages run one after another on the
+    calling thread.
+    """
+    results = {}
+    if not concurrent:
+        for stage in stages:
+            results[stage.name] = _run_inline(stage)
+        return results
+
+    started = time.monotonic()
+    end = started + deadline
+    pooled = [_PooledStage(stage) for stage in stages if not stage.inline]
+    futures = [(task, _executor.submit(task)) for task in pooled]
+    try:
+        for stage in stages:
+            if stage.inline:
+                results[stage.name] = _run_inline(stage)
+    except StageError:
+        for _, future in futures:
+            future.cancel()
+        raise
+
+    for task, future in futures:
+        stage = task.stage
+        if not task.started.wait(max(0.0, end - time.monotonic())) and future.cancel():
+            results[stage.name] = _fail(stage, TimeoutError(f"not started within the {deadline}s deadline"))
+            continue
+        task.started.wait()  # Cancelling failed because it has just started
+        limit = end if stage.timeout is None else min(task.started_at + stage.timeout, end)
+        try:
+            results[stage.name] = future.result(timeout=max(0.0, limit - time.monotonic()))
+        except FutureTimeoutError:
+            results[stage.name] = _fail(stage, TimeoutError(f"no result after {limit - task.started_at:.3f}s of running"))
+        except Exception as e:
+            results[stage.name] = _fail(stage, e)
+        logger.debug(f"Stage '{stage.name}' settled after {time.monotonic() - started:.3f}s")
+    return results
@@ -0,0 +1,131 @@
+import os
+import json
+import math
+import threading
+import logging
+import numpy as np
+from models.registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Constants
+STATE_BOUNDARIES_GEOJSON = 'models/datasets/india_states.geojson'  # Written by build_state_boundaries.py
+STATE_NAME_KEYS = ('st_nm', 'ST_NM', 'NAME_1', 'state', 'name')  # Property holding the state name, first match wins
+GRID_CELL_DEG = 0.5  # Size of a spatial index cell in degrees
+
+class _Ring:
+    """Polygon ring with the edge arrays needed for ray casting precomputed."""
+    __slots__ = ('xs', 'ys', 'y_next', 'slope')
+
+    def __init__(self, coordinates):
+        points = np.asarray(coordinates, dtype=float)[:, :2]
+        self.xs = points[:, 0]
+        self.ys = points[:, 1]
+        x_next = np.roll(self.xs, -1)
+        self.y_next = np.roll(self.ys, -1)
+        dy = self.y_next - self.ys
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.slope = np.where(dy != 0, (x_next - self.xs) / dy, 0.0)
+
+    def contains(self, x, y):
+        crosses = (self.ys > y) != (self.y_next > y)
+        x_cross = self.xs + (y - self.ys) * self.slope
+        return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+class StateIndex:
+    """Point-in-polygon lookup of state names over a uniform grid of bounding boxes.
+
+    Every polygon part is registered in each grid cell its bounding box
+    overlaps, so a lookup only ray-casts the few parts sharing the point's cell.
+    """
+
+    def __init__(self, states, cell_size=GRID_CELL_DEG):
+        # states: iterable of (name, polygons) where each polygon is a list of
+        # rings in GeoJSON [lon, lat] order, exterior ring first.
+        self.cell_size = cell_size
+        self.names = []
+        self.parts = []  # (name index, bbox, exterior ring, hole rings)
+        self.grid = {}
+
+        for name, polygons in states:
+            name_index = len(self.names)
+            self.names.append(name)
+            for polygon in polygons:
+                if not polygon:
+                    continue
+                exterior = _Ring(polygon[0])
+                holes = [_Ring(ring) for ring in polygon[1:]]
+                bbox = (exterior.xs.min(), exterior.ys.min(), exterior.xs.max(), exterior.ys.max())
+                part_id = len(self.parts)
+                self.parts.append((name_index, bbox, exterior, holes))
+                for cell in self._cells_for_bbox(bbox):
+                    self.grid.setdefault(cell, []).append(part_id)
+
+    @classmethod
+    def from_geojson(cls, path, cell_size=GRID_CELL_DEG):
+        """Builds an index from a GeoJSON FeatureCollection of state boundaries."""
+        with open(path, 'r') as file:
+            collection = json.load(file)
+
+        states = []
+        for feature in collection.get('features', []):
+            properties = feature.get('properties') or {}
+            geometry = feature.get('geometry') or {}
+            name = next((properties[key] for key in STATE_NAME_KEYS if properties.get(key)), None)
+            if name is None:
+                continue
+            if geometry.get('type') == 'Polygon':
+                polygons = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiPolygon':
+                polygons = geometry['coordinates']
+            else:
+                continue
+            states.append((str(name), polygons))
+
+        logger.info(f"Loaded {len(states)} state boundaries from {path}")
+        return cls(states, cell_size)
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def _cells_for_bbox(self, bbox):
+        min_x, min_y = self._cell(bbox[0], bbox[1])
+        max_x, max_y = self._cell(bbox[2], bbox[3])
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                yield (cx, cy)
+
+    def lookup(self, latitude, longitude):
+        """Returns the state containing the point, or None if it lies outside every polygon."""
+        x, y = float(longitude), float(latitude)
+        for part_id in self.grid.get(self._cell(x, y), ()):
+            name_index, bbox, exterior, holes = self.parts[part_id]
+            if not (bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]):
+                continue
+            if exterior.contains(x, y) and not any(hole.contains(x, y) for hole in holes):
+                return self.names[name_index]
+        return None
+
+    def lookup_many(self, coordinates):
+        """Resolves a list of (latitude, longitude) pairs, returning names or None in input order."""
+        return [self.lookup(latitude, longitude) for latitude, longitude in coordinates]
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+def get_state_index(path=STATE_BOUNDARIES_GEOJSON):
+    """Returns the process-wide StateIndex, or None if the boundary file is not available."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                if os.path.exists(path):
+                    _index = StateIndex.from_geojson(path)
+                else:
+                    logger.warning(f"State boundary file {path} not found, every state lookup will go to Nominatim; "
+                                   "build it with python -m models.plant_optimization.build_state_boundaries")
+                _index_loaded = True
+    return _index
+
+registry.register('state_index', get_state_index)
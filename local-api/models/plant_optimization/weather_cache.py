@@ -0,0 +1,140 @@
+import json
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class _InFlight:
+    """An upstream fetch that concurrent callers for the same key wait on."""
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class WeatherCache:
+    """Weather results keyed by grid cell and date window.
+
+    Lookups go through an in-memory LRU with TTL, then an on-disk SQLite
+    table that survives restarts, and only then the upstream `fetch`.
+    Concurrent misses on the same key share a single upstream call.
+    """
+
+    def __init__(self, fetch, grid_deg=0.1, ttl=6 * 60 * 60, max_entries=1024, db_path=None):
+        self.fetch = fetch
+        self.grid_deg = grid_deg
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+
+    def cell(self, latitude, longitude):
+        """Snaps a coordinate to the centre of its grid cell."""
+        return (
+            round(round(float(latitude) / self.grid_deg) * self.grid_deg, 6),
+            round(round(float(longitude) / self.grid_deg) * self.grid_deg, 6),
+        )
+
+    def get(self, latitude, longitude, start_date, end_date):
+        cell_latitude, cell_longitude = self.cell(latitude, longitude)
+        key = (cell_latitude, cell_longitude, start_date, end_date)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = _InFlight()
+
+        if not owner:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
+
+        try:
+            value = self._load(key)
+            if value is None:
+                logger.debug(f"Fetching weather for cell {key}")
+                value = self.fetch(cell_latitude, cell_longitude, start_date, end_date)
+                self._store(key, value)
+            self._remember(key, value)
+            inflight.value = value
+            return value
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.event.set()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS weather ("
+                "latitude REAL, longitude REAL, start_date TEXT, end_date TEXT, "
+                "fetched_at REAL, data TEXT, "
+                "PRIMARY KEY (latitude, longitude, start_date, end_date))"
+            )
+            self._db.commit()
+        return self._db
+
+    def _load(self, key):
+        if not self.db_path:
+            return None
+        try:
+            with self._db_lock:
+                row = self._connection().execute(
+                    "SELECT fetched_at, data FROM weather "
+                    "WHERE latitude = ? AND longitude = ? AND start_date = ? AND end_date = ?",
+                    key,
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Weather cache read failed: {str(e)}")
+            return None
+        if row is None or row[0] + self.ttl <= time.time():
+            return None
+        return json.loads(row[1])
+
+    def _store(self, key, value):
+        if not self.db_path:
+            return
+        try:
+            with self._db_lock:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO weather VALUES (?, ?, ?, ?, ?, ?)",
+                    key + (time.time(), json.dumps(value)),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Weather cache write failed: {str(e)}")
+
+    def clear(self):
+        """Drops the in-memory entries; the SQLite layer is left untouched."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,79 @@
+import io
+import os
+import threading
+import logging
+from concurrent.futures import Future
+import numpy as np
+from PIL import Image
+from models.registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Constants
+STAGE_MODEL_XML = os.environ.get('STAGE_MODEL_PATH', '../ai-models/plant-recognition-model/openvino_model/model.xml')
+STAGE_DEVICE = 'CPU'
+IMAGE_SIZE = (224, 224)
+CLASS_NAMES_STAGES = ['flowering', 'mature', 'seedling']
+INFERENCE_TIMEOUT = 10.0  # Seconds to wait for one image's result
+
+def preprocess_image(data):
+    """Decodes image bytes to a (1, 224, 224, 3) float32 array scaled to [0, 1], as in training.
+
+    The resize matches Keras' load_img and flow_from_directory defaults
+    (full decode, then nearest-neighbour), which the model was trained on.
+    """
+    image = Image.open(io.BytesIO(data))
+    image = image.convert('RGB').resize(IMAGE_SIZE, Image.NEAREST)
+    return (np.asarray(image, dtype=np.float32) / 255.0)[np.newaxis]
+
+class StageClassifier:
+    """The OpenVINO stage model behind an AsyncInferQueue.
+
+    The model is compiled with the THROUGHPUT hint and the queue holds the
+    device's optimal number of infer requests, so concurrent images from
+    any number of callers keep every stream busy.
+    """
+
+    def __init__(self, model_path=STAGE_MODEL_XML, device=STAGE_DEVICE):
+        from openvino import Core, AsyncInferQueue
+        core = Core()
+        model = core.read_model(model_path)
+        if model.input(0).get_partial_shape().is_dynamic:
+            model.reshape([1, IMAGE_SIZE[0], IMAGE_SIZE[1], 3])  # One image per infer request
+        self.compiled_model = core.compile_model(model, device, {"PERFORMANCE_HINT": "THROUGHPUT"})
+        self.num_requests = self.compiled_model.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+        self.queue = AsyncInferQueue(self.compiled_model, self.num_requests)
+        self.queue.set_callback(self._on_done)
+        self._submit_lock = threading.Lock()
+        logger.info(f"Stage model compiled on {device} with {self.num_requests} infer requests")
+
+    @staticmethod
+    def _on_done(request, future):
+        try:
+            future.set_result(request.get_output_tensor(0).data[0].copy())
+        except Exception as e:
+            future.set_exception(e)
+
+    def submit(self, input_data):
+        """Starts inference on one preprocessed image; blocks only while every infer request is busy."""
+        future = Future()
+        with self._submit_lock:
+            self.queue.start_async({0: input_data}, future)
+        return future
+
+    def classify(self, images):
+        """Stage probabilities for each image (raw bytes), in order."""
+        futures = [self.submit(preprocess_image(data)) for data in images]
+        results = []
+        for future in futures:
+            probabilities = future.result(timeout=INFERENCE_TIMEOUT)
+            results.append({
+                "stage": CLASS_NAMES_STAGES[int(np.argmax(probabilities))],
+                "probabilities": {name: float(p) for name, p in zip(CLASS_NAMES_STAGES, probabilities)},
+            })
+        return results
+
+def classify_stages(images):
+    return registry.get('stage_classifier').classify(images)
+
+registry.register('stage_classifier', StageClassifier)
@@ -0,0 +1,70 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Named models that load on first use.
+
+    Modules register a loader per model; `get` runs it once, keeping the
+    result and how long it took. `load_all` and `load_in_background` load
+    everything up front for warm-up, and `load_times` feeds the startup
+    profile.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.load_times = {}
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+
+    def names(self):
+        return list(self._loaders)
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        try:
+            return self._models[name]
+        except KeyError:
+            pass
+        with self._locks[name]:
+            if name not in self._models:
+                start = time.perf_counter()
+                model = self._loaders[name]()
+                self.load_times[name] = time.perf_counter() - start
+                self._models[name] = model
+                logger.info(f"Loaded {name} in {self.load_times[name]:.2f}s")
+        return self._models[name]
+
+    def unload(self, name):
+        """Drops a loaded model so the next `get` runs its loader again."""
+        with self._locks[name]:
+            self._models.pop(name, None)
+
+    def load_all(self, names=None):
+        for name in names or self.names():
+            self.get(name)
+        return dict(self.load_times)
+
+    def load_in_background(self, names=None):
+        """Loads models on a daemon thread; failures are logged and retried on first use."""
+        def run():
+            for name in names or self.names():
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"Background load of {name} failed: {str(e)}")
+        thread = threading.Thread(target=run, name='model-loader', daemon=True)
+        thread.start()
+        return thread
+
+registry = ModelRegistry()
@@ -0,0 +1,64 @@
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+# Run from local-api/: python profile_startup.py [--top 25] [--no-load]
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def import_times(module):
+    """Per-module self and cumulative import times (ms) from `python -X importtime` in a fresh interpreter."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            depth = (len(indent) - 1) // 2
+            times.append((name, depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return times, wall
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import and model load times for local-api.")
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=25, help="Modules to list, by cumulative import time")
+    parser.add_argument('--no-load', action='store_true', help="Only profile imports, not model loading")
+    args = parser.parse_args()
+
+    times, wall = import_times(args.module)
+    total = sum(t[3] for t in times if t[1] == 0)
+    print(f"import {args.module}: {wall:.2f}s wall in a fresh interpreter, {total / 1000:.2f}s in imports")
+
+    # Direct imports of the module show where the time goes; self times show the heaviest single modules
+    direct = sorted((t for t in times if t[1] == 1), key=lambda t: -t[3])[:args.top]
+    print(f"\n{'imported by ' + args.module:<50} {'cumulative ms':>14}")
+    for name, _, _, cumulative_ms in direct:
+        print(f"{name:<50} {cumulative_ms:>14.1f}")
+    heaviest = sorted(times, key=lambda t: -t[2])[:args.top]
+    print(f"\n{'module':<50} {'self ms':>14}")
+    for name, _, self_ms, _ in heaviest:
+        print(f"{name:<50} {self_ms:>14.1f}")
+
+    if args.no_load:
+        return
+
+    __import__(args.module)
+    from models.registry import registry
+    print(f"\n{'model':<30} {'load s':>8}")
+    for name in registry.names():
+        try:
+            registry.get(name)
+            print(f"{name:<30} {registry.load_times[name]:>8.2f}")
+        except Exception as e:
+            print(f"{name:<30} {'failed':>8}  {e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+import os
+import sys
+import pytest
+
+LOCAL_API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LOCAL_API_DIR)
+
+@pytest.fixture(autouse=True)
+def run_from_local_api(monkeypatch):
+    # Data paths such as models/datasets/plant_data.csv are relative to local-api/
+    monkeypatch.chdir(LOCAL_API_DIR)
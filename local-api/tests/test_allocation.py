@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from models.plant_optimization.allocation import solve, objective, _prune_dominated
+from models.plant_optimization.bench_allocation import make_problem
+from models.plant_optimization.catalog import get_catalog
+from models.plant_optimization.plant_optm import allocate_plants
+
+@pytest.fixture(scope='module')
+def plants():
+    return get_catalog().plants
+
+@pytest.mark.parametrize('terrace_size', [5, 10, 20])
+@pytest.mark.parametrize('budget', [10, 30, 50, 100, 150, 200])
+def test_small_budgets_stay_within_budget(plants, terrace_size, budget):
+    categories = list(plants['Category'].unique())
+    allocated, _, _ = allocate_plants(plants, terrace_size, budget, categories, 0.5, 0.5)
+    units = sum(plant['Units'] for plant in allocated)
+    cost = sum(plant['Growing Price'] * plant['Units'] for plant in allocated)
+    assert cost <= budget
+    assert units <= terrace_size / 0.5
+
+def test_no_selected_categories_returns_empty_plan(plants):
+    assert allocate_plants(plants, 10, 1000, [], 0.5, 0.5) == ([], 0.0, 0.0)
+
+@pytest.mark.parametrize('num_plants', [50, 1000, 5000])
+@pytest.mark.parametrize('terrace_size', [10, 100, 300])
+@pytest.mark.parametrize('budget', [50, 100, 300, 2000, 20000])
+def test_knapsack_never_worse_than_greedy(num_plants, terrace_size, budget):
+    problem = make_problem(np.random.default_rng(num_plants), num_plants, terrace_size, budget)
+    greedy_value, _ = objective(problem, solve(problem, 'greedy'))
+    units = solve(problem, 'knapsack')
+    value, cost = objective(problem, units)
+    assert cost <= budget
+    assert units.sum() <= problem.max_slots
+    assert value >= greedy_value
+
+def test_prune_matches_pairwise_definition():
+    # A plant is dominated when better-ranked plants no heavier than it hold at least `cap` units
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = int(rng.integers(1, 40))
+        weights = rng.integers(0, int(rng.integers(1, 20)), n)
+        values = np.round(rng.uniform(0, 5, n), int(rng.integers(0, 2)))
+        units = rng.integers(0, 5, n)
+        cap = int(rng.integers(1, 10))
+        rank = np.argsort(np.argsort(-values, kind='stable'), kind='stable')
+        expected = [j for j in range(n) if units[(rank < rank[j]) & (weights <= weights[j])].sum() < cap]
+        assert _prune_dominated(weights, values, units, cap).tolist() == expected
+
+def test_repeated_categories_count_once(plants):
+    def plan(categories):
+        allocated, total_savings, total_carbon = allocate_plants(plants, 10, 500, categories, 0.5, 0.5)
+        return [(plant['Label'], plant['Units']) for plant in allocated], total_savings, total_carbon
+    assert plan(['Vegetables', 'Herbs', 'Vegetables']) == plan(['Vegetables', 'Herbs'])
@@ -0,0 +1,35 @@
+import os
+import json
+from models.chat_bot import chatbot
+from models.chat_bot.answer_cache import AnswerCache
+from models.registry import ModelRegistry
+
+QUESTION = "How deep should I plant garlic cloves?"
+
+def write_qa(path, answer):
+    path.write_text(json.dumps([{"question": QUESTION, "answer": answer}]))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # A new stamp even on coarse clocks
+
+def test_changed_qa_data_is_answered_from_a_rebuilt_index(tmp_path, monkeypatch):
+    qa_file = tmp_path / 'chatbot.json'
+    write_qa(qa_file, "About 5 cm deep.")
+    registry = ModelRegistry()
+    registry.register('chatbot_qa', chatbot.load_qa_index)
+    for name in ('chatbot_embeddings', 'chatbot_session'):
+        registry.register(name, lambda: None)
+    monkeypatch.setattr(chatbot, 'registry', registry)
+    monkeypatch.setattr(chatbot, 'json_file_path', str(qa_file))
+    cache = AnswerCache(chatbot.compute_answer, chatbot.data_version, version_check_interval=0,
+                        on_invalidate=chatbot.reload_chatbot_data)
+
+    assert cache.get(QUESTION) == {"answer": "About 5 cm deep."}
+    first_index = registry.get('chatbot_qa')
+
+    write_qa(qa_file, "About 2 cm deep, pointed end up.")
+    assert cache.get(QUESTION) == {"answer": "About 2 cm deep, pointed end up."}
+    assert registry.get('chatbot_qa') is not first_index
+
+    # An unchanged stamp keeps both the cached answer and the loaded index
+    assert cache.get(QUESTION) == {"answer": "About 2 cm deep, pointed end up."}
+    assert cache.stats["hits"] == 1
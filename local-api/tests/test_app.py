@@ -0,0 +1,68 @@
+import json
+import threading
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('PIL')
+import app
+from models.registry import ModelRegistry
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, '_ready', threading.Event())
+    monkeypatch.setattr(app, '_degraded', set())
+    monkeypatch.setattr(app, '_model_slots', threading.BoundedSemaphore(2))
+    return app.app.test_client()
+
+def test_failed_warm_up_leaves_the_worker_ready_but_degraded(client, monkeypatch):
+    registry = ModelRegistry()
+    registry.register('price_model', dict)
+    registry.register('qa_model', lambda: open('/nonexistent/model.onnx'))
+    monkeypatch.setattr(app, 'registry', registry)
+    def answer_question(question):
+        raise RuntimeError("tokenizer files missing")
+    monkeypatch.setattr(app, 'answer_question', answer_question)
+
+    app.warm_up()
+
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.json == {"status": "degraded", "degraded": ["chatbot", "qa_model"]}
+
+def test_batch_is_shed_when_every_model_slot_is_taken(client, monkeypatch):
+    started = []
+    def recommend_crops_batch(user_requests):
+        started.append(user_requests)
+        yield from ()
+    monkeypatch.setattr(app, 'recommend_crops_batch', recommend_crops_batch)
+    assert app._model_slots.acquire(blocking=False) and app._model_slots.acquire(blocking=False)
+
+    response = client.post('/recommend_crops/batch', json={"requests": [{"id": 1}]})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.RETRY_AFTER)
+    assert started == []
+
+def test_batch_holds_one_slot_while_streaming(client, monkeypatch):
+    def recommend_crops_batch(user_requests):
+        for index, user_request in enumerate(user_requests):
+            # The stream and its items run under one slot, leaving one for other calls
+            assert app._model_slots._value == 1
+            yield {"index": index, "id": user_request['id']}
+        raise RuntimeError("price model crashed")
+    monkeypatch.setattr(app, 'recommend_crops_batch', recommend_crops_batch)
+
+    response = client.post('/recommend_crops/batch', json={"requests": [{"id": 'a'}, {"id": 'b'}]})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [{"index": 0, "id": 'a'}, {"index": 1, "id": 'b'}, {"error": "price model crashed"}]
+
+    # Released once the last step on the executor is done
+    app._model_executor.submit(lambda: None).result()
+    assert app._model_slots._value == 2
+
+def test_abandoned_batch_stream_releases_its_slot(client, monkeypatch):
+    monkeypatch.setattr(app, 'recommend_crops_batch', lambda user_requests: iter(user_requests))
+    response = client.post('/recommend_crops/batch', json=[{"id": n} for n in range(5)], buffered=False)
+    assert app._model_slots._value == 1
+    response.close()
+    app._model_executor.submit(lambda: None).result()
+    assert app._model_slots._value == 2
@@ -0,0 +1,51 @@
+import pytest
+from models.plant_optimization import batch_recommend
+from models.plant_optimization.get_address import DEFAULT_STATE
+
+MILD_WEATHER = {'temp_min': 18.0, 'temp_max': 32.0, 'sunlight': 8.0}
+
+def request(**fields):
+    return {'terrace_size': 10, 'latitude': 12.97, 'longitude': 77.59, 'savings_weight': 0.5,
+            'weight_carbon_absorption': 0.5, 'budget': 500, 'types': ['Vegetables', 'Legumes'], **fields}
+
+@pytest.fixture
+def offline(monkeypatch):
+    """Replaces the network lookups; returns the points whose state was looked up."""
+    looked_up = []
+    def fetch_state(latitude, longitude):
+        looked_up.append((latitude, longitude))
+        if latitude > 25:
+            raise ConnectionError("Nominatim unreachable")
+        return 'Karnataka'
+    monkeypatch.setattr(batch_recommend, 'fetch_state', fetch_state)
+    monkeypatch.setattr(batch_recommend, 'get_weather_data', lambda latitude, longitude: MILD_WEATHER)
+    monkeypatch.setattr(batch_recommend, 'get_market_model', lambda: None)
+    return looked_up
+
+def run(user_requests):
+    return sorted(batch_recommend.recommend_crops_batch(user_requests), key=lambda result: result['index'])
+
+@pytest.mark.parametrize('bad_request, message', [
+    (request(latitude=None), "'latitude' must be a number"),
+    (request(longitude='77.59'), "'longitude' must be a number"),
+    (request(savings_weight=float('nan')), "'savings_weight' must be a number"),
+    (request(budget=True), "'budget' must be a number"),
+    (request(latitude=123.0), "out of range"),
+    (request(types='Legumes'), "'types' must be a list"),
+    ({'id': 'partial', 'latitude': 12.97}, "Missing fields"),
+    (['not', 'an', 'object'], "JSON object"),
+])
+def test_bad_row_reports_an_error_at_its_position(offline, bad_request, message):
+    results = run([request(id='a'), bad_request, request(id='c')])
+    assert [result['index'] for result in results] == [0, 1, 2]
+    assert message in results[1]['error']
+    assert 'error' not in results[0] and 'error' not in results[2]
+    assert results[0]['id'] == 'a' and results[2]['id'] == 'c'
+
+def test_state_lookup_falls_back_only_for_the_failed_point(offline, caplog):
+    # The Delhi lookup fails; Bengaluru keeps its state and each point is looked up once
+    results = run([request(), request(latitude=28.61, longitude=77.21), request()])
+    assert all('error' not in result and result['recommended_plants'] for result in results)
+    assert sorted(offline) == [(12.97, 77.59), (28.61, 77.21)]
+    assert f"using {DEFAULT_STATE}" in caplog.text and '(28.61, 77.21)' in caplog.text
+    assert '(12.97, 77.59)' not in caplog.text
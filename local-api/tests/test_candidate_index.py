@@ -0,0 +1,48 @@
+import json
+import pytest
+from models.plant_optimization import candidate_index, build_candidate_index, plant_optm
+from models.plant_optimization.get_weth_data import DEFAULT_MONTH
+
+BENGALURU = (12.97, 77.59)
+WEATHER = {'temp_min': 19.0, 'temp_max': 29.0, 'sunlight': 7.5}
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    """Points the serving path at an empty index directory under tmp_path, with every lookup offline."""
+    for module in (plant_optm, build_candidate_index):
+        monkeypatch.setattr(module, 'fetch_state', lambda *point: 'Karnataka')
+        monkeypatch.setattr(module, 'get_weather_data', lambda *args: WEATHER)
+        monkeypatch.setattr(module, 'get_market_model', lambda: None)
+    monkeypatch.setattr(candidate_index, '_index', None)
+    monkeypatch.setattr(plant_optm, 'get_candidate_index', lambda: candidate_index.get_candidate_index(str(tmp_path)))
+    return tmp_path
+
+def recommend(monkeypatch, use_index, budget):
+    monkeypatch.setattr(plant_optm, 'USE_CANDIDATE_INDEX', use_index)
+    return plant_optm.recommend_crops(10, *BENGALURU, 0.7, 0.3, budget, ['Vegetables', 'Fruits', 'medicinal'])
+
+@pytest.mark.parametrize('budget', [50, 300, 2000])
+def test_indexed_and_live_recommendations_match(index_dir, monkeypatch, caplog, budget):
+    build_candidate_index.build_candidate_index([BENGALURU], [DEFAULT_MONTH], str(index_dir))
+    with caplog.at_level('INFO'):
+        indexed = recommend(monkeypatch, True, budget)
+    assert "Serving from the candidate index" in caplog.text
+    assert indexed == recommend(monkeypatch, False, budget)
+
+def test_unreadable_index_falls_back_to_the_live_path(index_dir, monkeypatch, caplog):
+    build_candidate_index.build_candidate_index([BENGALURU], [DEFAULT_MONTH], str(index_dir))
+    manifest = json.loads((index_dir / candidate_index.MANIFEST_FILE).read_text())
+    (index_dir / next(iter(manifest.values()))['file']).write_bytes(b'not an npz archive')
+
+    live = recommend(monkeypatch, False, 300)
+    assert recommend(monkeypatch, True, 300) == live
+    assert "Could not load the candidate index" in caplog.text
+
+    # The broken manifest is not reloaded on every request, but a rebuild is picked up
+    caplog.clear()
+    recommend(monkeypatch, True, 300)
+    assert "Could not load the candidate index" not in caplog.text
+    build_candidate_index.build_candidate_index([BENGALURU], [DEFAULT_MONTH], str(index_dir))
+    with caplog.at_level('INFO'):
+        assert recommend(monkeypatch, True, 300) == live
+    assert "Serving from the candidate index" in caplog.text
@@ -0,0 +1,34 @@
+import threading
+import pytest
+from models.chat_bot import chatbot
+from models.chat_bot.micro_batcher import MicroBatcher
+
+def test_stalled_model_batch_falls_back_within_the_timeout(monkeypatch, caplog):
+    stalled = threading.Event()
+    def run_batch(queries):
+        stalled.wait(5)
+        return [[0.1, 0.2, 0.3, 0.4]] * len(queries)
+    monkeypatch.setattr(chatbot, 'batcher', MicroBatcher(run_batch, max_wait=0.0))
+    monkeypatch.setattr(chatbot, 'BATCH_TIMEOUT', 0.05)
+
+    try:
+        answer, tier = chatbot.cascade.answer("zxqv plorb")  # No QA question shares a word with it
+    finally:
+        stalled.set()
+    assert (answer, tier) == (chatbot.FALLBACK_RESPONSE, 'fallback')
+    assert "falling back" in caplog.text
+
+def test_tokenizer_is_downloaded_with_a_warning_when_not_vendored_or_cached(tmp_path, monkeypatch, caplog):
+    transformers = pytest.importorskip('transformers')
+    calls = []
+    def from_pretrained(name, local_files_only=False):
+        calls.append((name, local_files_only))
+        if local_files_only:
+            raise OSError(f"{name} is not in the local cache")
+        return 'downloaded tokenizer'
+    monkeypatch.setattr(transformers.AutoTokenizer, 'from_pretrained', from_pretrained)
+    monkeypatch.setattr(chatbot, 'TOKENIZER_DIR', str(tmp_path / 'tokenizer'))
+
+    assert chatbot.load_tokenizer() == 'downloaded tokenizer'
+    assert calls == [(chatbot.TOKENIZER_MODEL, True), (chatbot.TOKENIZER_MODEL, False)]
+    assert "downloading it" in caplog.text and "vendor_tokenizer" in caplog.text
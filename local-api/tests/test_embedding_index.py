@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+from onnx import helper, TensorProto
+from models.chat_bot import chatbot
+from models.chat_bot.embedding_index import EmbeddingIndex, ENCODER_FILE
+from models.registry import ModelRegistry
+
+def write_encoder(path):
+    """Stand-in for the exported encoder: the attention mask as float 'embeddings'."""
+    graph = helper.make_graph(
+        [helper.make_node('Cast', ['attention_mask'], ['embeddings'], to=TensorProto.FLOAT),
+         helper.make_node('Identity', ['input_ids'], ['ids'])],
+        'encoder',
+        [helper.make_tensor_value_info(name, TensorProto.INT64, ['batch', 'length']) for name in ('input_ids', 'attention_mask')],
+        [helper.make_tensor_value_info(name, elem, ['batch', 'length'])
+         for name, elem in (('embeddings', TensorProto.FLOAT), ('ids', TensorProto.INT64))],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+@pytest.mark.parametrize('configured, pool_size, cores, expected', [
+    (1, 1, 16, 1),  # gunicorn's one single-threaded session per worker
+    (3, 2, 16, 3),
+    (None, 4, 16, 4),  # Unset: the cores split across the pool, as for the model sessions
+])
+def test_served_encoder_uses_the_configured_thread_count(tmp_path, monkeypatch, configured, pool_size, cores, expected):
+    write_encoder(tmp_path / ENCODER_FILE)
+    index = EmbeddingIndex(np.zeros((1, 2), dtype=np.float32), ['hash'], 'float32')
+    registry = ModelRegistry()
+    registry.register('chatbot_qa', lambda: type('QA', (), {'qa_data': [{'question': 'q', 'answer': 'a'}]}))
+    registry.register('chatbot_tokenizer', lambda: None)
+    monkeypatch.setattr(chatbot, 'registry', registry)
+    monkeypatch.setattr(chatbot, 'RETRIEVAL_MODE', 'embedding')
+    monkeypatch.setattr(chatbot, 'EMBEDDING_DIR', str(tmp_path))
+    monkeypatch.setattr(chatbot, 'INTRA_OP_THREADS', configured)
+    monkeypatch.setattr(chatbot, 'SESSION_POOL_SIZE', pool_size)
+    monkeypatch.setattr(EmbeddingIndex, 'load', classmethod(lambda cls, index_dir: index))
+    monkeypatch.setattr(EmbeddingIndex, 'matches', lambda self, qa_data: True)
+    monkeypatch.setattr('os.cpu_count', lambda: cores)
+
+    _, encoder = chatbot.load_embeddings()
+    assert encoder.session.get_session_options().intra_op_num_threads == expected
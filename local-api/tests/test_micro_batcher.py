@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+import pytest
+from models.chat_bot.micro_batcher import MicroBatcher
+
+def submit_together(batcher, items):
+    """Submits `items` so they land in one batch; the batcher's window is long enough for all of them."""
+    return [batcher.submit(item) for item in items]
+
+def test_result_count_mismatch_fails_every_call_in_the_batch():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items][:-1], max_batch=3, max_wait=1.0)
+    futures = submit_together(batcher, [1, 2, 3])
+    for future in futures:
+        with pytest.raises(ValueError, match="returned 2 results for a batch of 3"):
+            future.result(timeout=5)
+    assert batcher.batches == 0
+
+def test_failing_batch_fails_every_call_and_the_worker_keeps_going():
+    def run_batch(items):
+        if 'bad' in items:
+            raise RuntimeError("session crashed")
+        return [item.upper() for item in items]
+    batcher = MicroBatcher(run_batch, max_batch=2, max_wait=1.0)
+    for future in submit_together(batcher, ['ok', 'bad']):
+        with pytest.raises(RuntimeError, match="session crashed"):
+            future.result(timeout=5)
+    assert batcher('next', timeout=5) == 'NEXT'
+
+def test_timed_out_call_is_dropped_from_its_batch():
+    release = threading.Event()
+    seen = []
+    def run_batch(items):
+        seen.append(items)
+        release.wait(5)
+        return items
+    batcher = MicroBatcher(run_batch, max_batch=1, max_wait=0.0)
+    blocker = batcher.submit('first')
+    with pytest.raises(FutureTimeout):
+        batcher('late', timeout=0.05)  # Queued behind 'first', so it is cancelled before it runs
+    release.set()
+    assert blocker.result(timeout=5) == 'first'
+    assert batcher('after', timeout=5) == 'after'
+    assert seen == [['first'], ['after']]
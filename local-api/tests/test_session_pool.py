@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+from onnx import helper, numpy_helper, TensorProto
+from models.chat_bot import chatbot
+from models.chat_bot.session_pool import SessionPool
+from models.registry import ModelRegistry
+
+VOCAB = ['[PAD]', 'how', 'often', 'should', 'i', 'water', 'tomato', 'plants', 'mint', 'needs', 'sun']
+NUM_CLASSES = 4
+
+def write_pooling_classifier(path, batch='batch', length='length'):
+    """Mean-pools token embeddings under the attention mask, then a linear layer and softmax.
+
+    The padding token has a non-zero embedding, so the output only matches
+    an unpadded run when the attention mask is actually bound.
+    """
+    rng = np.random.default_rng(7)
+    embeddings = numpy_helper.from_array(rng.normal(size=(len(VOCAB), 8)).astype(np.float32), 'embeddings')
+    weights = numpy_helper.from_array(rng.normal(size=(8, NUM_CLASSES)).astype(np.float32), 'weights')
+    axes = [numpy_helper.from_array(np.array([axis], dtype=np.int64), f'axis_{axis}') for axis in (1, 2)]
+    nodes = [
+        helper.make_node('Gather', ['embeddings', 'input_ids'], ['tokens']),
+        helper.make_node('Cast', ['attention_mask'], ['mask'], to=TensorProto.FLOAT),
+        helper.make_node('Unsqueeze', ['mask', 'axis_2'], ['mask_3d']),
+        helper.make_node('Mul', ['tokens', 'mask_3d'], ['masked']),
+        helper.make_node('ReduceSum', ['masked', 'axis_1'], ['summed'], keepdims=0),
+        helper.make_node('ReduceSum', ['mask_3d', 'axis_1'], ['count'], keepdims=0),
+        helper.make_node('Div', ['summed', 'count'], ['pooled']),
+        helper.make_node('MatMul', ['pooled', 'weights'], ['logits']),
+        helper.make_node('Softmax', ['logits'], ['probabilities'], axis=-1),
+    ]
+    graph = helper.make_graph(
+        nodes, 'pooling_classifier',
+        [helper.make_tensor_value_info(name, TensorProto.INT64, [batch, length]) for name in ('input_ids', 'attention_mask')],
+        [helper.make_tensor_value_info('probabilities', TensorProto.FLOAT, [batch, NUM_CLASSES])],
+        initializer=[embeddings, weights, *axes],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+class WordTokenizer:
+    """The slice of the transformers tokenizer API that run_batch uses, over VOCAB."""
+    model_max_length = 16
+
+    def __call__(self, texts, return_tensors, padding, truncation, max_length):
+        ids = [[VOCAB.index(word) for word in text.lower().split()][:max_length] for text in texts]
+        length = max(map(len, ids)) if padding == 'longest' else max_length
+        input_ids = np.array([row + [0] * (length - len(row)) for row in ids], dtype=np.int64)
+        attention_mask = np.array([[1] * len(row) + [0] * (length - len(row)) for row in ids], dtype=np.int64)
+        return {'input_ids': input_ids, 'attention_mask': attention_mask, 'token_type_ids': np.zeros_like(input_ids)}
+
+QUERIES = ['how often should i water tomato plants', 'mint', 'mint needs sun', 'tomato plants']
+
+@pytest.mark.parametrize('shape', [('batch', 'length'), (2, 'length'), ('batch', 12)])
+def test_padded_batch_matches_each_query_alone(tmp_path, monkeypatch, shape):
+    model_path = write_pooling_classifier(tmp_path / 'classifier.onnx', *shape)
+    registry = ModelRegistry()
+    registry.register('chatbot_tokenizer', WordTokenizer)
+    registry.register('chatbot_session', lambda: SessionPool(model_path, max_batch=8, max_length=16))
+    monkeypatch.setattr(chatbot, 'registry', registry)
+
+    batched = chatbot.run_batch(QUERIES)
+    assert len(batched) == len(QUERIES)
+    for query, probabilities in zip(QUERIES, batched):
+        np.testing.assert_allclose(probabilities, chatbot.run_batch([query])[0], rtol=1e-5, atol=1e-6)
+
+def test_missing_model_input_is_reported_by_name(tmp_path):
+    pool = SessionPool(write_pooling_classifier(tmp_path / 'classifier.onnx'), max_batch=2, max_length=4)
+    with pytest.raises(ValueError, match="attention_mask"):
+        pool.run({'input_ids': np.ones((1, 3), dtype=np.int64)})
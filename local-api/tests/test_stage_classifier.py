@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+keras_image = pytest.importorskip('tensorflow.keras.utils')
+from models.plant_stage.stage_classifier import IMAGE_SIZE, preprocess_image
+
+@pytest.mark.parametrize('size, mode, extension', [
+    ((640, 480), 'RGB', 'jpg'),
+    ((3000, 2000), 'RGB', 'jpg'),
+    ((150, 300), 'RGB', 'png'),
+    ((500, 500), 'RGBA', 'png'),
+    ((800, 600), 'L', 'jpg'),
+])
+def test_preprocess_matches_keras_loader(tmp_path, size, mode, extension):
+    rng = np.random.default_rng(size[0])
+    pixels = rng.integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8)
+    path = tmp_path / f'image.{extension}'
+    Image.fromarray(pixels.squeeze(), mode).save(path)
+
+    # What flow_from_directory fed the model during training
+    expected = keras_image.img_to_array(keras_image.load_img(path, target_size=IMAGE_SIZE)) / 255.0
+    actual = preprocess_image(path.read_bytes())
+    assert actual.shape == (1, IMAGE_SIZE[0], IMAGE_SIZE[1], 3)
+    np.testing.assert_allclose(actual[0], expected, atol=1e-6)
@@ -0,0 +1,53 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from models.plant_optimization import stages
+from models.plant_optimization.stages import Stage, StageError, run_stages
+
+@pytest.fixture
+def busy_pool(monkeypatch):
+    """A two-thread stage pool whose threads are held by other requests' lookups until released."""
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(stages, '_executor', executor)
+    release = threading.Event()
+    for _ in range(2):
+        executor.submit(release.wait)
+    yield release
+    release.set()
+    executor.shutdown(wait=True)
+
+def test_inline_required_stage_succeeds_while_pool_is_saturated(busy_pool):
+    ran = []
+    results = run_stages([
+        Stage('catalog', lambda: 'catalog', inline=True),
+        Stage('weather', lambda: ran.append('weather'), (), 0.05, None),
+    ], deadline=0.1)
+    busy_pool.set()
+    time.sleep(0.05)
+    assert results == {'catalog': 'catalog', 'weather': None}
+    assert ran == []  # Cancelled while queued, so it never took a thread
+
+def test_queued_required_stage_fails_at_the_deadline(busy_pool):
+    with pytest.raises(StageError, match="not started"):
+        run_stages([Stage('catalog', lambda: 'catalog')], deadline=0.05)
+
+def test_stage_timeout_counts_from_when_it_starts(busy_pool):
+    threading.Timer(0.15, busy_pool.set).start()
+    results = run_stages([Stage('state', lambda: time.sleep(0.1) or 'Kerala', (), 0.2, 'Karnataka')], deadline=1.0)
+    assert results == {'state': 'Kerala'}
+
+def test_running_stage_over_its_timeout_falls_back():
+    results = run_stages([Stage('state', time.sleep, (0.3,), 0.05, 'Karnataka')], deadline=1.0)
+    assert results == {'state': 'Karnataka'}
+
+def test_failing_inline_stage_cancels_queued_stages(busy_pool):
+    ran = []
+    def broken():
+        raise OSError("catalog file missing")
+    with pytest.raises(StageError, match="catalog"):
+        run_stages([Stage('weather', lambda: ran.append('weather'), (), 1.0, None), Stage('catalog', broken, inline=True)],
+                   deadline=1.0)
+    busy_pool.set()
+    time.sleep(0.05)
+    assert ran == []
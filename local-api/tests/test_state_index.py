@@ -0,0 +1,65 @@
+import json
+import pytest
+from models.plant_optimization import get_address
+from models.plant_optimization.build_state_boundaries import parse_source
+from models.plant_optimization.state_index import STATE_BOUNDARIES_GEOJSON, StateIndex
+
+CAPITALS = [
+    ((12.9716, 77.5946), 'Karnataka'),
+    ((13.0827, 80.2707), 'Tamil Nadu'),
+    ((19.0760, 72.8777), 'Maharashtra'),
+    ((22.5726, 88.3639), 'West Bengal'),
+    ((17.3850, 78.4867), 'Telangana'),
+    ((26.9124, 75.7873), 'Rajasthan'),
+    ((26.8467, 80.9462), 'Uttar Pradesh'),
+    ((25.5941, 85.1376), 'Bihar'),
+    ((23.2599, 77.4126), 'Madhya Pradesh'),
+    ((8.5241, 76.9366), 'Kerala'),
+    ((26.1445, 91.7362), 'Assam'),
+    ((23.0225, 72.5714), 'Gujarat'),
+    ((20.2961, 85.8245), 'Odisha'),
+    ((15.4909, 73.8278), 'Goa'),
+    ((30.3165, 78.0322), 'Uttarakhand'),
+    ((28.6139, 77.2090), 'Delhi'),
+]
+
+@pytest.fixture(scope='module')
+def index():
+    return StateIndex.from_geojson(STATE_BOUNDARIES_GEOJSON)
+
+@pytest.mark.parametrize('point, state', CAPITALS)
+def test_shipped_boundaries_resolve_capitals(index, point, state):
+    assert index.lookup(*point) == state
+
+def test_points_outside_india_are_not_matched(index):
+    assert index.lookup_many([(27.7172, 85.3240), (6.9271, 79.8612), (51.5074, -0.1278)]) == [None, None, None]
+
+def test_fetch_states_stays_offline_inside_india(monkeypatch):
+    def remote(latitude, longitude):
+        raise AssertionError(f"Nominatim called for {latitude}, {longitude}")
+    monkeypatch.setattr(get_address, '_fetch_state_remote', remote)
+    points = [point for point, _ in CAPITALS]
+    assert get_address.fetch_states(points) == [state.capitalize() for _, state in CAPITALS]
+
+def test_parse_source_decodes_echarts_rings():
+    # A unit square around (77, 12) in ECharts' zigzag-delta encoding, scale 1024
+    offset = [77 * 1024, 12 * 1024]
+    steps = [(0, 0), (1024, 0), (0, 1024), (-1024, 0), (0, -1024)]
+    encoded = ''.join(chr(64 + ((d << 1) ^ (d >> 31) if d < 0 else d << 1)) for step in steps for d in step)
+    script = 'echarts.registerMap("India", ' + json.dumps({
+        'type': 'FeatureCollection', 'UTF8Encoding': True,
+        'features': [{'type': 'Feature', 'properties': {'name': 'Square'},
+                      'geometry': {'type': 'Polygon', 'coordinates': [encoded], 'encodeOffsets': [offset]}}],
+    }) + ');'
+    ring = parse_source(script)['features'][0]['geometry']['coordinates'][0]
+    assert ring == [[77, 12], [78, 12], [78, 13], [77, 13], [77, 12]]
+
+def test_fetch_states_falls_back_only_for_the_failed_point(monkeypatch):
+    # Two points outside every polygon: one remote lookup times out, the other answers
+    def remote(latitude, longitude):
+        if latitude < 10:
+            raise TimeoutError("Nominatim timed out")
+        return 'Sikkim'
+    monkeypatch.setattr(get_address, '_fetch_state_remote', remote)
+    points = [(6.9271, 79.8612), (12.9716, 77.5946), (27.7172, 85.3240)]
+    assert get_address.fetch_states(points) == [get_address.DEFAULT_STATE.capitalize(), 'Karnataka', 'Sikkim']